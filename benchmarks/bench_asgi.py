@@ -0,0 +1,287 @@
+"""Конкурентные запросы к страницам заметок: ASGI (async views) против WSGI.
+
+    python -m benchmarks.bench_asgi --users 64 --concurrency 64 \
+        --iterations 20 --json asgi.json
+
+Каждый режим запускается в отдельном процессе, чтобы пиковая память
+(maxrss) одного не влияла на другой. WSGI — yanote.wsgi с потоком на
+клиента, как у многопоточного сервера; ASGI — yanote.asgi с корутиной на
+клиента в одном цикле событий. Клиент входит под своим пользователем и
+по кругу проходит список, заметку, добавление, правку и удаление.
+Отчёт: пропускная способность, p50/p95/p99 по маршрутам, maxrss и
+наибольшее число потоков процесса.
+"""
+import argparse
+import asyncio
+import json
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from urllib.parse import urlencode
+
+from benchmarks.bench_routes import PASSWORD, WsgiClient, prepare_users
+from benchmarks.common import BENCH_DIR, setup_django, summarize
+
+ROUTES = ('list', 'detail', 'add', 'edit', 'delete')
+MODES = ('wsgi', 'asgi')
+# статусы успешного выполнения маршрута (редирект после формы)
+EXPECTED = {'add': 302, 'edit': 302, 'delete': 302}
+
+
+class AsgiClient(WsgiClient):
+    """Тот же клиент, но вызывает ASGI-приложение в текущем цикле."""
+
+    async def request(self, method, path, data=None):
+        body = urlencode(data or {}).encode()
+        headers = [
+            (b'host', b'testserver'),
+            (b'content-type', b'application/x-www-form-urlencoded'),
+            (b'content-length', str(len(body)).encode()),
+            (b'cookie', self.cookie_header().encode()),
+        ]
+        if method == 'POST':
+            headers.append((b'x-csrftoken',
+                            self.cookies.get('csrftoken', '').encode()))
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'},
+            'http_version': '1.1', 'method': method, 'scheme': 'http',
+            'path': path, 'raw_path': path.encode(), 'query_string': b'',
+            'root_path': '', 'headers': headers,
+            'client': (self.remote_addr, 0), 'server': ('testserver', 80),
+        }
+        messages = [{'type': 'http.request', 'body': body}]
+        response = {}
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            # тело прочитано: ждём отключения, как настоящий сервер
+            await asyncio.Event().wait()
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                response.update(message)
+
+        await self.application(scope, receive, send)
+        self.remember_cookies(
+            (name.decode('latin1'), value.decode('latin1'))
+            for name, value in response['headers'])
+        return response['status']
+
+
+class Scenario:
+    """Запросы одного прохода виртуального пользователя по ROUTES."""
+
+    def __init__(self, number, username, slugs, seed_value):
+        from django.urls import reverse
+
+        self.reverse = reverse
+        self.number = number
+        self.username = username
+        self.slugs = slugs
+        self.counter = 0
+        self.run_id = uuid.uuid4().hex[:8]
+        self.rnd = random.Random(seed_value)
+
+    def login(self):
+        url = self.reverse('users:login')
+        return [('GET', url, None),
+                ('POST', url, {'username': self.username,
+                               'password': PASSWORD})]
+
+    def iteration(self):
+        """(маршрут, метод, путь, данные); удаляется добавленная заметка."""
+        self.counter += 1
+        created = f'bench-asgi-{self.run_id}-{self.number}-{self.counter}'
+        detail = self.rnd.choice(self.slugs)
+        edited = self.rnd.choice(self.slugs)
+        return [
+            ('list', 'GET', self.reverse('notes:list'), None),
+            ('detail', 'GET', self.reverse('notes:detail', args=(detail,)),
+             None),
+            ('add', 'POST', self.reverse('notes:add'), {
+                'title': f'Нагрузка {created}', 'text': 'x' * 200,
+                'slug': created}),
+            ('edit', 'POST', self.reverse('notes:edit', args=(edited,)), {
+                'title': 'Правка', 'text': created, 'slug': edited}),
+            ('delete', 'POST', self.reverse('notes:delete', args=(created,)),
+             None),
+        ]
+
+
+class Recorder:
+    """Замеры всех клиентов и пиковое число потоков процесса."""
+
+    def __init__(self):
+        self.samples = {route: [] for route in ROUTES}
+        self.errors = {route: 0 for route in ROUTES}
+        self.peak_threads = threading.active_count()
+        self.lock = threading.Lock()
+
+    def add(self, route, started, status):
+        elapsed = (time.perf_counter() - started) * 1000
+        with self.lock:
+            self.samples[route].append(elapsed)
+            if status != EXPECTED.get(route, 200):
+                self.errors[route] += 1
+            self.peak_threads = max(self.peak_threads,
+                                    threading.active_count())
+
+
+def run_wsgi(scenarios, iterations, recorder):
+    from django.db import connection
+
+    from yanote.wsgi import application
+
+    def client_thread(scenario, ready):
+        client = WsgiClient(application)
+        try:
+            for method, path, data in scenario.login():
+                client.request(method, path, data)
+            ready.wait()
+            for _ in range(iterations):
+                for route, method, path, data in scenario.iteration():
+                    started = time.perf_counter()
+                    recorder.add(route, started,
+                                 client.request(method, path, data))
+        finally:
+            connection.close()
+
+    ready = threading.Barrier(len(scenarios) + 1)
+    threads = [threading.Thread(target=client_thread, args=(scenario, ready))
+               for scenario in scenarios]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started
+
+
+def run_asgi(scenarios, iterations, recorder):
+    from yanote.asgi import application
+
+    async def login(scenario):
+        client = AsgiClient(application)
+        for method, path, data in scenario.login():
+            await client.request(method, path, data)
+        return client
+
+    async def run():
+        clients = await asyncio.gather(*map(login, scenarios))
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            drive(client, scenario)
+            for client, scenario in zip(clients, scenarios)))
+        return time.perf_counter() - started
+
+    async def drive(client, scenario):
+        for _ in range(iterations):
+            for route, method, path, data in scenario.iteration():
+                started = time.perf_counter()
+                recorder.add(route, started,
+                             await client.request(method, path, data))
+
+    return asyncio.run(run())
+
+
+def run_mode(args):
+    setup_django(args.db)
+    from django.conf import settings
+
+    # все сценарии входят с одного адреса: без лимитов notes.throttle
+    settings.AUTH_THROTTLE_RATES = {}
+    users = prepare_users(args.users, args.notes_per_user, args.text_size)
+    if len(users) < args.concurrency:
+        sys.exit('--concurrency больше числа пользователей')
+    scenarios = [
+        Scenario(number, username, slugs, args.seed + number)
+        for number, (username, slugs) in enumerate(users[:args.concurrency])
+    ]
+    recorder = Recorder()
+    runner = run_asgi if args.mode == 'asgi' else run_wsgi
+    elapsed = runner(scenarios, args.iterations, recorder)
+    total = sum(len(values) for values in recorder.samples.values())
+    return {
+        'mode': args.mode,
+        'concurrency': args.concurrency,
+        'elapsed_s': round(elapsed, 3),
+        'requests': total,
+        'throughput_rps': round(total / elapsed, 1),
+        # ru_maxrss в Linux — в килобайтах
+        'maxrss_mb': round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'peak_threads': recorder.peak_threads,
+        'routes': {
+            route: {**summarize(values), 'errors': recorder.errors[route]}
+            for route, values in recorder.samples.items() if values
+        },
+    }
+
+
+def run_both(args):
+    """Каждый режим — в своём процессе; база общая и заполняется один раз."""
+    reports = {}
+    for mode in MODES:
+        with tempfile.NamedTemporaryFile('r', suffix='.json') as output:
+            subprocess.run([
+                sys.executable, '-m', 'benchmarks.bench_asgi',
+                '--mode', mode, '--json', output.name,
+                '--users', str(args.users),
+                '--notes-per-user', str(args.notes_per_user),
+                '--text-size', str(args.text_size),
+                '--iterations', str(args.iterations),
+                '--concurrency', str(args.concurrency),
+                '--seed', str(args.seed), '--db', str(args.db),
+            ], check=True, stdout=subprocess.DEVNULL)
+            reports[mode] = json.load(output)
+    return reports
+
+
+def print_comparison(reports):
+    print(f'{"":<16}' + ''.join(f'{mode:>12}' for mode in reports))
+    for key in ('throughput_rps', 'maxrss_mb', 'peak_threads'):
+        print(f'{key:<16}' + ''.join(
+            f'{report[key]:>12}' for report in reports.values()))
+    for route in ROUTES:
+        print(f'{route + " p95":<16}' + ''.join(
+            f'{report["routes"][route]["p95"]:>12}'
+            for report in reports.values()))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--mode', choices=MODES + ('both',), default='both')
+    parser.add_argument('--users', type=int, default=32)
+    parser.add_argument('--notes-per-user', type=int, default=100)
+    parser.add_argument('--text-size', type=int, default=500)
+    parser.add_argument('--iterations', type=int, default=10,
+                        help='проходов по маршрутам на клиента')
+    parser.add_argument('--concurrency', type=int, default=32,
+                        help='одновременных клиентов')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--db', default=BENCH_DIR / 'asgi.sqlite3')
+    parser.add_argument('--json', help='куда сохранить отчёт')
+    args = parser.parse_args()
+
+    if args.mode == 'both':
+        report = run_both(args)
+        print_comparison(report)
+    else:
+        report = run_mode(args)
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
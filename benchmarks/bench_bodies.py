@@ -0,0 +1,120 @@
+"""Большие тексты в строке notes_note против сжатых в NoteBody.
+
+    python -m benchmarks.bench_bodies --notes 500 --text-size 200000
+
+Каждый режим — в своём процессе и на своей базе: inline (порог сжатия
+выше любого текста) и compressed (сжимается всё от --threshold).
+Отчёт: размер файла БД, задержка страницы списка (for_list), полного
+просмотра notes_note по заголовку и страницы заметки целиком.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import BENCH_DIR, seed, setup_django, summarize, timed
+
+MODES = ('inline', 'compressed')
+WORDS = (
+    'заметка текст встреча проект отчёт задача план релиз ревью идея '
+    'note text meeting project report task plan release review idea'
+).split()
+
+
+def make_text_factory(size):
+    def make_text(rnd):
+        words = []
+        length = 0
+        while length < size:
+            word = rnd.choice(WORDS)
+            words.append(word)
+            length += len(word) + 1
+        return ' '.join(words)[:size]
+    return make_text
+
+
+def run_mode(args):
+    db = BENCH_DIR / f'bodies_{args.mode}.sqlite3'
+    setup_django(db)
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.test import Client
+    from django.urls import reverse
+
+    from notes.models import Note
+    from notes.pagination import paginate_keyset
+
+    settings.NOTES_BODY_COMPRESS_THRESHOLD = (
+        args.threshold if args.mode == 'compressed' else sys.maxsize)
+    if not Note.objects.exists():
+        seed(args.users, args.notes, batch_size=50,
+             make_text=make_text_factory(args.text_size))
+        with connection.cursor() as cursor:
+            cursor.execute('VACUUM')
+    author = get_user_model().objects.get(username='bench-0')
+    notes = Note.objects.filter(author=author)
+    slug = notes.values_list('slug', flat=True).first()
+    client = Client()
+    client.force_login(author)
+    detail_url = reverse('notes:detail', args=(slug,))
+
+    def detail():
+        response = client.get(detail_url)
+        if response.streaming:
+            return b''.join(response.streaming_content)
+        return response.content
+
+    return {
+        'mode': args.mode,
+        'db_mb': round(os.path.getsize(db) / 2 ** 20, 1),
+        'list_page': summarize(timed(
+            lambda: list(paginate_keyset(notes.for_list(), 20).object_list),
+            args.repeat)),
+        'title_scan': summarize(timed(
+            lambda: Note.objects.filter(title__contains='99').count(),
+            args.repeat)),
+        'detail': summarize(timed(detail, args.repeat)),
+    }
+
+
+def run_both(args):
+    reports = {}
+    for mode in MODES:
+        with tempfile.NamedTemporaryFile('r', suffix='.json') as output:
+            subprocess.run([
+                sys.executable, '-m', 'benchmarks.bench_bodies',
+                '--mode', mode, '--json', output.name,
+                '--users', str(args.users), '--notes', str(args.notes),
+                '--text-size', str(args.text_size),
+                '--threshold', str(args.threshold),
+                '--repeat', str(args.repeat),
+            ], check=True)
+            reports[mode] = json.load(output)
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--mode', choices=MODES + ('both',), default='both')
+    parser.add_argument('--users', type=int, default=5)
+    parser.add_argument('--notes', type=int, default=500)
+    parser.add_argument('--text-size', type=int, default=200_000)
+    parser.add_argument('--threshold', type=int, default=64 * 1024)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--json', help='куда сохранить отчёт')
+    args = parser.parse_args()
+
+    report = run_both(args) if args.mode == 'both' else run_mode(args)
+    json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+    print()
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""Байты ответа и задержка страниц заметок и статики со сжатием и без.
+
+    python -m benchmarks.bench_compression --repeat 200 --text-size 2000
+
+HTML: notes:list и notes:detail при NOTES_GZIP_HTML выключенном (off) и
+включённом (gzip, клиент шлёт Accept-Encoding: gzip). Статика:
+collectstatic во временный STATIC_ROOT, затем объём всех собранных
+файлов с хешем и их копий .gz и запрос одного файла через
+StaticFilesMiddleware. Байты — тело плюс заголовки ответа. Задержка —
+время полного ответа через тестовый клиент в процессе, без сети:
+выигрыш сжатия на медленном канале сюда не входит.
+"""
+import argparse
+import json
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.common import BENCH_DIR, seed, setup_django, summarize
+
+WORDS = ('заметка план встреча отчёт задача идея проект список покупки '
+         'note plan meeting report task idea project list').split()
+STATIC_SAMPLE = 'admin/css/base.css'
+
+
+def make_text(size):
+    def make(rnd):
+        words = []
+        length = 0
+        while length < size:
+            word = rnd.choice(WORDS)
+            words.append(word)
+            length += len(word) + 1
+        return ' '.join(words)
+    return make
+
+
+def response_size(response):
+    body = (b''.join(response.streaming_content) if response.streaming
+            else response.content)
+    headers = sum(len(f'{name}: {value}\r\n')
+                  for name, value in response.items())
+    return len(body) + headers
+
+
+def measure(client, url, repeat, headers):
+    samples = []
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(url, **headers)
+        size = response_size(response)
+        samples.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, (url, response.status_code)
+    return {'bytes': size, **summarize(samples)}
+
+
+def html_report(author, urls, repeat):
+    from django.conf import settings
+    from django.core.cache import cache
+    from django.test import Client
+
+    report = {}
+    for mode, enabled in (('off', False), ('gzip', True)):
+        settings.NOTES_GZIP_HTML = enabled
+        cache.clear()
+        # middleware читают настройки при первом запросе клиента
+        client = Client()
+        client.force_login(author)
+        report[mode] = {
+            page: measure(client, url, repeat,
+                          {'HTTP_ACCEPT_ENCODING': 'gzip'})
+            for page, url in urls.items()
+        }
+    return report
+
+
+def static_report(repeat):
+    from django.conf import settings
+    from django.contrib.staticfiles.storage import staticfiles_storage
+    from django.core.management import call_command
+    from django.test import Client, override_settings
+
+    root = tempfile.mkdtemp()
+    try:
+        # override_settings пересоздаёт staticfiles_storage под новый корень
+        with override_settings(STATIC_ROOT=root):
+            started = time.perf_counter()
+            call_command('collectstatic', interactive=False, verbosity=0)
+            collect_ms = (time.perf_counter() - started) * 1000
+            storage = staticfiles_storage
+            hashed = sorted(set(storage.hashed_files.values()))
+            raw = sum(storage.size(name) for name in hashed)
+            compressed = sum(
+                storage.size(name + '.gz') if storage.exists(name + '.gz')
+                else storage.size(name)
+                for name in hashed)
+            url = settings.STATIC_URL + storage.stored_name(STATIC_SAMPLE)
+            client = Client()
+            return {
+                'collectstatic_ms': round(collect_ms),
+                'files': len(hashed),
+                'bytes_raw': raw,
+                'bytes_gzip': compressed,
+                STATIC_SAMPLE: {
+                    'off': measure(client, url, repeat, {}),
+                    'gzip': measure(client, url, repeat,
+                                    {'HTTP_ACCEPT_ENCODING': 'gzip'}),
+                },
+            }
+    finally:
+        shutil.rmtree(root)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--notes', type=int, default=50,
+                        help='заметок у пользователя')
+    parser.add_argument('--text-size', type=int, default=2000)
+    parser.add_argument('--db', default=BENCH_DIR / 'compression.sqlite3')
+    parser.add_argument('--json', help='куда сохранить отчёт')
+    args = parser.parse_args()
+
+    setup_django(args.db)
+    from django.contrib.auth import get_user_model
+    from django.urls import reverse
+
+    from notes.models import Note
+
+    if not Note.objects.exists():
+        seed(1, args.notes, make_text=make_text(args.text_size))
+    author = get_user_model().objects.get(username='bench-0')
+    slug = random.Random(0).choice(list(
+        Note.objects.filter(author=author).values_list('slug', flat=True)))
+    urls = {
+        'notes:list': reverse('notes:list'),
+        'notes:detail': reverse('notes:detail', args=(slug,)),
+    }
+    report = {
+        'html': html_report(author, urls, args.repeat),
+        'static': static_report(args.repeat),
+    }
+    json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+    print()
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Планы запросов и задержки списка/заметки до и после составных индексов.
+
+    python -m benchmarks.bench_indexes --notes 1000000
+
+«До» — схема из 0001_initial: одиночный индекс по author_id и уникальный
+по slug. «После» — индексы из Note.Meta.indexes.
+"""
+import argparse
+
+from benchmarks.common import BENCH_DIR, seed, setup_django, summarize, timed
+
+BASELINE_INDEX = 'bench_note_author_id'
+
+
+def drop_meta_indexes(connection, model):
+    with connection.schema_editor() as editor:
+        for index in model._meta.indexes:
+            editor.remove_index(model, index)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE INDEX {BASELINE_INDEX} ON notes_note (author_id)'
+        )
+        cursor.execute('ANALYZE')
+
+
+def restore_meta_indexes(connection, model):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP INDEX IF EXISTS {BASELINE_INDEX}')
+    with connection.schema_editor() as editor:
+        for index in model._meta.indexes:
+            editor.add_index(model, index)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def run_queries(label, author_id, slug, cursor_id, page_size, repeat):
+    from notes.models import Note
+
+    notes = Note.objects.filter(author_id=author_id)
+    queries = {
+        'list_first_page': notes.order_by('id')[:page_size],
+        'list_deep_page': notes.filter(
+            id__gt=cursor_id).order_by('id')[:page_size],
+        'detail': notes.filter(slug=slug),
+    }
+    print(f'== {label}')
+    for name, queryset in queries.items():
+        print(f'-- {name}')
+        print(queryset.explain())
+        # queryset.all() — новая копия без кеша результатов
+        print(summarize(timed(lambda: list(queryset.all()), repeat)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--notes', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--page-size', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--db', default=BENCH_DIR / 'indexes.sqlite3')
+    args = parser.parse_args()
+
+    setup_django(args.db)
+    from django.db import connection
+
+    from notes.models import Note
+
+    if not Note.objects.exists():
+        seed(args.users, args.notes)
+    # автор первой заметки и заметка из середины его списка
+    author_id = Note.objects.values_list('author_id', flat=True).first()
+    ids = list(Note.objects.filter(
+        author_id=author_id).order_by('id').values_list('id', flat=True))
+    middle = Note.objects.get(id=ids[len(ids) // 2])
+
+    drop_meta_indexes(connection, Note)
+    try:
+        run_queries('before', author_id, middle.slug, middle.id,
+                    args.page_size, args.repeat)
+    finally:
+        restore_meta_indexes(connection, Note)
+    run_queries('after', author_id, middle.slug, middle.id,
+                args.page_size, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Страница списка на заметках с большими текстами: весь text против for_list.
+
+    python -m benchmarks.bench_list_text --notes 200 --text-size 1000000
+
+Для страницы списка (NOTES_PAGE_SIZE заметок автора) сравнивается
+выборка полных строк и Note.objects.for_list(), которая берёт только
+excerpt и text_length. Отчёт: задержка и пик памяти Python (tracemalloc)
+на одну страницу.
+"""
+import argparse
+import tracemalloc
+
+from benchmarks.common import BENCH_DIR, seed, setup_django, summarize, timed
+
+
+def peak_memory_mb(func):
+    tracemalloc.start()
+    try:
+        func()
+        return round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--notes', type=int, default=200)
+    parser.add_argument('--text-size', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--db', default=BENCH_DIR / 'list_text.sqlite3')
+    args = parser.parse_args()
+
+    setup_django(args.db)
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+
+    from notes.models import Note
+    from notes.pagination import paginate_keyset
+
+    if not Note.objects.exists():
+        # небольшие пачки: каждая строка весит text_size
+        seed(1, args.notes, text_size=args.text_size, batch_size=20)
+    author = get_user_model().objects.get(username='bench-0')
+    notes = Note.objects.filter(author=author)
+    variants = {'full rows': notes, 'for_list': notes.for_list()}
+    for name, queryset in variants.items():
+        def page():
+            return [
+                (note.id, note.slug, note.title, note.excerpt,
+                 note.text_length)
+                for note in paginate_keyset(
+                    queryset, settings.NOTES_PAGE_SIZE).object_list
+            ]
+        print(f'== {name}')
+        print('latency', summarize(timed(page, args.repeat)))
+        print('peak memory, MB', peak_memory_mb(page))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""Страницы заметок под потоком подбора паролей, с лимитами входа и без.
+
+    python -m benchmarks.bench_login_flood --readers 4 --attackers 16 \
+        --seconds 10
+
+Читатели входят под своими пользователями и по кругу открывают список и
+страницы заметок. Атакующие с --addresses адресов шлют POST на вход с
+неверным паролем для имён читателей. Прогон без лимитов (off) и с
+settings.AUTH_THROTTLE_RATES (on). Отчёт: пропускная способность и
+p50/p95/p99 читателей, сколько попыток входа дошло до проверки пароля
+(ответ 200) и сколько отклонено (429), цена одной проверки пароля
+хешером профиля.
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from benchmarks.bench_routes import (PASSWORD, WsgiClient, Worker,
+                                     prepare_users)
+from benchmarks.common import BENCH_DIR, setup_django, summarize, timed
+
+
+def read_notes(worker, deadline, samples):
+    from django.db import connection
+
+    rnd = random.Random(worker.number)
+    try:
+        while time.monotonic() < deadline:
+            route = worker.list if rnd.random() < 0.5 else worker.detail
+            started = time.perf_counter()
+            route()
+            samples.append((time.perf_counter() - started) * 1000)
+    finally:
+        connection.close()
+
+
+def flood_login(application, address, usernames, deadline, seed_value,
+                statuses):
+    from django.db import connection
+    from django.urls import reverse
+
+    client = WsgiClient(application, remote_addr=address)
+    url = reverse('users:login')
+    client.request('GET', url)
+    rnd = random.Random(seed_value)
+    try:
+        while time.monotonic() < deadline:
+            statuses[client.request('POST', url, {
+                'username': rnd.choice(usernames),
+                'password': 'wrong-password'})] += 1
+    finally:
+        connection.close()
+
+
+def run_phase(application, users, args, rates):
+    from django.conf import settings
+    from django.core.cache import cache
+
+    settings.AUTH_THROTTLE_RATES = {}
+    cache.clear()
+    readers = [
+        Worker(application, number, username, slugs, args.seed + number)
+        for number, (username, slugs) in enumerate(users[:args.readers])
+    ]
+    # лимиты включаются после входа читателей
+    settings.AUTH_THROTTLE_RATES = rates
+    usernames = [username for username, _ in users]
+    deadline = time.monotonic() + args.seconds
+    samples = []
+    statuses = [Counter() for _ in range(args.attackers)]
+    threads = [
+        threading.Thread(target=read_notes, args=(reader, deadline, samples))
+        for reader in readers
+    ] + [
+        threading.Thread(target=flood_login, args=(
+            application, f'203.0.113.{number % args.addresses + 1}',
+            usernames, deadline, args.seed + number, statuses[number]))
+        for number in range(args.attackers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    attempts = sum(statuses, Counter())
+    return {
+        'readers': {
+            **summarize(samples),
+            'throughput_rps': round(len(samples) / args.seconds, 1),
+        },
+        'login_attempts': {
+            'checked': attempts[200],
+            'throttled': attempts[429],
+            'other': sum(attempts.values()) - attempts[200] - attempts[429],
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--notes-per-user', type=int, default=50)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--attackers', type=int, default=16)
+    parser.add_argument('--addresses', type=int, default=4,
+                        help='со скольких IP идёт подбор')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--db', default=BENCH_DIR / 'login_flood.sqlite3')
+    parser.add_argument('--json', help='куда сохранить отчёт')
+    args = parser.parse_args()
+
+    setup_django(args.db)
+    from django.conf import settings
+    from django.contrib.auth.hashers import check_password, make_password
+
+    from yanote.wsgi import application
+
+    users = prepare_users(args.users, args.notes_per_user, 200)
+    if len(users) < args.readers:
+        parser.error('--readers больше числа пользователей')
+    encoded = make_password(PASSWORD)
+    rates = settings.AUTH_THROTTLE_RATES
+    report = {
+        'hasher_profile': settings.PASSWORD_HASHER_PROFILE,
+        'check_password_ms': summarize(
+            timed(lambda: check_password(PASSWORD, encoded), 20)),
+        'off': run_phase(application, users, args, {}),
+        'on': run_phase(application, users, args, rates),
+    }
+    json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+    print()
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,309 @@
+"""Нагрузка на все страницы notes и auth через WSGI-приложение в процессе.
+
+    python -m benchmarks.bench_routes --users 100 --notes-per-user 200 \
+        --iterations 200 --concurrency 4 --json after.json \
+        --compare before.json
+
+Каждый поток — отдельный клиент со своими cookie и CSRF-токеном: входит
+под своим пользователем и по кругу проходит маршруты из --routes.
+Отчёт: общая пропускная способность и p50/p95/p99 по каждому маршруту;
+--json сохраняет его для сравнения с другим прогоном через --compare.
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from http.cookies import SimpleCookie
+from io import BytesIO
+from urllib.parse import urlencode
+from wsgiref.util import setup_testing_defaults
+
+from benchmarks.common import BENCH_DIR, seed, setup_django, summarize
+
+ROUTES = ('home', 'list', 'add', 'success', 'detail', 'edit', 'delete',
+          'login', 'signup')
+PASSWORD = 'bench-password-0'
+
+
+class WsgiClient:
+    """Минимальный клиент: вызывает WSGI-приложение напрямую."""
+
+    def __init__(self, application, remote_addr='127.0.0.1'):
+        self.application = application
+        self.remote_addr = remote_addr
+        self.cookies = {}
+
+    def request(self, method, path, data=None):
+        body = urlencode(data or {}).encode()
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path,
+            'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.input': BytesIO(body),
+            'HTTP_COOKIE': self.cookie_header(),
+            'REMOTE_ADDR': self.remote_addr,
+        }
+        if method == 'POST':
+            environ['HTTP_X_CSRFTOKEN'] = self.cookies.get('csrftoken', '')
+        setup_testing_defaults(environ)
+        status_headers = []
+
+        def start_response(status, headers, exc_info=None):
+            status_headers[:] = [status, headers]
+
+        result = self.application(environ, start_response)
+        try:
+            for _ in result:
+                pass
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        status, headers = status_headers
+        self.remember_cookies(headers)
+        return int(status.split()[0])
+
+    def cookie_header(self):
+        return '; '.join(
+            f'{name}={value}' for name, value in self.cookies.items())
+
+    def remember_cookies(self, headers):
+        for name, value in headers:
+            if name.lower() == 'set-cookie':
+                for morsel in SimpleCookie(value).values():
+                    if morsel['max-age'] == '0':
+                        self.cookies.pop(morsel.key, None)
+                    else:
+                        self.cookies[morsel.key] = morsel.value
+
+
+class Worker:
+    """Виртуальный пользователь: маршрут -> действие, возвращающее статус."""
+
+    def __init__(self, application, number, username, slugs, seed_value):
+        from django.urls import reverse
+
+        self.reverse = reverse
+        self.client = WsgiClient(application)
+        self.number = number
+        self.username = username
+        self.slugs = slugs
+        self.created = []
+        self.counter = 0
+        # имена и slug уникальны и между прогонами на одной базе
+        self.run_id = uuid.uuid4().hex[:8]
+        self.rnd = random.Random(seed_value)
+        # CSRF-cookie и сессия до начала замеров
+        self.client.request('GET', reverse('users:login'))
+        self.login()
+
+    def unique(self, prefix):
+        self.counter += 1
+        return f'{prefix}-{self.run_id}-{self.number}-{self.counter}'
+
+    def login(self):
+        return self.client.request('POST', self.reverse('users:login'), {
+            'username': self.username, 'password': PASSWORD})
+
+    def signup(self):
+        return self.client.request('POST', self.reverse('users:signup'), {
+            'username': self.unique('bench-signup'),
+            'password1': PASSWORD, 'password2': PASSWORD})
+
+    def home(self):
+        return self.client.request('GET', self.reverse('notes:home'))
+
+    def list(self):
+        return self.client.request('GET', self.reverse('notes:list'))
+
+    def success(self):
+        return self.client.request('GET', self.reverse('notes:success'))
+
+    def add(self):
+        slug = self.unique('bench-add')
+        status = self.client.request('POST', self.reverse('notes:add'), {
+            'title': f'Нагрузка {slug}', 'text': 'x' * 200, 'slug': slug})
+        self.created.append(slug)
+        return status
+
+    def detail(self):
+        slug = self.rnd.choice(self.slugs)
+        return self.client.request(
+            'GET', self.reverse('notes:detail', args=(slug,)))
+
+    def edit(self):
+        slug = self.rnd.choice(self.slugs)
+        return self.client.request(
+            'POST', self.reverse('notes:edit', args=(slug,)), {
+                'title': 'Правка', 'text': self.unique('text'),
+                'slug': slug})
+
+    def delete(self):
+        from notes.models import Note
+
+        if self.created:
+            slug = self.created.pop()
+        else:
+            # без add удалять нечего: заметка создаётся вне замера
+            slug = self.unique('bench-delete')
+            Note.objects.create(title=slug, text='x', slug=slug,
+                                author_id=self.author_id())
+        return self.client.request(
+            'POST', self.reverse('notes:delete', args=(slug,)))
+
+    def author_id(self):
+        from django.contrib.auth import get_user_model
+
+        return get_user_model().objects.get(username=self.username).pk
+
+
+# статусы успешного выполнения маршрута (редирект после формы)
+EXPECTED = {'add': 302, 'edit': 302, 'delete': 302, 'login': 302,
+            'signup': 302}
+
+
+def run_worker(worker, routes, iterations, warmup, samples, errors, lock):
+    from django.db import connection
+
+    local = {route: [] for route in routes}
+    failed = {route: 0 for route in routes}
+    try:
+        for _ in range(warmup):
+            for route in routes:
+                getattr(worker, route)()
+        for _ in range(iterations):
+            for route in routes:
+                started = time.perf_counter()
+                status = getattr(worker, route)()
+                local[route].append((time.perf_counter() - started) * 1000)
+                if status != EXPECTED.get(route, 200):
+                    failed[route] += 1
+    finally:
+        connection.close()
+    with lock:
+        for route in routes:
+            samples[route].extend(local[route])
+            errors[route] += failed[route]
+
+
+def prepare_users(count, notes_per_user, text_size):
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+
+    from notes.models import Note
+
+    user_model = get_user_model()
+    if not user_model.objects.filter(username__startswith='bench-').exists():
+        seed(count, count * notes_per_user, text_size=text_size, even=True)
+    users = user_model.objects.filter(username__regex=r'^bench-\d+$')
+    # один хеш на всех: вход каждого потока — честная проверка пароля
+    users.update(password=make_password(PASSWORD))
+    users = list(users.order_by('id'))
+    return [
+        (user.username, list(Note.objects.filter(
+            author=user, slug__startswith='note-'
+        ).values_list('slug', flat=True)))
+        for user in users
+    ]
+
+
+def compare(report, baseline_path):
+    with open(baseline_path, encoding='utf-8') as file:
+        baseline = json.load(file)
+    print(f'== сравнение с {baseline_path}')
+    print(f'{"route":<10} {"p50":>18} {"p95":>18} {"p99":>18}')
+    for route, current in report['routes'].items():
+        before = baseline['routes'].get(route)
+        if before is None:
+            continue
+        cells = []
+        for metric in ('p50', 'p95', 'p99'):
+            ratio = current[metric] / before[metric] if before[metric] else 0
+            cells.append(f'{before[metric]:.1f}->{current[metric]:.1f} '
+                         f'x{ratio:.2f}')
+        print(f'{route:<10} ' + ' '.join(f'{cell:>18}' for cell in cells))
+    print(f'throughput: {baseline["throughput_rps"]} -> '
+          f'{report["throughput_rps"]} req/s')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--notes-per-user', type=int, default=100)
+    parser.add_argument('--text-size', type=int, default=500)
+    parser.add_argument('--iterations', type=int, default=50,
+                        help='проходов по маршрутам на поток')
+    parser.add_argument('--warmup', type=int, default=1,
+                        help='проходов без замеров перед основными')
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--routes', default=','.join(ROUTES))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--db', default=BENCH_DIR / 'routes.sqlite3')
+    parser.add_argument('--json', help='куда сохранить отчёт')
+    parser.add_argument('--compare', help='отчёт прошлого прогона')
+    args = parser.parse_args()
+    routes = [route for route in args.routes.split(',') if route]
+    unknown = set(routes) - set(ROUTES)
+    if unknown:
+        parser.error(f'неизвестные маршруты: {", ".join(sorted(unknown))}')
+
+    setup_django(args.db)
+    from django.conf import settings
+
+    from yanote.wsgi import application
+
+    # потоки входят снова и снова с одного адреса: без лимитов
+    # notes.throttle, иначе замеряются ответы 429
+    settings.AUTH_THROTTLE_RATES = {}
+
+    users = prepare_users(args.users, args.notes_per_user, args.text_size)
+    if len(users) < args.concurrency:
+        parser.error('--concurrency больше числа пользователей')
+    workers = [
+        Worker(application, number, username, slugs, args.seed + number)
+        for number, (username, slugs) in enumerate(
+            users[:args.concurrency])
+    ]
+    samples = {route: [] for route in routes}
+    errors = {route: 0 for route in routes}
+    lock = threading.Lock()
+    threads = [
+        threading.Thread(target=run_worker, args=(
+            worker, routes, args.iterations, args.warmup, samples, errors,
+            lock))
+        for worker in workers
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    total = sum(len(values) for values in samples.values())
+    report = {
+        'config': {key: str(value) for key, value in vars(args).items()
+                   if key not in ('json', 'compare')},
+        'elapsed_s': round(elapsed, 3),
+        'requests': total,
+        'throughput_rps': round(total / elapsed, 1),
+        'routes': {
+            route: {**summarize(values), 'errors': errors[route]}
+            for route, values in samples.items()
+        },
+    }
+    json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+    print()
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Задержка полнотекстового поиска (FTS5 + bm25) против icontains.
+
+    python -m benchmarks.bench_search --notes 1000000
+
+Три запроса от одного до трёх слов по заметкам одного автора: первая
+страница search_notes и тот же поиск через icontains по заголовку и
+тексту. Отчёт: p50/p95/p99 каждого способа.
+"""
+import argparse
+
+from benchmarks.common import BENCH_DIR, seed, setup_django, summarize, timed
+
+WORDS = (
+    'молоко хлеб встреча отчёт проект звонок письмо задача идея книга '
+    'фильм отпуск ремонт врач подарок код релиз баг тест ревью план '
+    'бюджет поездка билет машина дача сад кофе спорт бег йога музыка'
+).split()
+
+
+# Словарь побольше, чтобы каждое слово встречалось в доле процента заметок.
+VOCABULARY = WORDS + [f'слово{index}' for index in range(5000)]
+
+
+def make_text(rnd):
+    return ' '.join(rnd.choices(VOCABULARY, k=30))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--notes', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=100)
+    parser.add_argument('--db', default=BENCH_DIR / 'search.sqlite3')
+    args = parser.parse_args()
+
+    setup_django(args.db)
+    from django.contrib.auth import get_user_model
+    from django.db.models import Q
+
+    from notes.models import Note
+    from notes.search import search_notes
+
+    if not Note.objects.exists():
+        seed(args.users, args.notes, make_text=make_text)
+    author = get_user_model().objects.get(
+        pk=Note.objects.values_list('author_id', flat=True).first())
+    for query in ('молоко', 'молоко релиз', 'йога кофе бюджет'):
+        print(f'== {query}')
+        fts = timed(lambda: search_notes(author, query, 1, 20), args.repeat)
+        print('fts5', summarize(fts))
+        words = query.split()
+        condition = Q()
+        for word in words:
+            condition &= Q(title__icontains=word) | Q(text__icontains=word)
+        scan = Note.objects.filter(condition, author=author).order_by('-id')
+        print('icontains', summarize(timed(
+            lambda: list(scan.all()[:21]), max(args.repeat // 10, 1))))
+
+
+if __name__ == '__main__':
+    main()
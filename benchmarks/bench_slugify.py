@@ -0,0 +1,58 @@
+"""Стоимость одного вызова транслитерации: pytils.slugify против make_slug.
+
+    python -m benchmarks.bench_slugify --titles 100000 --distinct 5000
+
+Заголовки выбираются из --distinct различных, как повторы в реальных
+заметках, и каждый превращается в slug обоими способами. Отчёт: время
+одного вызова в микросекундах и статистика кеша make_slug.
+"""
+import argparse
+import random
+import time
+
+from benchmarks.common import BENCH_DIR, setup_django
+
+WORDS = (
+    'купить молоко встреча с командой отчёт за квартал позвонить маме '
+    'список дел на неделю идеи для проекта прочитать книгу записаться '
+    'к врачу подарок на день рождения план поездки ремонт на даче'
+).split()
+
+
+def make_titles(count, distinct, seed_value):
+    rnd = random.Random(seed_value)
+    pool = [' '.join(rnd.choices(WORDS, k=rnd.randint(2, 6))).capitalize()
+            for _ in range(distinct)]
+    return [rnd.choice(pool) for _ in range(count)]
+
+
+def per_call_us(func, titles):
+    started = time.perf_counter()
+    for title in titles:
+        func(title)
+    return (time.perf_counter() - started) / len(titles) * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--titles', type=int, default=100_000)
+    parser.add_argument('--distinct', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    setup_django(BENCH_DIR / 'slugify.sqlite3')
+    from pytils.translit import slugify
+
+    from notes.slugs import make_slug
+
+    titles = make_titles(args.titles, args.distinct, args.seed)
+    before = per_call_us(lambda title: slugify(title)[:100], titles)
+    make_slug.cache_clear()
+    after = per_call_us(lambda title: make_slug(title, 100), titles)
+    print(f'pytils.slugify: {before:.2f} us/call')
+    print(f'make_slug:      {after:.2f} us/call')
+    print(make_slug.cache_info())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Конкурентная нагрузка чтения/записи на SQLite с прагмами и без.
+
+    python -m benchmarks.bench_sqlite_load --threads 16 --seconds 10
+
+Потоки через тестовый клиент создают и редактируют заметки и открывают
+список и страницы заметок. «До» — умолчания SQLite (журнал DELETE,
+synchronous=FULL), «после» — settings.SQLITE_PRAGMAS.
+"""
+import argparse
+import random
+import threading
+import time
+from collections import Counter
+
+from benchmarks.common import BENCH_DIR, setup_django
+
+BASELINE_PRAGMAS = {'journal_mode': 'DELETE', 'synchronous': 'FULL'}
+
+
+def worker(user, write_share, deadline, seed_value, results):
+    from django.db import OperationalError, connection
+    from django.test import Client
+    from django.urls import reverse
+
+    from notes.models import Note
+
+    rnd = random.Random(seed_value)
+    client = Client()
+    client.force_login(user)
+    slugs = list(Note.objects.filter(
+        author=user).values_list('slug', flat=True))
+    counts = Counter()
+    try:
+        while time.monotonic() < deadline:
+            write = rnd.random() < write_share
+            try:
+                if write and slugs and rnd.random() < 0.5:
+                    response = client.post(
+                        reverse('notes:edit', args=(rnd.choice(slugs),)),
+                        {'title': 'Правка', 'text': 'x' * 200,
+                         'slug': rnd.choice(slugs)})
+                elif write:
+                    response = client.post(
+                        reverse('notes:add'),
+                        {'title': f'Нагрузка {rnd.random()}',
+                         'text': 'x' * 200})
+                elif slugs and rnd.random() < 0.5:
+                    response = client.get(
+                        reverse('notes:detail', args=(rnd.choice(slugs),)))
+                else:
+                    response = client.get(reverse('notes:list'))
+            except OperationalError as error:
+                counts['locked' if 'locked' in str(error) else 'error'] += 1
+                continue
+            counts['writes' if write else 'reads'] += 1
+            if response.status_code >= 500:
+                counts['error'] += 1
+    finally:
+        connection.close()
+    results.append(counts)
+
+
+def run(label, pragmas, users, args):
+    from django.conf import settings
+    from django.db import connections
+
+    from notes.sqlite import apply_pragmas
+
+    settings.SQLITE_PRAGMAS = pragmas
+    connections.close_all()
+    # journal_mode хранится в файле: переключаем его явно
+    connection = connections['default']
+    connection.ensure_connection()
+    apply_pragmas(connection)
+    connection.close()
+
+    results = []
+    deadline = time.monotonic() + args.seconds
+    threads = [
+        threading.Thread(target=worker, args=(
+            users[index % len(users)], args.write_share, deadline,
+            index, results))
+        for index in range(args.threads)
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    total = sum(results, Counter())
+    done = total['reads'] + total['writes']
+    print(f'== {label}: {done / elapsed:.1f} req/s, '
+          f'reads={total["reads"]} writes={total["writes"]} '
+          f'locked={total["locked"]} errors={total["error"]}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--users', type=int, default=8)
+    parser.add_argument('--write-share', type=float, default=0.3)
+    parser.add_argument('--db', default=BENCH_DIR / 'load.sqlite3')
+    args = parser.parse_args()
+
+    setup_django(args.db)
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+
+    from benchmarks.common import seed
+
+    settings.ALLOWED_HOSTS = ['*']
+    tuned = dict(settings.SQLITE_PRAGMAS)
+    user_model = get_user_model()
+    if not user_model.objects.exists():
+        seed(args.users, args.users * 50)
+    users = list(user_model.objects.filter(username__startswith='bench-'))
+    run('before', BASELINE_PRAGMAS, users, args)
+    run('after', tuned, users, args)
+
+
+if __name__ == '__main__':
+    main()
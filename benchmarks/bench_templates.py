@@ -0,0 +1,91 @@
+"""Время отрисовки страниц: загрузчик шаблонов и кеш фрагментов.
+
+    python -m benchmarks.bench_templates --repeat 500
+
+Три конфигурации: шаблоны с диска на каждый запрос, cached.Loader и
+cached.Loader вместе с {% cache %} шапки. Кеш фрагментов выключается
+отдельным алиасом template_fragments на DummyCache. Время отрисовки
+берётся из Server-Timing (tpl) InstrumentationMiddleware, рядом — полное
+время ответа (total).
+"""
+import argparse
+import re
+
+from benchmarks.common import BENCH_DIR, seed, setup_django, summarize
+
+PAGES = ('home', 'list', 'detail', 'add', 'success')
+TIMING = re.compile(r'(\w+);dur=([\d.]+)')
+
+
+def configurations(settings):
+    loaders = settings.TEMPLATE_LOADERS
+    dummy = {
+        **settings.CACHES,
+        'template_fragments': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+    }
+
+    def templates(loaders):
+        options = {**settings.TEMPLATES[0]['OPTIONS'], 'loaders': loaders}
+        return [{**settings.TEMPLATES[0], 'OPTIONS': options}]
+
+    cached = [('django.template.loaders.cached.Loader', loaders)]
+    return {
+        'filesystem': {'TEMPLATES': templates(loaders), 'CACHES': dummy},
+        'cached': {'TEMPLATES': templates(cached), 'CACHES': dummy},
+        'cached+fragments': {'TEMPLATES': templates(cached),
+                             'CACHES': settings.CACHES},
+    }
+
+
+def measure(client, url, repeat):
+    render, total = [], []
+    for _ in range(repeat):
+        timing = dict(TIMING.findall(client.get(url)['Server-Timing']))
+        render.append(float(timing['tpl']))
+        total.append(float(timing['total']))
+    return render, total
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--db', default=BENCH_DIR / 'templates.sqlite3')
+    args = parser.parse_args()
+
+    setup_django(args.db)
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.core.cache import caches
+    from django.test import Client, override_settings
+    from django.urls import reverse
+
+    from notes.models import Note
+
+    if not Note.objects.exists():
+        seed(1, 50)
+    author = get_user_model().objects.get(username='bench-0')
+    slug = Note.objects.filter(author=author).values_list(
+        'slug', flat=True).first()
+    urls = {
+        'home': reverse('notes:home'),
+        'list': reverse('notes:list'),
+        'detail': reverse('notes:detail', args=(slug,)),
+        'add': reverse('notes:add'),
+        'success': reverse('notes:success'),
+    }
+    for name, overrides in configurations(settings).items():
+        with override_settings(**overrides):
+            caches['default'].clear()
+            client = Client()
+            client.force_login(author)
+            print(f'== {name}')
+            for page in PAGES:
+                render, total = measure(client, urls[page], args.repeat)
+                print(f'{page:<8} tpl {summarize(render)}')
+                print(f'{"":<8} total {summarize(total)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Общие утилиты бенчмарков.
+
+Бенчмарки запускаются из корня проекта как модули:
+    python -m benchmarks.bench_indexes --help
+Каждый работает на собственном файле SQLite, рабочая БД не затрагивается.
+"""
+import os
+import random
+import statistics
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+
+
+def setup_django(db_path):
+    """Настраивает Django на базу db_path и применяет миграции."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanote.settings')
+    import django
+    from django.conf import settings
+    from django.core.management import call_command
+
+    settings.DATABASES['default']['NAME'] = str(db_path)
+    django.setup()
+    call_command('migrate', verbosity=0)
+
+
+def seed(users, notes, text_size=100, batch_size=10000, seed_value=0,
+         make_text=None, even=False):
+    """Заполняет пустую базу пользователями и заметками через bulk_create.
+
+    Заметки распределяются между пользователями случайно, но
+    воспроизводимо, а при even=True — поровну по кругу. make_text(rnd) —
+    функция, возвращающая текст заметки. Возвращает список id
+    пользователей.
+    """
+    from django.contrib.auth import get_user_model
+    from django.db import transaction
+
+    from notes.models import Note
+
+    user_model = get_user_model()
+    rnd = random.Random(seed_value)
+    with transaction.atomic():
+        user_model.objects.bulk_create(
+            user_model(username=f'bench-{index}', password='!')
+            for index in range(users)
+        )
+    user_ids = list(user_model.objects.filter(
+        username__startswith='bench-'
+    ).order_by('id').values_list('id', flat=True))
+    if make_text is None:
+        text = 'x' * text_size
+
+        def make_text(rnd):
+            return text
+    for start in range(0, notes, batch_size):
+        stop = min(start + batch_size, notes)
+        with transaction.atomic():
+            Note.objects.bulk_create(
+                Note(title=f'Заметка {index}', text=make_text(rnd),
+                     slug=f'note-{index}',
+                     author_id=(user_ids[index % len(user_ids)] if even
+                                else rnd.choice(user_ids)))
+                for index in range(start, stop)
+            )
+    return user_ids
+
+
+def timed(func, repeat):
+    """Вызывает func repeat раз и возвращает длительности в миллисекундах."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def percentile(samples, percent):
+    ordered = sorted(samples)
+    index = round(percent / 100 * (len(ordered) - 1))
+    return ordered[index]
+
+
+def summarize(samples):
+    """Сводка по замерам в миллисекундах."""
+    return {
+        'count': len(samples),
+        'mean': round(statistics.fmean(samples), 3),
+        'p50': round(percentile(samples, 50), 3),
+        'p95': round(percentile(samples, 95), 3),
+        'p99': round(percentile(samples, 99), 3),
+    }
@@ -0,0 +1,23 @@
+import pytest
+
+from notes.instrumentation import query_budget_violations
+from notes.test_runner import fast_password_hashers
+
+
+@pytest.fixture(autouse=True, scope='session')
+def password_hashers():
+    """Быстрый хешер паролей на всю сессию, как в notes.test_runner."""
+    with fast_password_hashers():
+        yield
+
+
+@pytest.fixture(autouse=True)
+def query_budgets():
+    """Проваливает тест, если view превысил бюджет SQL-запросов.
+
+    Бюджеты объявлены в settings.NOTES_QUERY_BUDGETS.
+    """
+    with query_budget_violations() as violations:
+        yield
+    if violations:
+        pytest.fail('\n'.join(violations), pytrace=False)
@@ -1,5 +1,56 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.db.models import Q
 
+from . import search
 from .models import Note
+from .pagination import EstimatedCountPaginator
 
-admin.site.register(Note)
+User = get_user_model()
+
+
+class NoteChangeList(ChangeList):
+
+    def get_queryset(self, request):
+        # полный текст в списке не показывается
+        return super().get_queryset(request).defer('text')
+
+
+@admin.register(Note)
+class NoteAdmin(admin.ModelAdmin):
+    list_display = ('title', 'slug', 'author', 'updated_at', 'text_length')
+    list_select_related = ('author',)
+    # сортировка по неиндексированным колонкам — проход по всей таблице
+    sortable_by = ()
+    ordering = ('-id',)
+    # вместо выпадающего списка со всеми пользователями
+    raw_id_fields = ('author',)
+    # сами поля не используются, см. get_search_results
+    search_fields = ('slug', 'author__username', 'title')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return NoteChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск только по индексам.
+
+        Точное совпадение slug или имени автора либо все слова в
+        заголовке (индекс FTS5; без него — icontains).
+        """
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        condition = Q(slug=term) | Q(
+            author__in=User.objects.filter(username=term).values('pk'))
+        connection = connections[queryset.db]
+        if search.is_supported(connection) and search.is_installed(
+                connection):
+            condition |= Q(id__in=search.matching_ids(
+                search.match_expression(term), ('title',)))
+        else:
+            condition |= Q(title__icontains=term)
+        return queryset.filter(condition), False
@@ -0,0 +1,169 @@
+"""Read-only JSON API заметок для клиентов синхронизации.
+
+Клиент может запросить только нужные поля (?fields=id,slug,title):
+остальные колонки, в том числе большой text, не читаются из БД. Списки
+отдаются потоком из .iterator(), поэтому память не зависит от числа
+заметок пользователя.
+"""
+import json
+from http import HTTPStatus
+
+from django.conf import settings
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from django.views import generic
+
+from .models import Note, Tombstone
+
+API_FIELDS = ('id', 'slug', 'title', 'text', 'updated_at')
+# Сколько заметок читать из БД за раз при потоковой выдаче.
+CHUNK_SIZE = 500
+
+
+class BadRequest(Exception):
+    """Некорректные параметры запроса к API."""
+
+
+def serialize(note, fields):
+    data = {}
+    for field in fields:
+        value = getattr(note, field)
+        data[field] = value.isoformat() if field == 'updated_at' else value
+    return data
+
+
+def stream_json_array(notes, fields):
+    """Отдаёт JSON-массив заметок по частям."""
+    yield '['
+    for index, note in enumerate(notes):
+        yield (',' if index else '') + json.dumps(
+            serialize(note, fields), ensure_ascii=False)
+    yield ']'
+
+
+class NoteApiMixin(LoginRequiredMixin):
+    """Общая часть API: авторизация, выбор полей, ошибки в JSON."""
+
+    def handle_no_permission(self):
+        return JsonResponse({'detail': 'Требуется вход.'},
+                            status=HTTPStatus.UNAUTHORIZED)
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except BadRequest as error:
+            return JsonResponse({'detail': str(error)},
+                                status=HTTPStatus.BAD_REQUEST)
+
+    def get_fields(self):
+        value = self.request.GET.get('fields')
+        if not value:
+            return API_FIELDS
+        fields = tuple(dict.fromkeys(
+            field.strip() for field in value.split(',') if field.strip()))
+        unknown = set(fields) - set(API_FIELDS)
+        if unknown or not fields:
+            raise BadRequest(
+                'Допустимые поля: ' + ', '.join(API_FIELDS) + '.')
+        return fields
+
+    def get_int(self, name, default):
+        value = self.request.GET.get(name)
+        if value is None:
+            return default
+        try:
+            number = int(value)
+        except ValueError:
+            number = -1
+        if number < 0:
+            raise BadRequest(f'{name} должен быть неотрицательным числом.')
+        return number
+
+    def get_queryset(self, fields):
+        if 'text' in fields:
+            # сжатый текст (notes.bodies) читается отдельным запросом
+            fields = (*fields, 'body_compressed')
+        return Note.objects.filter(author=self.request.user).only(*fields)
+
+    def stream(self, queryset, fields):
+        # поток читается уже после выхода из middleware: БД выбираем сейчас
+        queryset = queryset.using(queryset.db)
+        return StreamingHttpResponse(
+            stream_json_array(queryset.iterator(chunk_size=CHUNK_SIZE),
+                              fields),
+            content_type='application/json',
+        )
+
+
+class NoteListApi(NoteApiMixin, generic.View):
+    """Все заметки пользователя по возрастанию id."""
+
+    def get(self, request):
+        fields = self.get_fields()
+        return self.stream(self.get_queryset(fields).order_by('id'), fields)
+
+
+class NoteDetailApi(NoteApiMixin, generic.View):
+    """Одна заметка пользователя по slug."""
+
+    def get(self, request, slug):
+        fields = self.get_fields()
+        note = self.get_queryset(fields).filter(slug=slug).first()
+        if note is None:
+            raise Http404
+        return JsonResponse(serialize(note, fields),
+                            json_dumps_params={'ensure_ascii': False})
+
+
+class NoteChangesApi(NoteApiMixin, generic.View):
+    """Заметки, изменённые после момента ?since (ISO 8601)."""
+
+    def get(self, request):
+        fields = self.get_fields()
+        since = parse_datetime(request.GET.get('since', ''))
+        if since is None:
+            raise BadRequest('Укажите since в формате ISO 8601.')
+        queryset = self.get_queryset(fields).filter(
+            updated_at__gt=since).order_by('updated_at', 'id')
+        return self.stream(queryset, fields)
+
+
+class NoteSyncApi(NoteApiMixin, generic.View):
+    """Изменения заметок после курсора ?cursor пачками до ?limit.
+
+    Заметка попадает в ответ один раз с последним номером изменения,
+    удалённые приходят в deleted. Оба запроса идут по индексам
+    (author, change_seq), поэтому стоимость синхронизации зависит только
+    от числа изменений. Клиент повторяет запрос с полученным cursor,
+    пока has_more истинно.
+    """
+
+    def get(self, request):
+        fields = self.get_fields()
+        cursor = self.get_int('cursor', 0)
+        limit = min(self.get_int('limit', settings.NOTES_SYNC_BATCH_SIZE)
+                    or settings.NOTES_SYNC_BATCH_SIZE,
+                    settings.NOTES_SYNC_BATCH_SIZE)
+        notes = self.get_queryset((*fields, 'change_seq')).filter(
+            change_seq__gt=cursor).order_by('change_seq')[:limit + 1]
+        tombstones = Tombstone.objects.filter(
+            author=request.user, change_seq__gt=cursor
+        ).order_by('change_seq').values_list(
+            'change_seq', 'note_id', 'slug')[:limit + 1]
+        changes = sorted(
+            [(note.change_seq, note) for note in notes]
+            + [(seq, {'id': note_id, 'slug': slug})
+               for seq, note_id, slug in tombstones],
+            key=lambda change: change[0],
+        )
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        return JsonResponse({
+            'cursor': changes[-1][0] if changes else cursor,
+            'has_more': has_more,
+            'notes': [serialize(change, fields) for _, change in changes
+                      if isinstance(change, Note)],
+            'deleted': [change for _, change in changes
+                        if not isinstance(change, Note)],
+        }, json_dumps_params={'ensure_ascii': False})
@@ -0,0 +1,20 @@
+"""Маршруты notes для ASGI: страницы заметок заменены async-версиями."""
+from django.urls import path
+
+from notes import async_views, urls
+
+app_name = urls.app_name
+
+ASYNC_VIEWS = {
+    'add': async_views.note_create,
+    'edit': async_views.note_update,
+    'detail': async_views.note_detail,
+    'delete': async_views.note_delete,
+    'list': async_views.notes_list,
+}
+
+urlpatterns = [
+    path(str(pattern.pattern), ASYNC_VIEWS[pattern.name], name=pattern.name)
+    if pattern.name in ASYNC_VIEWS else pattern
+    for pattern in urls.urlpatterns
+]
@@ -0,0 +1,213 @@
+"""Асинхронные версии страниц заметок для ASGI (yanote/asgi.py).
+
+В Django 3.2 нет асинхронного ORM: работа с БД, кешем и сессией за
+запрос собрана в одну синхронную функцию (у редактирования — в две),
+которая выполняется через sync_to_async. Проверка формы, условный GET
+и отрисовка страницы идут в цикле событий. Поведение совпадает с CBV
+из notes.views.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.db import DEFAULT_DB_ALIAS, IntegrityError
+from django.http import HttpResponseNotAllowed, HttpResponseRedirect
+from django.shortcuts import get_object_or_404, render
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .bodies import stream_page
+from .cache import fragment_key, get_fragment, set_fragment
+from .conditional import note_etag_value, notes_list_etag
+from .forms import WARNING, NoteForm
+from .models import Note, NoteBody
+from .pagination import paginate_keyset, parse_cursor
+
+READ_METHODS = ('GET', 'HEAD')
+FORM_METHODS = ('GET', 'HEAD', 'POST')
+SLUG_TAKEN = object()
+
+
+def _authenticated(request):
+    """Вычисляет ленивый request.user, поэтому только в sync-части."""
+    return request.user.is_authenticated
+
+
+def _owned_note(request, slug):
+    """Заметка пользователя или 404; None для анонима."""
+    if not _authenticated(request):
+        return None
+    return get_object_or_404(Note, author=request.user, slug=slug)
+
+
+def _detail_note(request, slug):
+    """Заметка и сжатый текст (None, если текст хранится в строке)."""
+    note = _owned_note(request, slug)
+    if note is None or not note.body_compressed:
+        return note, None
+    return note, NoteBody.objects.using(note._state.db).values_list(
+        'data', flat=True).get(note_id=note.pk)
+
+
+def _editable_note(request, slug):
+    """Заметка для формы: текст загружается здесь, а не в цикле событий."""
+    note = _owned_note(request, slug)
+    if note is not None:
+        note.text
+    return note
+
+
+def _not_modified(request, etag, last_modified=None):
+    """Ответ 304, если валидаторы клиента совпали, иначе None."""
+    if last_modified is not None:
+        last_modified = int(last_modified.timestamp())
+    return get_conditional_response(
+        request, etag=etag, last_modified=last_modified)
+
+
+def _with_validators(response, etag, last_modified=None):
+    response.headers.setdefault('ETag', etag)
+    if last_modified:
+        response.headers.setdefault(
+            'Last-Modified', http_date(last_modified.timestamp()))
+    return response
+
+
+def _list_state(request, page_key):
+    if not _authenticated(request):
+        return None
+    key = fragment_key(request.user.pk, page_key)
+    return notes_list_etag(request), key, get_fragment(key)
+
+
+def _list_fragment(request, key, after, before):
+    queryset = Note.objects.filter(author=request.user).for_list()
+    page = paginate_keyset(queryset, settings.NOTES_PAGE_SIZE, after, before)
+    fragment = render_to_string('includes/notes_list.html', {
+        'object_list': page.object_list,
+        'page_obj': page,
+        'is_paginated': page.has_other_pages(),
+    }, request)
+    # список с отстающей реплики мог бы надолго остаться в кеше
+    if queryset.db == DEFAULT_DB_ALIAS:
+        set_fragment(key, fragment)
+    return fragment
+
+
+def _save(request, form):
+    """Сохраняет заметку формы; SLUG_TAKEN, если slug занят."""
+    try:
+        form.save()
+    except IntegrityError:
+        slug = form.instance.slug
+        if not Note.objects.filter(slug=slug).exclude(
+                pk=form.instance.pk).exists():
+            raise
+        return SLUG_TAKEN
+    return None
+
+
+def _create(request, form):
+    if not _authenticated(request):
+        return None
+    if not form.is_valid():
+        return form
+    form.instance.author = request.user
+    if _save(request, form) is SLUG_TAKEN:
+        form.add_error('slug', form.instance.slug + WARNING)
+    return form
+
+
+def _delete(request, slug):
+    note = _owned_note(request, slug)
+    if note is not None and request.method == 'POST':
+        note.delete()
+    return note
+
+
+async def notes_list(request):
+    if request.method not in READ_METHODS:
+        return HttpResponseNotAllowed(READ_METHODS)
+    after = parse_cursor(request.GET.get('after'))
+    before = parse_cursor(request.GET.get('before'))
+    state = await sync_to_async(_list_state)(
+        request, f'{settings.NOTES_PAGE_SIZE}:{after}:{before}')
+    if state is None:
+        return redirect_to_login(request.get_full_path())
+    etag, key, fragment = state
+    etag = quote_etag(etag)
+    response = _not_modified(request, etag)
+    if response is None:
+        if fragment is None:
+            fragment = await sync_to_async(_list_fragment)(
+                request, key, after, before)
+        response = render(request, 'notes/list.html',
+                          {'notes_fragment': fragment})
+    return _with_validators(response, etag)
+
+
+async def note_detail(request, slug):
+    if request.method not in READ_METHODS:
+        return HttpResponseNotAllowed(READ_METHODS)
+    note, data = await sync_to_async(_detail_note)(request, slug)
+    if note is None:
+        return redirect_to_login(request.get_full_path())
+    etag = quote_etag(
+        note_etag_value(request.user.pk, note.pk, note.updated_at))
+    response = _not_modified(request, etag, note.updated_at)
+    if response is None:
+        context = {'note': note, 'object': note}
+        if data is None:
+            response = render(request, 'notes/detail.html',
+                              {**context, 'note_text': note.text})
+        else:
+            response = stream_page(request, 'notes/detail.html', context,
+                                   data)
+    return _with_validators(response, etag, note.updated_at)
+
+
+async def note_create(request):
+    if request.method not in FORM_METHODS:
+        return HttpResponseNotAllowed(FORM_METHODS)
+    form = NoteForm(request.POST if request.method == 'POST' else None)
+    if request.method == 'POST':
+        # is_valid без запросов к БД: NoteForm не проверяет уникальность
+        form = await sync_to_async(_create)(request, form)
+    elif not await sync_to_async(_authenticated)(request):
+        form = None
+    if form is None:
+        return redirect_to_login(request.get_full_path())
+    if form.is_bound and form.is_valid():
+        return HttpResponseRedirect(reverse('notes:success'))
+    return render(request, 'notes/form.html', {'form': form})
+
+
+async def note_update(request, slug):
+    if request.method not in FORM_METHODS:
+        return HttpResponseNotAllowed(FORM_METHODS)
+    note = await sync_to_async(_editable_note)(request, slug)
+    if note is None:
+        return redirect_to_login(request.get_full_path())
+    if request.method != 'POST':
+        form = NoteForm(instance=note)
+    else:
+        form = NoteForm(request.POST, instance=note)
+        if form.is_valid():
+            if await sync_to_async(_save)(request, form) is not SLUG_TAKEN:
+                return HttpResponseRedirect(reverse('notes:success'))
+            form.add_error('slug', form.instance.slug + WARNING)
+    return render(request, 'notes/form.html',
+                  {'form': form, 'note': note, 'object': note})
+
+
+async def note_delete(request, slug):
+    if request.method not in FORM_METHODS:
+        return HttpResponseNotAllowed(FORM_METHODS)
+    note = await sync_to_async(_delete)(request, slug)
+    if note is None:
+        return redirect_to_login(request.get_full_path())
+    if request.method == 'POST':
+        return HttpResponseRedirect(reverse('notes:success'))
+    return render(request, 'notes/delete.html',
+                  {'note': note, 'object': note})
@@ -0,0 +1,46 @@
+"""Кеш пользователя сессии.
+
+AuthenticationMiddleware читает пользователя из auth_user на каждом
+запросе. Здесь объект пользователя хранится в кеше по id на
+AUTH_USER_CACHE_TIMEOUT секунд, а подпись сессии (HASH_SESSION_KEY)
+по-прежнему сверяется на каждом запросе: смена пароля завершает
+остальные сессии, как и без кеша. Запись сбрасывается при сохранении
+и удалении пользователя и при выходе (см. signals.py).
+"""
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+
+USER_KEY = 'auth:user:{user_id}'
+
+
+def user_key(user_id):
+    return USER_KEY.format(user_id=user_id)
+
+
+def forget_user(user_id):
+    cache.delete(user_key(user_id))
+
+
+def get_user(request):
+    """Как django.contrib.auth.get_user, но с пользователем из кеша."""
+    try:
+        user_id = auth._get_user_session_key(request)
+        backend_path = request.session[auth.BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    key = user_key(user_id)
+    user = cache.get(key)
+    if user is not None and backend_path in settings.AUTHENTICATION_BACKENDS:
+        session_hash = request.session.get(auth.HASH_SESSION_KEY)
+        if session_hash and constant_time_compare(
+                session_hash, user.get_session_auth_hash()):
+            return user
+    # промах или расхождение подписи: полная проверка по БД,
+    # при неверной подписи Django сам завершит сессию
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+    return user
@@ -0,0 +1,65 @@
+"""Сжатое хранение больших текстов заметок.
+
+Текст длиннее NOTES_BODY_COMPRESS_THRESHOLD символов хранится сжатым
+zlib в отдельной таблице notes_notebody, а колонка notes_note.text
+остаётся пустой. Страницы основной таблицы не разрастаются, и запросы
+списка и поиска по ней не проходят мегабайты чужих текстов.
+
+Распаковка ленивая: целиком — при первом обращении к note.text, а
+страница заметки распаковывает и отдаёт текст потоком по частям.
+"""
+import codecs
+import zlib
+
+from django.http import StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.utils.html import escape
+
+# Уровень сжатия zlib: 6 — разумный компромисс скорости и размера.
+COMPRESS_LEVEL = 6
+# Размер порции сжатых данных при потоковой распаковке, байт.
+STREAM_CHUNK_SIZE = 64 * 1024
+# Место текста в отрисованной странице при потоковой выдаче.
+TEXT_MARKER = '\x00notes-body\x00'
+
+
+def pack(text):
+    return zlib.compress(text.encode(), COMPRESS_LEVEL)
+
+
+def unpack(data):
+    return None if data is None else zlib.decompress(data).decode()
+
+
+def iter_text(data, chunk_size=STREAM_CHUNK_SIZE):
+    """Распаковывает data по частям, не собирая весь текст в памяти."""
+    inflater = zlib.decompressobj()
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        chunk = inflater.decompress(view[start:start + chunk_size])
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(inflater.flush(), final=True)
+    if tail:
+        yield tail
+
+
+def stream_page(request, template_name, context, data):
+    """Страница, в которой сжатый текст data отдаётся потоком.
+
+    Шаблон рисуется один раз с TEXT_MARKER вместо note_text; до и после
+    маркера — готовые части, между ними — экранированный текст.
+    """
+    page = render_to_string(
+        template_name, {**context, 'note_text': TEXT_MARKER}, request)
+    head, tail = page.split(TEXT_MARKER, 1)
+
+    def content():
+        yield head
+        for text in iter_text(data):
+            yield escape(text)
+        yield tail
+
+    return StreamingHttpResponse(content())
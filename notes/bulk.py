@@ -0,0 +1,142 @@
+"""Массовые действия над заметками автора: удаление и правка полей.
+
+Заметки задаются id или slug. Проверка, что все они принадлежат
+автору, и само действие идут одной транзакцией, пачками не длиннее
+лимита параметров SQL (max_query_params). Сигналы Note при этом не
+отправляются: change_seq, следы удаления и сброс кеша списка делаются
+здесь так же, как в Note.save() и notes.signals.
+"""
+from django.db import connections, router, transaction
+from django.db.models import BigIntegerField, Case, Q, Value, When
+from django.utils import timezone
+
+from . import search
+from .cache import invalidate_list
+from .models import ChangeSequence, Note, NoteBody, Tombstone
+from .utils import chunks, max_query_params
+
+# Поля, которые можно задать сразу многим заметкам. text сюда не входит:
+# от него зависят excerpt, text_length и NoteBody (см. Note.save).
+EDITABLE_FIELDS = ('title',)
+
+
+class NotesNotFound(Exception):
+    """Часть заметок не найдена среди заметок автора."""
+
+    def __init__(self, missing):
+        super().__init__('Заметки не найдены: ' + ', '.join(
+            sorted(map(str, missing))))
+        self.missing = missing
+
+
+def delete_notes(author, ids=(), slugs=(), using=None):
+    """Удаляет заметки автора; возвращает их число.
+
+    Заметки удаляются запросами DELETE ... WHERE id IN (...), без выборки
+    объектов и сигналов на каждую строку.
+    """
+    using = using or router.db_for_write(Note)
+    with transaction.atomic(using=using):
+        first_seq = _reserve(using, ids, slugs)
+        notes = _owned_notes(author, ids, slugs, using)
+        Tombstone.objects.using(using).bulk_create(
+            Tombstone(note_id=pk, slug=slug, author_id=author.pk,
+                      change_seq=first_seq + offset)
+            for offset, (pk, slug, _) in enumerate(notes)
+        )
+        # сжатые тексты триггер удаления из индекса не видит
+        search.unindex_bodies(connections[using], _compressed(notes))
+        # у NoteBody нет каскада на уровне БД: тексты удаляются первыми
+        for chunk in chunks([pk for pk, _, _ in notes],
+                            max_query_params(using)):
+            NoteBody.objects.using(using).filter(note_id__in=chunk).delete()
+            # _raw_delete — один DELETE без Collector: обработчики
+            # pre_delete/post_delete выше заменены следами и сбросом кеша
+            Note.objects.using(using).filter(id__in=chunk)._raw_delete(using)
+        _invalidate(author.pk, using)
+    return len(notes)
+
+
+def update_notes(author, values, ids=(), slugs=(), using=None):
+    """Задаёт поля values (из EDITABLE_FIELDS) заметкам автора.
+
+    Каждая заметка получает свой change_seq, чтобы синхронизация могла
+    остановиться посреди пачки. Возвращает число заметок.
+    """
+    unknown = set(values) - set(EDITABLE_FIELDS)
+    if unknown:
+        raise ValueError(
+            'Поля нельзя менять массово: ' + ', '.join(sorted(unknown)))
+    using = using or router.db_for_write(Note)
+    with transaction.atomic(using=using):
+        first_seq = _reserve(using, ids, slugs)
+        notes = _owned_notes(author, ids, slugs, using)
+        seqs = {pk: first_seq + offset
+                for offset, (pk, _, _) in enumerate(notes)}
+        compressed = _compressed(notes)
+        # сжатые тексты индексируются не триггерами (см. search)
+        search.unindex_bodies(connections[using], compressed)
+        now = timezone.now()
+        # на заметку три параметра: id в IN и пара id -> номер в CASE
+        size = (max_query_params(using) - len(values) - 1) // 3
+        for chunk in chunks(list(seqs), size):
+            Note.objects.using(using).filter(id__in=chunk).update(
+                updated_at=now,
+                change_seq=Case(
+                    *(When(id=pk, then=Value(seqs[pk])) for pk in chunk),
+                    output_field=BigIntegerField(),
+                ),
+                **values,
+            )
+        search.index_bodies(connections[using], compressed)
+        _invalidate(author.pk, using)
+    return len(notes)
+
+
+def _reserve(using, ids, slugs):
+    """Резервирует номера изменений первой записью транзакции.
+
+    Как в reserve_tombstone_seq, UPDATE счётчика идёт до чтения заметок.
+    Номеров берётся по числу ссылок; лишние (повторы) остаются пропуском.
+    """
+    count = len(ids) + len(slugs)
+    return ChangeSequence.reserve(using, count) - count + 1
+
+
+def _owned_notes(author, ids, slugs, using):
+    """Тройки (id, slug, body_compressed) заметок автора в порядке id.
+
+    Одна выборка на пачку ссылок; ссылка на чужую или несуществующую
+    заметку — NotesNotFound.
+    """
+    notes = Note.objects.using(using).filter(author=author)
+    refs = ([('id', pk) for pk in dict.fromkeys(ids)]
+            + [('slug', slug) for slug in dict.fromkeys(slugs)])
+    found = {}
+    missing = []
+    # один параметр запроса занят автором
+    for chunk in chunks(refs, max_query_params(using) - 1):
+        chunk_ids = [value for field, value in chunk if field == 'id']
+        chunk_slugs = [value for field, value in chunk if field == 'slug']
+        rows = notes.filter(
+            Q(id__in=chunk_ids) | Q(slug__in=chunk_slugs)
+        ).values_list('id', 'slug', 'body_compressed')
+        rows = {pk: (slug, compressed) for pk, slug, compressed in rows}
+        found_slugs = {slug for slug, _ in rows.values()}
+        missing.extend(
+            [pk for pk in chunk_ids if pk not in rows]
+            + [slug for slug in chunk_slugs if slug not in found_slugs])
+        found.update(rows)
+    if missing:
+        raise NotesNotFound(missing)
+    return [(pk, slug, compressed)
+            for pk, (slug, compressed) in sorted(found.items())]
+
+
+def _compressed(notes):
+    return [pk for pk, _, compressed in notes if compressed]
+
+
+def _invalidate(author_id, using):
+    invalidate_list(author_id)
+    transaction.on_commit(lambda: invalidate_list(author_id), using=using)
@@ -0,0 +1,79 @@
+"""Кеш отрисованного списка заметок автора.
+
+Фрагмент списка хранится под ключом с версией автора. Любое изменение
+заметок автора увеличивает версию, и старые фрагменты просто перестают
+запрашиваться, а со временем вытесняются по таймауту.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.safestring import mark_safe
+
+VERSION_KEY = 'notes:list:version:{author_id}'
+FRAGMENT_KEY = 'notes:list:{author_id}:{version}:{page_key}'
+
+
+class CacheStats:
+    """Счётчики попаданий и промахов кеша списка в текущем процессе."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+stats = CacheStats()
+
+
+def list_version(author_id):
+    """Текущая версия списка автора."""
+    key = VERSION_KEY.format(author_id=author_id)
+    version = cache.get(key)
+    if version is None:
+        # Версия из времени больше любой прежней, даже если счётчик
+        # был вытеснен из кеша.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_list(author_id):
+    """Делает недоступными все закешированные страницы списка автора."""
+    key = VERSION_KEY.format(author_id=author_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def fragment_key(author_id, page_key):
+    return FRAGMENT_KEY.format(
+        author_id=author_id,
+        version=list_version(author_id),
+        page_key=page_key,
+    )
+
+
+def get_fragment(key):
+    """Отрисованный фрагмент или None, с учётом в статистике."""
+    fragment = cache.get(key)
+    stats.record(hit=fragment is not None)
+    return None if fragment is None else mark_safe(fragment)
+
+
+def set_fragment(key, fragment):
+    cache.set(key, str(fragment), settings.NOTES_LIST_CACHE_TIMEOUT)
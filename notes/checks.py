@@ -0,0 +1,47 @@
+"""Проверки настроек при запуске (manage.py check, runserver, migrate)."""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, register
+
+# Движки сессий, которые читают сессию из кеша.
+CACHED_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+)
+CACHED_AUTH_MIDDLEWARE = 'notes.middleware.CachedAuthenticationMiddleware'
+
+
+def _is_local(alias):
+    # копия кеша своя в каждом процессе или кеша нет вовсе
+    return isinstance(caches[alias], (LocMemCache, DummyCache))
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """Сессии и пользователь из кеша требуют общего для процессов кеша."""
+    errors = []
+    if (settings.SESSION_ENGINE in CACHED_SESSION_ENGINES
+            and _is_local(settings.SESSION_CACHE_ALIAS)):
+        errors.append(Error(
+            f'SESSION_ENGINE {settings.SESSION_ENGINE} с кешем '
+            f'{settings.SESSION_CACHE_ALIAS}, который не общий для '
+            'процессов: выход в одном процессе не виден остальным.',
+            hint='Задайте общий кеш (Memcached, Redis) и '
+                 'NOTES_SHARED_CACHE = True или движок сессий '
+                 'django.contrib.sessions.backends.db.',
+            id='notes.E001',
+        ))
+    if (CACHED_AUTH_MIDDLEWARE in settings.MIDDLEWARE
+            and _is_local('default')):
+        errors.append(Error(
+            f'{CACHED_AUTH_MIDDLEWARE} с кешем default, который не общий '
+            'для процессов: смена пароля в одном процессе не видна '
+            'остальным.',
+            hint='Задайте общий кеш (Memcached, Redis) и '
+                 'NOTES_SHARED_CACHE = True или '
+                 'django.contrib.auth.middleware.AuthenticationMiddleware.',
+            id='notes.E002',
+        ))
+    return errors
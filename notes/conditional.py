@@ -0,0 +1,89 @@
+"""Условные GET-запросы (ETag / Last-Modified) для страниц заметок.
+
+Функции передаются в django.views.decorators.http.condition: если клиент
+прислал совпадающий валидатор, ответ 304 отдаётся без выполнения view и
+отрисовки шаблона. В валидаторы входит id пользователя, потому что шапка
+страницы у каждого пользователя своя.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import OuterRef, Subquery
+from django.middleware.csrf import get_token
+
+from .models import Note, Tombstone
+
+
+def _timestamp(value):
+    return int(value.timestamp() * 1_000_000) if value else 0
+
+
+def _note_state(request, slug):
+    """(pk, updated_at) заметки автора, один запрос на весь запрос."""
+    if not hasattr(request, '_note_state'):
+        request._note_state = Note.objects.filter(
+            author=request.user, slug=slug
+        ).values_list('pk', 'updated_at').first()
+    return request._note_state
+
+
+def note_etag_value(user_pk, pk, updated_at):
+    return f'{user_pk}-{pk}-{_timestamp(updated_at)}'
+
+
+def note_etag(request, slug):
+    state = _note_state(request, slug)
+    if state is None:
+        return None
+    pk, updated_at = state
+    return note_etag_value(request.user.pk, pk, updated_at)
+
+
+def note_last_modified(request, slug):
+    state = _note_state(request, slug)
+    return state[1] if state else None
+
+
+def notes_list_etag(request):
+    """Значение ETag списка: последний номер изменения заметок автора.
+
+    Любое сохранение заметки получает новый change_seq, удаление
+    оставляет след со своим номером, поэтому наибольший из них меняется
+    при каждом изменении списка. Оба максимума берутся из индексов
+    (author, change_seq) без прохода по заметкам автора, в отличие от
+    COUNT. Last-Modified для списка не отдаётся: удаление заметки не
+    сдвигает max(updated_at).
+
+    Форма действий над выбранными заметками несёт CSRF-токен, который
+    меняется при каждом входе, поэтому в ETag входит и хеш CSRF-cookie:
+    иначе после нового входа браузер показал бы страницу со старым
+    токеном, и отправка формы получила бы 403.
+    """
+    return (f'{request.user.pk}-{settings.NOTES_PAGE_SIZE}-'
+            f'{_last_change(request.user)}-{_csrf_tag(request)}')
+
+
+def _csrf_tag(request):
+    # get_token создаёт секрет, если cookie ещё нет: ETag сразу
+    # соответствует токену, который попадёт в страницу и cookie
+    get_token(request)
+    secret = request.META['CSRF_COOKIE']
+    return hashlib.sha256(secret.encode()).hexdigest()[:16]
+
+
+def _last_seq(model):
+    return Subquery(
+        model.objects.filter(author=OuterRef('pk'))
+        .order_by('-change_seq').values('change_seq')[:1])
+
+
+def _last_change(author):
+    """Наибольший change_seq заметок и следов удаления автора.
+
+    Один запрос: два подзапроса ORDER BY change_seq DESC LIMIT 1, каждый
+    читает одну запись индекса.
+    """
+    notes, deleted = get_user_model().objects.filter(pk=author.pk).values_list(
+        _last_seq(Note), _last_seq(Tombstone)).get()
+    return max(notes or 0, deleted or 0)
@@ -0,0 +1,6 @@
+from django.conf import settings
+
+
+def fragment_cache(request):
+    """Таймаут для {% cache %} в общих шаблонах (base.html, шапка)."""
+    return {'fragment_cache_timeout': settings.NOTES_FRAGMENT_CACHE_TIMEOUT}
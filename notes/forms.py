@@ -1,7 +1,5 @@
-from pytils.translit import slugify
-
 from django import forms
-from django.core.exceptions import ValidationError
+from django.core.validators import validate_slug
 
 from .models import Note
 
@@ -15,15 +13,60 @@ class NoteForm(forms.ModelForm):
         model = Note
         fields = ('title', 'text', 'slug')
 
-    def clean_slug(self):
-        """Обрабатывает случай, если slug не уникален."""
+    def validate_unique(self):
+        """Уникальность slug проверяет индекс при сохранении.
+
+        Пустой slug формирует сама модель, конфликт явно заданного
+        slug превращается в ошибку формы во view (WARNING).
+        """
+
+
+class MultipleValuesField(forms.Field):
+    """Список значений из повторяющегося поля или через запятую.
+
+    Запятые позволяют передать тысячи заметок одним полем, не упираясь
+    в DATA_UPLOAD_MAX_NUMBER_FIELDS.
+    """
+    widget = forms.MultipleHiddenInput
+
+    def __init__(self, *, item_field, **kwargs):
+        kwargs.setdefault('required', False)
+        super().__init__(**kwargs)
+        self.item_field = item_field
+
+    def to_python(self, value):
+        items = []
+        for part in value or ():
+            items.extend(item.strip() for item in part.split(','))
+        return [self.item_field.clean(item) for item in items if item]
+
+
+class NoteBulkForm(forms.Form):
+    """Массовое действие над отмеченными заметками (notes.bulk)."""
+
+    DELETE = 'delete'
+    SET_TITLE = 'title'
+
+    action = forms.ChoiceField(label='Действие', choices=(
+        (DELETE, 'Удалить'),
+        (SET_TITLE, 'Задать заголовок'),
+    ))
+    ids = MultipleValuesField(
+        label='id заметок', item_field=forms.IntegerField(min_value=1))
+    slugs = MultipleValuesField(
+        label='slug заметок',
+        item_field=forms.CharField(validators=[validate_slug]))
+    title = forms.CharField(
+        label='Заголовок',
+        max_length=Note._meta.get_field('title').max_length,
+        required=False,
+    )
+
+    def clean(self):
         cleaned_data = super().clean()
-        slug = cleaned_data.get('slug')
-        if not slug:
-            title = cleaned_data.get('title')
-            slug = slugify(title)[:100]
-        if Note.objects.filter(
-                slug=slug
-        ).exclude(id=self.instance.pk).exists():
-            raise ValidationError(slug + WARNING)
-        return slug
+        if not (cleaned_data.get('ids') or cleaned_data.get('slugs')):
+            raise forms.ValidationError('Отметьте хотя бы одну заметку.')
+        if (cleaned_data.get('action') == self.SET_TITLE
+                and not cleaned_data.get('title')):
+            self.add_error('title', 'Укажите новый заголовок.')
+        return cleaned_data
@@ -0,0 +1,159 @@
+"""Замеры запросов к view: число и время SQL, отрисовка шаблона, итог.
+
+Замеры одного запроса собирает InstrumentationMiddleware
+(notes.middleware): отдаёт их клиенту в заголовке Server-Timing,
+складывает в гистограммы процесса (registry, их отдаёт notes:metrics)
+и рассылает сигналом view_measured — на нём построена проверка
+бюджетов запросов в тестах (NOTES_QUERY_BUDGETS, см. conftest.py).
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.dispatch import Signal
+
+# Верхние границы корзин гистограммы времени ответа, мс.
+LATENCY_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+# Отправляется после каждого замеренного запроса: view_name, metrics.
+view_measured = Signal()
+
+# Замеры текущего запроса. Переменная контекста, а не соединения:
+# в async view SQL выполняется в потоке sync_to_async, куда контекст
+# копируется, а соединение у потока своё.
+_current_metrics = ContextVar('notes_request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Замеры одного запроса, время в миллисекундах."""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.render_ms = 0.0
+        self.total_ms = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обёртка connection.execute_wrapper: считает запросы и время."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_ms += (time.perf_counter() - started) * 1000
+
+    def server_timing(self):
+        return (f'db;dur={self.sql_ms:.1f};desc="{self.queries} queries", '
+                f'tpl;dur={self.render_ms:.1f}, '
+                f'total;dur={self.total_ms:.1f}')
+
+
+def record_query(execute, sql, params, many, context):
+    """Постоянная обёртка запросов соединения (см. install_wrapper)."""
+    metrics = _current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def install_wrapper(connection):
+    """Подключает record_query к соединению один раз."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def measure():
+    """Замеры запросов к БД внутри блока, в том числе из sync_to_async."""
+    metrics = RequestMetrics()
+    token = _current_metrics.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current_metrics.reset(token)
+
+
+class ViewStats:
+    """Накопленные замеры одного view."""
+
+    def __init__(self):
+        self.count = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.sql_ms = 0.0
+        self.render_ms = 0.0
+        self.total_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def add(self, metrics):
+        self.count += 1
+        self.queries += metrics.queries
+        self.max_queries = max(self.max_queries, metrics.queries)
+        self.sql_ms += metrics.sql_ms
+        self.render_ms += metrics.render_ms
+        self.total_ms += metrics.total_ms
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if metrics.total_ms <= bound:
+                break
+        else:
+            index = len(LATENCY_BUCKETS)
+        self.buckets[index] += 1
+
+    def as_dict(self):
+        bounds = [str(bound) for bound in LATENCY_BUCKETS] + ['+Inf']
+        return {
+            'count': self.count,
+            'queries_mean': round(self.queries / self.count, 2),
+            'queries_max': self.max_queries,
+            'sql_ms_mean': round(self.sql_ms / self.count, 3),
+            'render_ms_mean': round(self.render_ms / self.count, 3),
+            'total_ms_mean': round(self.total_ms / self.count, 3),
+            'total_ms_buckets': dict(zip(bounds, self.buckets)),
+        }
+
+
+class MetricsRegistry:
+    """Гистограммы по view в текущем процессе."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, view_name, metrics):
+        with self._lock:
+            self._views.setdefault(view_name, ViewStats()).add(metrics)
+
+    def snapshot(self):
+        with self._lock:
+            return {name: stats.as_dict()
+                    for name, stats in sorted(self._views.items())}
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+registry = MetricsRegistry()
+
+
+@contextmanager
+def query_budget_violations(budgets=None):
+    """Собирает в список запросы, превысившие бюджет своего view."""
+    if budgets is None:
+        budgets = settings.NOTES_QUERY_BUDGETS
+    violations = []
+
+    def check(sender, view_name, metrics, **kwargs):
+        budget = budgets.get(view_name)
+        if budget is not None and metrics.queries > budget:
+            violations.append(
+                f'{view_name}: {metrics.queries} SQL-запросов '
+                f'при бюджете {budget}')
+
+    view_measured.connect(check, weak=False)
+    try:
+        yield violations
+    finally:
+        view_measured.disconnect(check)
@@ -0,0 +1,47 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from notes import bodies
+from notes.models import Note
+
+
+class Command(BaseCommand):
+    help = 'Выгружает заметки в JSON Lines потоком, не загружая их в память.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', '-o', default='-',
+            help='Файл для выгрузки, "-" — стандартный вывод.')
+        parser.add_argument(
+            '--author', help='Выгрузить только заметки автора (username).')
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Сколько строк читать из БД за один раз.')
+
+    def handle(self, *args, **options):
+        notes = Note.objects.order_by('id')
+        if options['author']:
+            notes = notes.filter(author__username=options['author'])
+        # у сжатых заметок колонка text пуста, текст — в NoteBody
+        rows = notes.values_list(
+            'title', 'text', 'body_compressed', 'body__data', 'slug',
+            'author__username',
+        ).iterator(chunk_size=options['chunk_size'])
+        if options['output'] == '-':
+            self.write_rows(rows, self.stdout)
+        else:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                self.write_rows(rows, stream)
+        self.stderr.write(f'Выгружено заметок: {self.exported}')
+
+    def write_rows(self, rows, stream):
+        self.exported = 0
+        for title, text, compressed, data, slug, author in rows:
+            if compressed:
+                text = bodies.unpack(data)
+            stream.write(json.dumps(
+                {'title': title, 'text': text, 'slug': slug, 'author': author},
+                ensure_ascii=False,
+            ) + '\n')
+            self.exported += 1
@@ -0,0 +1,129 @@
+import json
+import sys
+import time
+from contextlib import nullcontext
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import (DEFAULT_DB_ALIAS, IntegrityError, connections,
+                       transaction)
+
+from notes import search
+from notes.cache import invalidate_list
+from notes.models import ChangeSequence, Note
+from notes.slugs import SlugAllocator, make_slug
+from notes.utils import chunks, max_query_params
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Импортирует заметки из JSON Lines: по объекту '
+            '{"title", "text", "slug", "author"} на строку.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл JSON Lines, "-" — стандартный ввод.')
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Сколько заметок записывать одной транзакцией.')
+        parser.add_argument(
+            '--author', help='Автор (username) для строк без поля author.')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            '--bulk', action='store_true',
+            help='Снять триггеры индекса поиска на время импорта и '
+                 'перестроить индекс один раз в конце. Быстрее для больших '
+                 'файлов, но перестройка перечитывает все заметки базы, а '
+                 'до её конца поиск не видит новых заметок.')
+
+    def handle(self, *args, **options):
+        # явная БД: Note.objects.db — БД чтения, с репликами это реплика
+        self.using = options['database']
+        self.default_author = options['author']
+        self.author_ids = {}
+        self.max_length = Note._meta.get_field('slug').max_length
+        self.slugs = SlugAllocator(Note, self.using)
+        batch_size = options['batch_size']
+        started = time.perf_counter()
+        index = (search.deferred(connections[self.using]) if options['bulk']
+                 else nullcontext())
+        with index:
+            if options['path'] == '-':
+                imported = self.import_stream(sys.stdin, batch_size)
+            else:
+                with open(options['path'], encoding='utf-8') as stream:
+                    imported = self.import_stream(stream, batch_size)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано заметок: {imported} за {elapsed:.1f} с '
+            f'({imported / elapsed:.0f} заметок/с)'))
+
+    def import_stream(self, stream, batch_size):
+        imported = 0
+        batch = []
+        for line_number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                batch.append(json.loads(line))
+            except json.JSONDecodeError as error:
+                raise CommandError(f'Строка {line_number}: {error}')
+            if len(batch) >= batch_size:
+                imported += self.import_batch(batch)
+                batch = []
+        if batch:
+            imported += self.import_batch(batch)
+        return imported
+
+    def resolve_authors(self, usernames):
+        """Заполняет кеш username -> id для ещё не встречавшихся авторов."""
+        missing = list(set(usernames) - self.author_ids.keys())
+        users = User.objects.using(self.using)
+        for chunk in chunks(missing, max_query_params(self.using)):
+            self.author_ids.update(users.filter(
+                username__in=chunk).values_list('username', 'id'))
+        unknown = set(missing) - self.author_ids.keys()
+        if unknown:
+            raise CommandError(
+                'Неизвестные авторы: ' + ', '.join(sorted(map(str, unknown))))
+
+    def import_batch(self, records):
+        usernames = [record.get('author') or self.default_author
+                     for record in records]
+        if None in usernames:
+            raise CommandError('У заметки не указан автор, задайте --author.')
+        self.resolve_authors(usernames)
+        default_title = Note._meta.get_field('title').get_default()
+        titles = [record.get('title', default_title) for record in records]
+        bases = [record.get('slug') or make_slug(title, self.max_length)
+                 for record, title in zip(records, titles)]
+        notes = [
+            Note(title=title,
+                 text=record.get('text', ''),
+                 author_id=self.author_ids[username])
+            for record, title, username in zip(records, titles, usernames)
+        ]
+        try:
+            self.write_batch(notes, bases)
+        except IntegrityError:
+            # slug заняли параллельно: перечитываем занятые и повторяем
+            self.slugs.forget()
+            self.write_batch(notes, bases)
+        return len(notes)
+
+    def write_batch(self, notes, bases):
+        with transaction.atomic(using=self.using):
+            # номера изменений резервируются на всю пачку одним UPDATE
+            last_seq = ChangeSequence.reserve(self.using, len(notes))
+            first_seq = last_seq - len(notes) + 1
+            for offset, (note, slug) in enumerate(
+                    zip(notes, self.slugs.allocate(bases))):
+                note.slug = slug
+                note.change_seq = first_seq + offset
+            Note.objects.using(self.using).bulk_create(notes)
+            # bulk_create не отправляет post_save: кеш списков сбрасываем сами
+            for author_id in {note.author_id for note in notes}:
+                transaction.on_commit(
+                    lambda author_id=author_id: invalidate_list(author_id),
+                    using=self.using)
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from notes import search
+
+
+class Command(BaseCommand):
+    help = 'Пересоздаёт полнотекстовый индекс заметок (SQLite FTS5).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if not search.is_supported(connection):
+            raise CommandError('Полнотекстовый индекс есть только в SQLite.')
+        if search.is_installed(connection):
+            search.restore_triggers(connection)
+            search.rebuild(connection)
+        else:
+            search.install(connection)
+        self.stdout.write(self.style.SUCCESS('Индекс поиска перестроен.'))
@@ -0,0 +1,184 @@
+import math
+import random
+import time
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from notes import search
+from notes.cache import invalidate_list
+from notes.models import ChangeSequence, Note
+from notes.slugs import SlugAllocator, make_slug
+from notes.utils import chunks, max_query_params
+
+User = get_user_model()
+
+CYRILLIC_WORDS = (
+    'заметка план встреча отчёт задача идея проект список покупки книга '
+    'рецепт поездка звонок ревью релиз черновик итоги цели неделя месяц '
+    'работа дом учёба здоровье спорт бюджет письмо договор важное срочно'
+).split()
+LATIN_WORDS = (
+    'note plan meeting report task idea project list shopping book recipe '
+    'trip call review release draft summary goals week month work home '
+    'study health sport budget letter contract important urgent todo'
+).split()
+# Длина общего текста, из которого вырезаются тексты заметок.
+CORPUS_LENGTH = 1 << 20
+
+
+def zipf_cum_weights(count, exponent):
+    """Накопленные веса рангов 1..count: вес ранга r — 1 / r**exponent."""
+    return list(accumulate(1 / rank ** exponent
+                           for rank in range(1, count + 1)))
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу синтетическими пользователями и заметками. '
+            'Результат определяется --seed. Триггеры индекса поиска на '
+            'время записи снимаются, индекс перестраивается в конце.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--notes', type=int, default=10000,
+                            help='Сколько заметок создать всего.')
+        parser.add_argument(
+            '--zipf', type=float, default=1.0,
+            help='Показатель распределения заметок по пользователям и '
+                 'частоты заголовков; 0 — равномерно.')
+        parser.add_argument(
+            '--titles', type=int, default=2000,
+            help='Размер набора заголовков: повторы дают конфликты slug.')
+        parser.add_argument('--latin-share', type=float, default=0.3,
+                            help='Доля латинских заголовков и текстов.')
+        parser.add_argument('--text-size', type=int, default=500,
+                            help='Медиана длины текста, символов.')
+        parser.add_argument('--max-text-size', type=int, default=200_000)
+        parser.add_argument('--batch-size', type=int, default=10000,
+                            help='Сколько заметок писать одной транзакцией.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--user-prefix', default='seed-')
+        parser.add_argument(
+            '--password',
+            help='Пароль всех созданных пользователей; без него вход '
+                 'по паролю невозможен.')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        for name in ('users', 'notes', 'titles', 'batch_size', 'text_size'):
+            if options[name] < 1:
+                raise CommandError(f'--{name.replace("_", "-")} должно '
+                                   f'быть положительным.')
+        self.using = options['database']
+        self.rnd = random.Random(options['seed'])
+        self.max_length = Note._meta.get_field('slug').max_length
+        user_ids = self.create_users(
+            options['users'], options['user_prefix'], options['password'])
+        self.make_titles(options['titles'], options['latin_share'])
+        self.make_corpus(options['max_text_size'])
+        self.author_weights = zipf_cum_weights(len(user_ids), options['zipf'])
+        self.title_weights = zipf_cum_weights(
+            len(self.titles), options['zipf'])
+        self.user_ids = user_ids
+        self.text_mu = math.log(options['text_size'])
+        self.max_text_size = options['max_text_size']
+        self.latin_share = options['latin_share']
+        self.slugs = SlugAllocator(Note, self.using)
+
+        created = 0
+        started = time.perf_counter()
+        with search.deferred(connections[self.using]):
+            total = options['notes']
+            while created < total:
+                size = min(options['batch_size'], total - created)
+                self.write_batch(self.make_batch(size))
+                created += size
+                if options['verbosity'] > 1:
+                    self.stdout.write(
+                        f'{created} / {total}, '
+                        f'{time.perf_counter() - started:.1f} с')
+        for author_id in user_ids:
+            invalidate_list(author_id)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Пользователей: {len(user_ids)}, заметок: {created} '
+            f'за {elapsed:.1f} с ({created / elapsed:.0f} заметок/с)'))
+
+    def create_users(self, count, prefix, password):
+        """Создаёт недостающих пользователей prefix0..; их id по порядку."""
+        usernames = [f'{prefix}{index}' for index in range(count)]
+        users = User.objects.using(self.using)
+        size = max_query_params(self.using)
+        existing = set()
+        for chunk in chunks(usernames, size):
+            existing.update(users.filter(
+                username__in=chunk).values_list('username', flat=True))
+        encoded = make_password(password)
+        users.bulk_create(
+            User(username=username, password=encoded)
+            for username in usernames if username not in existing)
+        ids = {}
+        for chunk in chunks(usernames, size):
+            ids.update(users.filter(
+                username__in=chunk).values_list('username', 'id'))
+        return [ids[username] for username in usernames]
+
+    def make_titles(self, count, latin_share):
+        """Набор заголовков и их slug; частые заголовки идут первыми."""
+        self.titles = []
+        for _ in range(count):
+            words = (LATIN_WORDS if self.rnd.random() < latin_share
+                     else CYRILLIC_WORDS)
+            title = ' '.join(self.rnd.choices(words, k=self.rnd.randint(1, 3)))
+            self.titles.append(title.capitalize())
+        self.bases = [make_slug(title, self.max_length)
+                      for title in self.titles]
+
+    def make_corpus(self, max_text_size):
+        """Общие тексты на обоих алфавитах; заметки — их отрезки."""
+        self.corpus = {}
+        length = max(CORPUS_LENGTH, 2 * max_text_size)
+        for latin, words in ((False, CYRILLIC_WORDS), (True, LATIN_WORDS)):
+            parts = []
+            written = 0
+            while written < length:
+                word = self.rnd.choice(words)
+                parts.append(word)
+                written += len(word) + 1
+            self.corpus[latin] = ' '.join(parts)
+
+    def make_text(self):
+        size = min(int(self.rnd.lognormvariate(self.text_mu, 1.0)),
+                   self.max_text_size)
+        corpus = self.corpus[self.rnd.random() < self.latin_share]
+        start = self.rnd.randrange(len(corpus) - size)
+        return corpus[start:start + size]
+
+    def make_batch(self, size):
+        """Заметки пачки без slug и change_seq и base их slug."""
+        rnd = self.rnd
+        authors = rnd.choices(self.user_ids, cum_weights=self.author_weights,
+                              k=size)
+        indexes = rnd.choices(range(len(self.titles)),
+                              cum_weights=self.title_weights, k=size)
+        notes = [
+            Note(title=self.titles[index], text=self.make_text(),
+                 author_id=author_id)
+            for author_id, index in zip(authors, indexes)
+        ]
+        return notes, [self.bases[index] for index in indexes]
+
+    def write_batch(self, batch):
+        notes, bases = batch
+        with transaction.atomic(using=self.using):
+            # номера изменений — первой записью транзакции, на всю пачку
+            last_seq = ChangeSequence.reserve(self.using, len(notes))
+            first_seq = last_seq - len(notes) + 1
+            for offset, (note, slug) in enumerate(
+                    zip(notes, self.slugs.allocate(bases))):
+                note.slug = slug
+                note.change_seq = first_seq + offset
+            Note.objects.using(self.using).bulk_create(notes)
@@ -0,0 +1,248 @@
+import abc
+import asyncio
+import mimetypes
+import time
+from pathlib import Path
+
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.middleware.gzip import GZipMiddleware, re_accepts_gzip
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .auth import get_user
+from .instrumentation import measure, registry, view_measured
+from .routers import pin_primary
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+# Cache-Control файлов с хешем содержимого в имени.
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+class SyncAndAsyncMiddleware(abc.ABC):
+    """Основа middleware, работающих и под WSGI, и под ASGI без потоков.
+
+    Под ASGI обработчик вызывает __acall__, иначе Django оборачивал бы
+    middleware в sync_to_async и гонял каждый запрос через поток.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.handle(request)
+
+    @abc.abstractmethod
+    def handle(self, request):
+        """Обработать запрос под WSGI."""
+
+    @abc.abstractmethod
+    async def __acall__(self, request):
+        """Обработать запрос под ASGI."""
+
+
+class PrimaryPinMiddleware(SyncAndAsyncMiddleware):
+    """Закрепляет чтение за основной БД на время и после записи.
+
+    Небезопасный запрос целиком читает с основной БД и ставит cookie,
+    по которой следующие NOTES_PRIMARY_PIN_SECONDS секунд запросы этого
+    клиента тоже читают с основной БД, а не с отстающей реплики.
+    """
+    cookie_name = 'notes_primary_until'
+
+    def pinned_until(self, request):
+        try:
+            return float(request.COOKIES.get(self.cookie_name, 0))
+        except ValueError:
+            return 0
+
+    def pinned(self, request):
+        return (request.method not in SAFE_METHODS
+                or self.pinned_until(request) > time.time())
+
+    def handle(self, request):
+        with pin_primary(self.pinned(request)):
+            response = self.get_response(request)
+        return self.process_response(request, response)
+
+    async def __acall__(self, request):
+        with pin_primary(self.pinned(request)):
+            response = await self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        if request.method not in SAFE_METHODS:
+            seconds = settings.NOTES_PRIMARY_PIN_SECONDS
+            response.set_cookie(
+                self.cookie_name, str(time.time() + seconds),
+                max_age=seconds, httponly=True, samesite='Lax')
+        return response
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware с пользователем из кеша (notes.auth)."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: self.get_user(request))
+
+    @staticmethod
+    def get_user(request):
+        if not hasattr(request, '_cached_user'):
+            request._cached_user = get_user(request)
+        return request._cached_user
+
+
+class InstrumentationMiddleware(SyncAndAsyncMiddleware):
+    """Замеряет запрос: число и время SQL, отрисовку шаблона и итог.
+
+    Стоит первым в MIDDLEWARE, чтобы итог включал остальные middleware.
+    Запросы, выполненные при чтении потокового ответа, не учитываются.
+    """
+
+    def handle(self, request):
+        started = time.perf_counter()
+        with measure() as metrics:
+            request.notes_metrics = metrics
+            response = self.get_response(request)
+        return self.process_response(request, response, metrics, started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with measure() as metrics:
+            request.notes_metrics = metrics
+            response = await self.get_response(request)
+        return self.process_response(request, response, metrics, started)
+
+    def process_response(self, request, response, metrics, started):
+        metrics.total_ms = (time.perf_counter() - started) * 1000
+        match = request.resolver_match
+        view_name = match.view_name if match else 'unresolved'
+        registry.record(view_name, metrics)
+        view_measured.send(sender=type(self), view_name=view_name,
+                           metrics=metrics)
+        if settings.NOTES_SERVER_TIMING:
+            response['Server-Timing'] = metrics.server_timing()
+        return response
+
+    def process_template_response(self, request, response):
+        started = time.perf_counter()
+
+        def rendered(response):
+            request.notes_metrics.render_ms += (
+                time.perf_counter() - started) * 1000
+
+        response.add_post_render_callback(rendered)
+        return response
+
+
+class StaticFilesMiddleware(SyncAndAsyncMiddleware):
+    """Отдаёт собранную статику из STATIC_ROOT до остальных middleware.
+
+    Файлы с хешем в имени (из манифеста collectstatic, notes.storage)
+    кешируются клиентами на год, остальные — на NOTES_STATIC_MAX_AGE
+    секунд. Если клиент принимает gzip и рядом лежит name.gz, отдаётся
+    он. Включается NOTES_SERVE_STATIC; когда статику отдаёт веб-сервер
+    или CDN, её лучше выключить.
+    """
+
+    def __init__(self, get_response):
+        if not (settings.NOTES_SERVE_STATIC and settings.STATIC_ROOT):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.prefix = settings.STATIC_URL
+        self.root = Path(settings.STATIC_ROOT)
+        # манифест читается при создании хранилища: после collectstatic
+        # процесс нужно перезапустить
+        self.immutable = set(
+            getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+    def handle(self, request):
+        response = self.serve(request)
+        if response is None:
+            response = self.get_response(request)
+        return response
+
+    async def __acall__(self, request):
+        response = self.serve(request)
+        if response is None:
+            response = await self.get_response(request)
+        return response
+
+    def serve(self, request):
+        """Ответ с файлом статики или None, если запрос не к статике."""
+        if (request.method not in ('GET', 'HEAD')
+                or not request.path.startswith(self.prefix)):
+            return None
+        name = request.path[len(self.prefix):]
+        try:
+            path = Path(safe_join(self.root, name))
+        except SuspiciousFileOperation:
+            raise Http404
+        if not path.is_file():
+            raise Http404
+        mtime = path.stat().st_mtime
+        compressed = path.with_name(path.name + '.gz')
+        has_compressed = compressed.is_file()
+        if not was_modified_since(
+                request.META.get('HTTP_IF_MODIFIED_SINCE'), mtime):
+            response = HttpResponseNotModified()
+        else:
+            content_type, _ = mimetypes.guess_type(path.name)
+            accepts_gzip = re_accepts_gzip.search(
+                request.META.get('HTTP_ACCEPT_ENCODING', ''))
+            source = compressed if has_compressed and accepts_gzip else path
+            response = FileResponse(
+                source.open('rb'), filename=path.name,
+                content_type=content_type or 'application/octet-stream')
+            if source is compressed:
+                response['Content-Encoding'] = 'gzip'
+            response['Last-Modified'] = http_date(mtime)
+        if has_compressed:
+            patch_vary_headers(response, ('Accept-Encoding',))
+        response['Cache-Control'] = (
+            IMMUTABLE_CACHE_CONTROL if name in self.immutable
+            else f'public, max-age={settings.NOTES_STATIC_MAX_AGE}')
+        return response
+
+
+class HtmlGZipMiddleware(GZipMiddleware):
+    """Сжимает gzip HTML-страницы из NOTES_GZIP_VIEWS.
+
+    Включается NOTES_GZIP_HTML. Статика сюда не попадает: её
+    StaticFilesMiddleware отдаёт уже сжатой. Сжатие страницы, в которой
+    рядом с секретом выводится текст из запроса, открывает секрет для
+    атаки BREACH: по размеру сжатых ответов на подобранные запросы
+    угадывается секрет. Поэтому сжимаются только страницы, которые не
+    выводят текст из запроса; поиск, например, повторяет ?q= и не
+    сжимается.
+    """
+
+    def __init__(self, get_response):
+        if not settings.NOTES_GZIP_HTML:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def process_response(self, request, response):
+        match = request.resolver_match
+        if (match is None
+                or match.view_name not in settings.NOTES_GZIP_VIEWS
+                or response.streaming
+                or not response.get('Content-Type', '').startswith(
+                    'text/html')
+                or len(response.content) < settings.NOTES_GZIP_MIN_LENGTH):
+            return response
+        return super().process_response(request, response)
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.15 on 2026-10-18 13:02
+
+from django.conf import settings
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notes', '0002_note_author_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='note',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Изменено'),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['author', 'updated_at'], name='note_author_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 3.2.15 on 2026-10-18 12:57
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def number_existing_notes(apps, schema_editor):
+    """Существующим заметкам — номера изменений по порядку id."""
+    Note = apps.get_model('notes', 'Note')
+    ChangeSequence = apps.get_model('notes', 'ChangeSequence')
+    using = schema_editor.connection.alias
+    notes = Note.objects.using(using)
+    notes.update(change_seq=models.F('id'))
+    last = notes.aggregate(last=models.Max('id'))['last'] or 0
+    ChangeSequence.objects.using(using).create(pk=1, value=last)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notes', '0004_note_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('note_id', models.BigIntegerField(verbose_name='id заметки')),
+                ('slug', models.SlugField(db_index=False, max_length=100, verbose_name='slug заметки')),
+                ('change_seq', models.BigIntegerField(verbose_name='Номер изменения')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='note',
+            name='change_seq',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Номер изменения'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['author', 'change_seq'], name='note_author_change_idx'),
+        ),
+        migrations.AddField(
+            model_name='tombstone',
+            name='author',
+            field=models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['author', 'change_seq'], name='tombstone_author_change_idx'),
+        ),
+        migrations.RunPython(number_existing_notes,
+                             migrations.RunPython.noop),
+    ]
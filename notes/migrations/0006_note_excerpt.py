@@ -0,0 +1,36 @@
+# Generated by Django 3.2.15 on 2026-10-18 13:16
+
+from django.db import migrations, models
+from django.db.models.functions import Length, Substr
+
+EXCERPT_LENGTH = 200
+
+
+def fill_text_stats(apps, schema_editor):
+    """Начало и длина текста существующих заметок одним UPDATE."""
+    Note = apps.get_model('notes', 'Note')
+    Note.objects.using(schema_editor.connection.alias).update(
+        excerpt=Substr('text', 1, EXCERPT_LENGTH),
+        text_length=Length('text'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0005_note_change_seq'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='note',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=200, verbose_name='Начало текста'),
+        ),
+        migrations.AddField(
+            model_name='note',
+            name='text_length',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Длина текста'),
+        ),
+        migrations.RunPython(fill_text_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 3.2.15 on 2026-10-18 13:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import notes.models
+
+from notes import bodies
+
+BATCH_SIZE = 100
+
+
+def compress_large_bodies(apps, schema_editor):
+    """Большие тексты переносятся сжатыми в NoteBody.
+
+    Индекс поиска не трогаем: распакованный текст совпадает с прежним.
+    """
+    Note = apps.get_model('notes', 'Note')
+    NoteBody = apps.get_model('notes', 'NoteBody')
+    notes = Note.objects.using(schema_editor.connection.alias)
+    ids = list(notes.filter(
+        text_length__gte=settings.NOTES_BODY_COMPRESS_THRESHOLD,
+    ).values_list('id', flat=True))
+    for start in range(0, len(ids), BATCH_SIZE):
+        batch = notes.filter(id__in=ids[start:start + BATCH_SIZE])
+        NoteBody.objects.using(schema_editor.connection.alias).bulk_create(
+            NoteBody(note_id=pk, data=bodies.pack(text))
+            for pk, text in batch.values_list('id', 'text')
+        )
+        batch.update(text='', body_compressed=True)
+
+
+def inline_bodies(apps, schema_editor):
+    Note = apps.get_model('notes', 'Note')
+    NoteBody = apps.get_model('notes', 'NoteBody')
+    using = schema_editor.connection.alias
+    rows = NoteBody.objects.using(using)
+    for note_id in list(rows.values_list('note_id', flat=True)):
+        data = rows.values_list('data', flat=True).get(note_id=note_id)
+        Note.objects.using(using).filter(id=note_id).update(
+            text=bodies.unpack(data), body_compressed=False)
+    rows.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0006_note_excerpt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteBody',
+            fields=[
+                ('note', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='body', serialize=False, to='notes.note')),
+                ('data', models.BinaryField(verbose_name='Сжатый текст')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='note',
+            name='body_compressed',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Текст сжат'),
+        ),
+        migrations.AlterField(
+            model_name='note',
+            name='text',
+            field=notes.models.NoteTextField(help_text='Добавьте подробностей', verbose_name='Текст'),
+        ),
+        migrations.RunPython(compress_large_bodies, inline_bodies),
+    ]
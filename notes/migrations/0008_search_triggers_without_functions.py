@@ -0,0 +1,24 @@
+from django.db import migrations
+
+from notes import search
+
+
+def recreate_triggers(apps, schema_editor):
+    """Триггеры без notes_inflate: сжатые тексты индексирует приложение.
+
+    Индекс не перестраивается: сжатые заметки уже проиндексированы по
+    полному тексту, как и требует новая схема.
+    """
+    search.drop_triggers(schema_editor.connection)
+    search.restore_triggers(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0007_note_body'),
+    ]
+
+    operations = [
+        migrations.RunPython(recreate_triggers, migrations.RunPython.noop),
+    ]
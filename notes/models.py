@@ -1,7 +1,81 @@
 from django.conf import settings
-from django.db import models
+from django.db import (IntegrityError, connections, models, router,
+                       transaction)
+from django.db.models import F
+from django.db.models.query_utils import DeferredAttribute
 
-from pytils.translit import slugify
+from . import bodies
+from .slugs import (SLUG_ATTEMPTS, make_slug, next_free_slug, savepoint,
+                    taken_slugs)
+
+# Сколько первых символов текста хранится в Note.excerpt.
+EXCERPT_LENGTH = 200
+# Поля, которых достаточно для строки списка заметок.
+LIST_FIELDS = ('id', 'slug', 'title', 'excerpt', 'text_length', 'author_id')
+
+
+class NoteTextDescriptor(DeferredAttribute):
+    """Текст заметки; сжатый текст распаковывается при первом обращении."""
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if not value and instance.pk is not None and instance.body_compressed:
+            data = NoteBody.objects.using(instance._state.db).filter(
+                note_id=instance.pk).values_list('data', flat=True).first()
+            value = bodies.unpack(data)
+            if value is not None:
+                instance.__dict__[self.field.attname] = value
+        return value
+
+    def __set__(self, instance, value):
+        # с __set__ дескриптор не перекрывается значением из __dict__
+        instance.__dict__[self.field.attname] = value
+
+
+class NoteTextField(models.TextField):
+    """TextField, который для сжатых заметок пишет в колонку пустую строку.
+
+    Сам текст хранит NoteBody (см. notes.bodies).
+    """
+    descriptor_class = NoteTextDescriptor
+
+    def pre_save(self, model_instance, add):
+        value = super().pre_save(model_instance, add)
+        return '' if model_instance.body_compressed else value
+
+
+class NoteQuerySet(models.QuerySet):
+
+    def for_list(self):
+        """Заметки для списка: без полного текста, только начало и длина."""
+        return self.only(*LIST_FIELDS)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """bulk_create минует save(): начало и длину текста считаем здесь.
+
+        Большие тексты сжимаются в NoteBody и добавляются в индекс
+        поиска. SQLite не возвращает id вставленных строк, поэтому они
+        находятся по уникальному slug.
+        """
+        objs = list(objs)
+        for note in objs:
+            note.fill_text_stats()
+        created = super().bulk_create(objs, *args, **kwargs)
+        compressed = [note for note in objs if note.body_compressed]
+        if compressed:
+            ids = dict(self.model.objects.using(self.db).filter(
+                slug__in=[note.slug for note in compressed],
+            ).values_list('slug', 'id'))
+            NoteBody.objects.using(self.db).bulk_create(
+                NoteBody(note_id=ids[note.slug], data=bodies.pack(note.text))
+                for note in compressed
+            )
+            # search импортирует models
+            from . import search
+            search.index_bodies(connections[self.db], ids.values())
+        return created
 
 
 class Note(models.Model):
@@ -11,7 +85,7 @@ class Note(models.Model):
         default='Название заметки',
         help_text='Дайте короткое название заметке'
     )
-    text = models.TextField(
+    text = NoteTextField(
         'Текст',
         help_text='Добавьте подробностей'
     )
@@ -26,13 +100,246 @@ class Note(models.Model):
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        # поиск по автору покрывают составные индексы из Meta.indexes
+        db_index=False,
     )
+    updated_at = models.DateTimeField('Изменено', auto_now=True)
+    change_seq = models.BigIntegerField(
+        'Номер изменения', default=0, editable=False)
+    # копии из text для списка, обновляются в save() и bulk_create()
+    excerpt = models.CharField(
+        'Начало текста', max_length=EXCERPT_LENGTH, blank=True,
+        editable=False)
+    text_length = models.PositiveIntegerField(
+        'Длина текста', default=0, editable=False)
+    # текст хранится сжатым в NoteBody, колонка text пуста
+    body_compressed = models.BooleanField(
+        'Текст сжат', default=False, editable=False)
+
+    objects = NoteQuerySet.as_manager()
+
+    class Meta:
+        indexes = (
+            # список заметок автора, упорядоченный по id
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+            # detail/edit/delete: заметка автора по slug
+            models.Index(fields=('author', 'slug'),
+                         name='note_author_slug_idx'),
+            # последнее изменение среди заметок автора (ETag списка)
+            models.Index(fields=('author', 'updated_at'),
+                         name='note_author_updated_idx'),
+            # синхронизация: изменения автора после курсора
+            models.Index(fields=('author', 'change_seq'),
+                         name='note_author_change_idx'),
+        )
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        note = super().from_db(db, field_names, values)
+        # автор при загрузке: по нему сигналы замечают смену автора
+        note._loaded_author_id = note.__dict__.get('author_id')
+        return note
+
+    @property
+    def is_truncated(self):
+        """Текст длиннее начала, показанного в списке."""
+        return self.text_length > len(self.excerpt)
+
+    def fill_text_stats(self):
+        text = self.text
+        self.excerpt = text[:EXCERPT_LENGTH]
+        self.text_length = len(text)
+        self.body_compressed = (
+            self.text_length >= settings.NOTES_BODY_COMPRESS_THRESHOLD)
+
     def save(self, *args, **kwargs):
+        """Сохраняет заметку, подбирая свободный slug при конфликте.
+
+        Явно заданный slug не меняется: конфликт по нему пробрасывается
+        как IntegrityError. Каждое сохранение получает новый change_seq
+        и пересчитывает excerpt и text_length.
+
+        Создание заметки — два запроса в одной транзакции: UPDATE
+        счётчика (ChangeSequence) и INSERT; внутри чужой транзакции
+        вместо BEGIN/COMMIT — точка сохранения. Для сжатого текста
+        добавляются запись NoteBody и индекса поиска.
+        """
+        max_slug_length = self._meta.get_field('slug').max_length
+        # base — заготовка для подбора slug, None для явно заданного
+        base = None
         if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
+            base = make_slug(self.title, max_slug_length)
+            self.slug = base
+        using = kwargs['using'] = kwargs.get('using') or router.db_for_write(
+            type(self), instance=self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = {*update_fields, 'change_seq'}
+            if 'text' in update_fields:
+                update_fields |= {'excerpt', 'text_length', 'body_compressed'}
+            kwargs['update_fields'] = update_fields
+        # незагруженный текст (for_list) не менялся, пересчёт не нужен
+        save_text = ((update_fields is None or 'text' in update_fields)
+                     and 'text' not in self.get_deferred_fields())
+        was_compressed = self.pk is not None and self.body_compressed
+        if save_text:
+            self.fill_text_stats()
+        conflict = None
+        for attempt in range(SLUG_ATTEMPTS):
+            try:
+                # номер выдаётся в транзакции сохранения: блокировка
+                # счётчика держится до коммита, поэтому номера
+                # фиксируются по порядку
+                with transaction.atomic(using=using):
+                    self.change_seq = ChangeSequence.reserve(using)
+                    if conflict is not None and not self._take_free_slug(
+                            base, max_slug_length, using):
+                        # конфликт не по slug
+                        raise conflict
+                    self._write(save_text, was_compressed, *args, **kwargs)
+                return
+            except IntegrityError as error:
+                # транзакция откатилась целиком, вместе с номером
+                # изменения, и повторяется со свободным slug
+                if (not base or error is conflict
+                        or attempt == SLUG_ATTEMPTS - 1):
+                    raise
+                conflict = error
+
+    def _write(self, save_text, was_compressed, *args, **kwargs):
+        """Запись заметки, её сжатого текста и индекса поиска."""
+        # search импортирует models
+        from . import search
+        using = kwargs['using']
+        connection = connections[using]
+        # сжатые тексты индексируются здесь, а не триггерами
+        if was_compressed:
+            search.unindex_bodies(connection, [self.pk])
         super().save(*args, **kwargs)
+        if save_text:
+            self._save_body(using, was_compressed)
+        if self.body_compressed:
+            search.index_bodies(connection, [self.pk])
+
+    def _take_free_slug(self, base, max_slug_length, using):
+        """Занимает свободный slug base-N; False, если slug не был занят.
+
+        Вызывается после UPDATE счётчика: параллельные сохранения ждут
+        его блокировку, и выбранный slug до коммита никто не займёт.
+        """
+        taken = taken_slugs(
+            type(self).objects.using(using).exclude(pk=self.pk),
+            base,
+            max_slug_length,
+        )
+        if self.slug not in taken:
+            return False
+        self.slug = next_free_slug(base, taken, max_slug_length)
+        return True
+
+    def _save_body(self, using, was_compressed):
+        """Пишет сжатый текст в NoteBody или удаляет ставший ненужным."""
+        rows = NoteBody.objects.using(using)
+        if self.body_compressed:
+            data = bodies.pack(self.text)
+            if not (was_compressed
+                    and rows.filter(note_id=self.pk).update(data=data)):
+                rows.create(note_id=self.pk, data=data)
+        elif was_compressed:
+            rows.filter(note_id=self.pk).delete()
+
+
+class NoteBody(models.Model):
+    """Сжатый текст большой заметки (см. notes.bodies)."""
+
+    note = models.OneToOneField(
+        Note, on_delete=models.CASCADE, primary_key=True,
+        related_name='body')
+    data = models.BinaryField('Сжатый текст')
+
+
+def can_return_rows(connection):
+    """Поддерживает ли БД UPDATE ... RETURNING.
+
+    Django 3.2 не использует RETURNING на SQLite и не отмечает его в
+    features, хотя SQLite умеет это с 3.35.
+    """
+    if connection.vendor == 'sqlite':
+        return connection.Database.sqlite_version_info >= (3, 35)
+    return connection.features.can_return_columns_from_insert
+
+
+class ChangeSequence(models.Model):
+    """Глобальный счётчик изменений заметок (одна строка)."""
+
+    value = models.BigIntegerField(default=0)
+
+    @classmethod
+    def reserve(cls, using, count=1):
+        """Резервирует count номеров подряд и возвращает последний.
+
+        UPDATE идёт первым запросом: строка счётчика блокируется сразу,
+        и параллельные транзакции получают номера в порядке коммита.
+        """
+        sequences = cls.objects.using(using)
+        for _ in range(2):
+            value = cls._increment(using, count)
+            if value is not None:
+                return value
+            try:
+                with savepoint(using):
+                    sequences.create(pk=1, value=count)
+                return count
+            except IntegrityError:
+                # строку только что создала параллельная транзакция
+                continue
+        raise IntegrityError('Не удалось зарезервировать номер изменения')
+
+    @classmethod
+    def _increment(cls, using, count):
+        """Прибавляет count к счётчику; новое значение или None без строки.
+
+        Где есть UPDATE ... RETURNING (SQLite 3.35+, PostgreSQL), это один
+        запрос, иначе UPDATE и SELECT.
+        """
+        connection = connections[using]
+        if not can_return_rows(connection):
+            sequences = cls.objects.using(using)
+            if sequences.filter(pk=1).update(value=F('value') + count):
+                return sequences.values_list('value', flat=True).get(pk=1)
+            return None
+        quote = connection.ops.quote_name
+        table = quote(cls._meta.db_table)
+        pk = quote(cls._meta.pk.column)
+        value = quote(cls._meta.get_field('value').column)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} SET {value} = {value} + %s '
+                f'WHERE {pk} = 1 RETURNING {value}', [count])
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+
+class Tombstone(models.Model):
+    """След удалённой заметки, по которому клиенты узнают об удалении."""
+
+    note_id = models.BigIntegerField('id заметки')
+    slug = models.SlugField('slug заметки', max_length=100, db_index=False)
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        # при удалении пользователя следы его заметок пишутся в той же
+        # транзакции, уже после выборки связанных объектов
+        db_constraint=False,
+        db_index=False,
+    )
+    change_seq = models.BigIntegerField('Номер изменения')
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('author', 'change_seq'),
+                         name='tombstone_author_change_idx'),
+        )
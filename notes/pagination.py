@@ -0,0 +1,119 @@
+"""Курсорная (keyset) пагинация.
+
+Страница выбирается условием по первичному ключу, а не через OFFSET,
+поэтому стоимость запроса зависит только от размера страницы и не растёт
+по мере прокрутки списка. COUNT(*) тоже не нужен: запрашивается на одну
+запись больше, чтобы узнать, есть ли следующая страница.
+
+Для админки, где нужны номера страниц, есть EstimatedCountPaginator:
+COUNT(*) в нём ограничен, а размер большой таблицы оценивается.
+"""
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max
+from django.utils.functional import cached_property
+
+
+def parse_cursor(value):
+    """Возвращает курсор из GET-параметра или None, если он некорректен."""
+    try:
+        cursor = int(value)
+    except (TypeError, ValueError):
+        return None
+    return cursor if cursor > 0 else None
+
+
+class KeysetPage:
+    """Страница объектов с курсорами на соседние страницы."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def paginate_keyset(queryset, page_size, after=None, before=None):
+    """Выбирает страницу queryset по возрастанию id.
+
+    after — вернуть записи с id больше курсора (следующая страница),
+    before — записи с id меньше курсора (предыдущая страница).
+    """
+    if before is not None:
+        rows = list(
+            queryset.filter(id__lt=before).order_by('-id')[:page_size + 1]
+        )
+        has_more = len(rows) > page_size
+        rows = rows[:page_size][::-1]
+        if not rows:
+            return KeysetPage(rows)
+        return KeysetPage(
+            rows,
+            next_cursor=rows[-1].id,
+            previous_cursor=rows[0].id if has_more else None,
+        )
+    queryset = queryset.order_by('id')
+    if after is not None:
+        queryset = queryset.filter(id__gt=after)
+    rows = list(queryset[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if not rows:
+        return KeysetPage(rows)
+    return KeysetPage(
+        rows,
+        next_cursor=rows[-1].id if has_more else None,
+        previous_cursor=rows[0].id if after is not None else None,
+    )
+
+
+def estimated_count(model, using):
+    """Оценка числа строк таблицы model без прохода по ней.
+
+    На PostgreSQL — статистика планировщика, иначе — наибольший id
+    (по первичному ключу, верхняя граница с учётом удалённых строк).
+    """
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                [model._meta.db_table])
+            row = cursor.fetchone()
+        if row and row[0] > 0:
+            return int(row[0])
+    return model._base_manager.using(using).aggregate(
+        last=Max('pk'))['last'] or 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator, который не считает строки большой выборки целиком.
+
+    Точное число получается запросом COUNT(*) с LIMIT exact_limit + 1.
+    Если строк больше, для выборки без условий число оценивается
+    (estimated_count), а для отфильтрованной остаётся exact_limit + 1:
+    страницы дальше этой границы не показываются.
+    """
+    exact_limit = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        exact = queryset[:self.exact_limit + 1].count()
+        if exact <= self.exact_limit or queryset.query.where:
+            return exact
+        return max(exact, estimated_count(queryset.model, queryset.db))
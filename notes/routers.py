@@ -0,0 +1,48 @@
+"""Маршрутизация чтения заметок на реплики.
+
+Чтение моделей приложения notes уходит на одну из реплик из
+settings.NOTES_READ_REPLICAS, всё остальное — на основную БД. Пока
+запрос закреплён за основной БД (см. PrimaryPinMiddleware), чтение
+тоже идёт туда: пользователь сразу видит собственные изменения.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_primary_pinned = ContextVar('notes_primary_pinned', default=False)
+
+
+@contextmanager
+def pin_primary(pinned=True):
+    """Закрепляет чтение за основной БД на время блока."""
+    token = _primary_pinned.set(pinned)
+    try:
+        yield
+    finally:
+        _primary_pinned.reset(token)
+
+
+def is_primary_pinned():
+    return _primary_pinned.get()
+
+
+class PrimaryReplicaRouter:
+    app_label = 'notes'
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.NOTES_READ_REPLICAS
+        if (model._meta.app_label == self.app_label and replicas
+                and not is_primary_pinned()):
+            return random.choice(replicas)
+        # в том числе связанные объекты заметки, прочитанной с реплики
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # реплики — копии основной БД
+        return True
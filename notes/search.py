@@ -0,0 +1,284 @@
+"""Полнотекстовый поиск по заметкам.
+
+На SQLite поиск идёт по индексу FTS5 notes_note_fts с внешним содержимым
+(content=notes_note): в нём хранится только индекс, тексты берутся из
+notes_note. Индекс обновляют триггеры на notes_note, поэтому для
+текстов в колонке text он синхронен при любых способах записи, включая
+bulk_create и update().
+
+author_id тоже проиндексирован: условие author_id:N внутри MATCH сужает
+выборку до заметок автора ещё в индексе, и bm25 считается только для них.
+
+Сжатые тексты (notes.bodies) лежат в notes_notebody, а колонка text
+у таких заметок пуста. SQL-триггеры не могут их распаковать без
+функции приложения, а её нет у других клиентов БД (sqlite3, dbshell,
+скрипты резервного копирования). Поэтому триггеры индексируют только
+заметки с текстом в колонке (body_compressed = 0), а сжатые заметки
+добавляются в индекс и убираются из него кодом приложения: index_bodies
+и unindex_bodies вызываются из Note.save(), NoteQuerySet.bulk_create(),
+удаления заметок и notes.bulk. Сжатую заметку, удалённую или изменённую
+в обход приложения, исправит rebuild().
+
+Django при изменении схемы в SQLite пересоздаёт таблицы, и триггеры
+пропадают или мешают переименованию. Поэтому перед migrate (pre_migrate)
+они снимаются, а после (post_migrate) возвращаются restore_triggers().
+Миграция, которая сама меняет тексты заметок, перестраивает индекс.
+
+На других СУБД поиск работает через icontains, без сжатых текстов.
+"""
+from contextlib import contextmanager
+
+from django.db import connections, router
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from . import bodies
+from .models import Note, NoteBody
+from .utils import chunks
+
+FTS_TABLE = 'notes_note_fts'
+
+FTS_SCHEMA = (
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+    "title, text, author_id, content='notes_note', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')"
+)
+
+BODY_TABLE = NoteBody._meta.db_table
+# body_* — триггеры notes_notebody прежних версий, снимаются вместе с
+# остальными.
+TRIGGER_SUFFIXES = ('ai', 'ad', 'au', 'body_ai', 'body_ad', 'body_au')
+INDEX_SQL = (f'INSERT INTO {FTS_TABLE} (rowid, title, text, author_id) '
+             'VALUES (%s, %s, %s, %s)')
+UNINDEX_SQL = (f'INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, title, '
+               "text, author_id) VALUES ('delete', %s, %s, %s, %s)")
+# Сколько сжатых текстов распаковывается за раз при индексации.
+BODIES_BATCH_SIZE = 100
+
+
+def _inline(row, with_bodies):
+    """Условие: текст строки {row} лежит в колонке text, а не сжат."""
+    return f' WHERE {row}.body_compressed = 0' if with_bodies else ''
+
+
+def _index(row, with_bodies):
+    return (f'INSERT INTO {FTS_TABLE} (rowid, title, text, author_id) '
+            f'SELECT {row}.id, {row}.title, {row}.text, {row}.author_id'
+            f'{_inline(row, with_bodies)};')
+
+
+def _unindex(row, with_bodies):
+    return (f'INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, title, text, '
+            f"author_id) SELECT 'delete', {row}.id, {row}.title, "
+            f'{row}.text, {row}.author_id{_inline(row, with_bodies)};')
+
+
+def _trigger(suffix, event, table, *statements):
+    return (f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_{suffix} '
+            f'AFTER {event} ON {table} BEGIN {" ".join(statements)} END')
+
+
+def triggers(with_bodies=True):
+    """Триггеры индекса; with_bodies — есть ли колонка body_compressed.
+
+    В триггерах только SQL без функций приложения: notes_note может
+    менять любой клиент SQLite.
+    """
+    columns = 'title, text, author_id'
+    if with_bodies:
+        columns += ', body_compressed'
+    return [
+        _trigger('ai', 'INSERT', 'notes_note', _index('new', with_bodies)),
+        _trigger('ad', 'DELETE', 'notes_note', _unindex('old', with_bodies)),
+        _trigger('au', f'UPDATE OF {columns}', 'notes_note',
+                 _unindex('old', with_bodies), _index('new', with_bodies)),
+    ]
+
+
+# Вес совпадений в заголовке и в тексте для bm25 (author_id не влияет).
+TITLE_WEIGHT = 10.0
+TEXT_WEIGHT = 1.0
+AUTHOR_WEIGHT = 0.0
+
+
+def is_supported(connection):
+    return connection.vendor == 'sqlite'
+
+
+def is_installed(connection):
+    with connection.cursor() as cursor:
+        return FTS_TABLE in connection.introspection.table_names(cursor)
+
+
+def has_bodies(connection):
+    """Есть ли таблица сжатых текстов (её нет до миграции 0007)."""
+    with connection.cursor() as cursor:
+        return BODY_TABLE in connection.introspection.table_names(cursor)
+
+
+def install(connection):
+    """Создаёт и заполняет индекс, если его нет, и триггеры к нему."""
+    if not is_supported(connection):
+        return
+    if not is_installed(connection):
+        with connection.cursor() as cursor:
+            cursor.execute(FTS_SCHEMA)
+        rebuild(connection)
+    restore_triggers(connection)
+
+
+def restore_triggers(connection):
+    """Создаёт недостающие триггеры, если индекс установлен."""
+    if not is_supported(connection) or not is_installed(connection):
+        return
+    with_bodies = has_bodies(connection)
+    with connection.cursor() as cursor:
+        for trigger in triggers(with_bodies):
+            cursor.execute(trigger)
+
+
+def drop_triggers(connection):
+    """Удаляет триггеры индекса.
+
+    SQLite не переименовывает таблицу, пока на неё ссылается триггер
+    другой таблицы, — как делает Django, пересоздавая таблицу при
+    миграции; такими были триггеры notes_notebody. Поэтому на время
+    migrate (pre_migrate) триггеры снимаются и возвращаются после него,
+    заодно обновляя их определения.
+    """
+    if not is_supported(connection):
+        return
+    with connection.cursor() as cursor:
+        for suffix in TRIGGER_SUFFIXES:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}')
+
+
+@contextmanager
+def deferred(connection):
+    """Снимает триггеры на время блока и перестраивает индекс после него.
+
+    Для массовой записи: один проход rebuild быстрее триггера на каждую
+    строку, но перечитывает все заметки базы, а до конца блока поиск не
+    видит изменений. Индекс перестраивается и при исключении.
+    """
+    indexed = is_supported(connection) and is_installed(connection)
+    if indexed:
+        drop_triggers(connection)
+    try:
+        yield
+    finally:
+        if indexed:
+            restore_triggers(connection)
+            rebuild(connection)
+
+
+def uninstall(connection):
+    if not is_supported(connection):
+        return
+    drop_triggers(connection)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def rebuild(connection):
+    """Перестраивает индекс по текущим текстам заметок, включая сжатые."""
+    with_bodies = has_bodies(connection)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('delete-all')")
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, text, author_id) '
+            f'SELECT id, title, text, author_id FROM notes_note'
+            f'{_inline("notes_note", with_bodies)}')
+    if with_bodies:
+        _write_bodies(connection, INDEX_SQL, None)
+
+
+def index_bodies(connection, ids):
+    """Добавляет в индекс сжатые заметки из ids (их не видят триггеры).
+
+    Заметки ids без сжатого текста пропускаются.
+    """
+    ids = list(ids)
+    if ids and is_supported(connection) and is_installed(connection):
+        _write_bodies(connection, INDEX_SQL, ids)
+
+
+def unindex_bodies(connection, ids):
+    """Убирает из индекса сжатые заметки из ids до их изменения."""
+    ids = list(ids)
+    if ids and is_supported(connection) and is_installed(connection):
+        _write_bodies(connection, UNINDEX_SQL, ids)
+
+
+def _write_bodies(connection, sql, ids):
+    """Выполняет sql для каждой сжатой заметки из ids (None — для всех).
+
+    Тексты распаковываются по BODIES_BATCH_SIZE заметок за раз.
+    """
+    with connection.cursor() as cursor:
+        if ids is None:
+            cursor.execute(
+                'SELECT id FROM notes_note WHERE body_compressed = 1')
+            ids = [pk for pk, in cursor.fetchall()]
+        for batch in chunks(list(ids), BODIES_BATCH_SIZE):
+            cursor.execute(
+                f'SELECT n.id, n.title, b.data, n.author_id '
+                f'FROM notes_note n JOIN {BODY_TABLE} b ON b.note_id = n.id '
+                f'WHERE n.body_compressed = 1 AND n.id IN '
+                f'({", ".join(["%s"] * len(batch))})', batch)
+            cursor.executemany(sql, [
+                (pk, title, bodies.unpack(data), author_id)
+                for pk, title, data, author_id in cursor.fetchall()
+            ])
+
+
+def match_expression(query):
+    """Запрос пользователя как выражение FTS5: все слова, без операторов."""
+    return ' '.join(
+        '"' + word.replace('"', '""') + '"' for word in query.split())
+
+
+def author_match(author_id, match):
+    """Ограничивает выражение match заметками автора."""
+    return f'author_id:{int(author_id)} AND {{title text}}: ({match})'
+
+
+def matching_ids(match, columns=('title', 'text')):
+    """Подзапрос id заметок под выражением match для filter(id__in=...).
+
+    Только SQLite с установленным индексом; колонки — из columns.
+    """
+    columns = ' '.join(columns)
+    return RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        [f'{{{columns}}}: ({match})'])
+
+
+def search_notes(author, query, page, page_size):
+    """Страница заметок автора, подходящих под query.
+
+    На SQLite заметки упорядочены по bm25, иначе — от новых к старым.
+    Возвращает (заметки, есть ли следующая страница).
+    """
+    match = match_expression(query)
+    if not match:
+        return [], False
+    offset = (page - 1) * page_size
+    using = router.db_for_read(Note)
+    if is_supported(connections[using]):
+        notes = list(Note.objects.using(using).raw(
+            f'SELECT note.id, note.title, note.slug '
+            f'FROM {FTS_TABLE} JOIN notes_note note '
+            f'ON note.id = {FTS_TABLE}.rowid '
+            f'WHERE {FTS_TABLE} MATCH %s AND note.author_id = %s '
+            f'ORDER BY bm25({FTS_TABLE}, %s, %s, %s) LIMIT %s OFFSET %s',
+            [author_match(author.pk, match), author.pk, TITLE_WEIGHT,
+             TEXT_WEIGHT, AUTHOR_WEIGHT, page_size + 1, offset],
+        ))
+    else:
+        notes = list(Note.objects.using(using).filter(
+            Q(title__icontains=query) | Q(text__icontains=query),
+            author=author,
+        ).order_by('-id')[offset:offset + page_size + 1])
+    return notes[:page_size], len(notes) > page_size
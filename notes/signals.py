@@ -0,0 +1,161 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_out
+from django.db import connections, transaction
+from django.db.backends.signals import connection_created
+from django.db.migrations.loader import MigrationLoader
+from django.db.models.signals import (post_delete, post_migrate, post_save,
+                                      pre_delete, pre_migrate, pre_save)
+from django.dispatch import receiver
+
+from . import instrumentation, search
+from .auth import forget_user
+from .cache import invalidate_list
+from .models import ChangeSequence, Note, Tombstone
+from .sqlite import apply_pragmas, checkpoint
+
+
+@receiver(pre_save, sender=Note)
+def remember_previous_author(sender, instance, update_fields=None,
+                             **kwargs):
+    """Запоминает прежнего автора, если сохранение его меняет.
+
+    Прежний автор — тот, с которым заметка загружена или последний раз
+    сохранена (Note.from_db, forget_previous_author).
+    """
+    loaded = getattr(instance, '_loaded_author_id', None)
+    saves_author = (update_fields is None
+                    or {'author', 'author_id'} & set(update_fields))
+    instance._previous_author_id = (
+        loaded if saves_author and loaded not in (None, instance.author_id)
+        else None)
+
+
+@receiver((post_save, post_delete), sender=Note)
+def invalidate_notes_list(sender, instance, using, **kwargs):
+    """Сбрасывает кеш списка автора при изменении его заметки.
+
+    При смене автора сбрасывается и список прежнего автора. Повторный
+    сброс после коммита не даёт закешировать список, прочитанный
+    параллельным запросом до фиксации транзакции.
+    """
+    author_ids = {instance.author_id}
+    if kwargs['signal'] is post_save and instance._previous_author_id:
+        author_ids.add(instance._previous_author_id)
+    for author_id in author_ids:
+        invalidate_list(author_id)
+        transaction.on_commit(
+            lambda author_id=author_id: invalidate_list(author_id),
+            using=using)
+
+
+@receiver(pre_delete, sender=Note)
+def reserve_tombstone_seq(sender, instance, using, **kwargs):
+    """Берёт номер следа до DELETE, первой записью транзакции удаления.
+
+    Так удаление, как и сохранение, начинается с UPDATE счётчика, который
+    ждёт блокировку записи SQLite (busy_timeout). Если первым шёл DELETE,
+    при параллельной записи он сразу падал с "database is locked":
+    FTS5-триггер сначала читает служебные таблицы индекса, а транзакция,
+    уже начавшая чтение, блокировку записи не ждёт.
+    """
+    instance._tombstone_seq = ChangeSequence.reserve(using)
+    if instance.body_compressed:
+        # сжатый текст триггер удаления из индекса не видит
+        search.unindex_bodies(connections[using], [instance.pk])
+
+
+@receiver(post_delete, sender=Note)
+def record_tombstone(sender, instance, using, **kwargs):
+    """Оставляет след удалённой заметки для синхронизации клиентов."""
+    Tombstone.objects.using(using).create(
+        note_id=instance.pk,
+        slug=instance.slug,
+        author_id=instance.author_id,
+        change_seq=instance._tombstone_seq,
+    )
+
+
+@receiver(post_save, sender=Note)
+def record_author_change(sender, instance, using, **kwargs):
+    """Для прежнего автора заметка после смены автора удалена.
+
+    Его синхронизация получает след с новым номером изменения, и ETag
+    его списка меняется. Следы этой заметки у нового автора (она уже
+    была у него раньше) убираются: иначе клиент получил бы её в одном
+    ответе и среди изменённых, и среди удалённых.
+    """
+    previous = instance._previous_author_id
+    if not previous:
+        return
+    tombstones = Tombstone.objects.using(using)
+    tombstones.filter(note_id=instance.pk,
+                      author_id=instance.author_id).delete()
+    tombstones.create(
+        note_id=instance.pk,
+        slug=instance.slug,
+        author_id=previous,
+        change_seq=ChangeSequence.reserve(using),
+    )
+
+
+@receiver(post_save, sender=Note)
+def forget_previous_author(sender, instance, **kwargs):
+    """Сохранённый автор становится прежним для следующего save().
+
+    Подключается после остальных обработчиков post_save заметки.
+    """
+    instance._loaded_author_id = instance.author_id
+
+
+@receiver((post_save, post_delete), sender=get_user_model())
+def forget_cached_user(sender, instance, **kwargs):
+    """Смена пароля и других полей пользователя сбрасывает его кеш."""
+    forget_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def forget_logged_out_user(sender, user, **kwargs):
+    if user is not None:
+        forget_user(user.pk)
+
+
+@receiver(pre_migrate)
+def drop_search_triggers(sender, using, **kwargs):
+    """Снимает триггеры индекса поиска на время миграций (см. search)."""
+    if sender.label == Note._meta.app_label:
+        search.drop_triggers(connections[using])
+
+
+@receiver(post_migrate)
+def install_search_index(sender, using, **kwargs):
+    """Возвращает триггеры индекса поиска после пересоздания таблицы.
+
+    Если таблицы созданы по моделям без миграций (тестовая БД с
+    TEST['MIGRATE'] = False), индекс создаётся здесь вместо 0004.
+    """
+    if sender.label != Note._meta.app_label:
+        return
+    module, _ = MigrationLoader.migrations_module(sender.label)
+    if module is None:
+        search.install(connections[using])
+    else:
+        search.restore_triggers(connections[using])
+
+
+@receiver(post_migrate)
+def checkpoint_after_migrate(sender, using, **kwargs):
+    """Сбрасывает WAL после migrate: клоны тестовой БД копируют файл."""
+    checkpoint(connections[using])
+
+
+@receiver(connection_created)
+def install_query_metrics(sender, connection, **kwargs):
+    """Подключает подсчёт SQL для InstrumentationMiddleware."""
+    instrumentation.install_wrapper(connection)
+
+
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+    """Применяет SQLITE_PRAGMAS к новому соединению с SQLite."""
+    if connection.vendor == 'sqlite':
+        apply_pragmas(connection)
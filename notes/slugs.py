@@ -0,0 +1,187 @@
+"""Выбор уникального slug для заметки.
+
+Уникальность slug гарантирует индекс в БД, поэтому заметка сохраняется
+сразу, без предварительной проверки. Только если вставка упала на
+конфликте, занятые варианты выбираются одним диапазонным запросом по
+префиксу, и берётся первый свободный: base-2, base-3, ...
+"""
+from collections import OrderedDict
+from contextlib import nullcontext
+from functools import lru_cache
+
+from django.db import connections, models, transaction
+from pytils.translit import slugify
+
+from .utils import chunks, max_query_params
+
+# Сколько раз пробовать сохранить заметку, если параллельный запрос
+# успевает занять выбранный slug.
+SLUG_ATTEMPTS = 10
+# Место под суффикс вида "-1234567" при обрезке длинного slug.
+SUFFIX_RESERVE = 8
+# Символ больше любого допустимого в slug: верхняя граница диапазона.
+PREFIX_RANGE_END = '\U0010ffff'
+# Сколько последних заголовков помнит кеш транслитерации.
+SLUG_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=SLUG_CACHE_SIZE)
+def make_slug(title, max_length):
+    """Slug из заголовка, обрезанный до max_length.
+
+    Транслитерация pytils дорогая, а заголовки часто повторяются, поэтому
+    результат кешируется; статистика — make_slug.cache_info().
+    """
+    return slugify(title)[:max_length] or 'note'
+
+
+def variants_range(base, max_length):
+    """Границы диапазона slug, в который попадают все варианты base-N.
+
+    Обычно это base-..., но длинный base при добавлении суффикса
+    обрезается, и тогда диапазон берётся по укороченному префиксу.
+    """
+    if len(base) <= max_length - SUFFIX_RESERVE:
+        low = base + '-'
+    else:
+        low = base[:max_length - SUFFIX_RESERVE]
+    return low, low + PREFIX_RANGE_END
+
+
+def taken_slugs(queryset, base, max_length):
+    """Занятые base и его варианты — один диапазонный запрос по индексу."""
+    low, high = variants_range(base, max_length)
+    return set(queryset.filter(
+        models.Q(slug=base) | models.Q(slug__gte=low, slug__lt=high)
+    ).values_list('slug', flat=True))
+
+
+def with_suffix(base, number, max_length):
+    """base-number, при необходимости base обрезается."""
+    suffix = f'-{number}'
+    return base[:max_length - len(suffix)] + suffix
+
+
+def next_free_slug(base, taken, max_length):
+    """Первый свободный из base, base-2, base-3, ... не длиннее max_length."""
+    if base not in taken:
+        return base
+    number = 2
+    while True:
+        candidate = with_suffix(base, number, max_length)
+        if candidate not in taken:
+            return candidate
+        number += 1
+
+
+class SlugAllocator:
+    """Раздаёт уникальные slug пачкам новых заметок для bulk_create.
+
+    На пачку — запрос по точным совпадениям и, если есть конфликты,
+    запросы по диапазонам вариантов сразу для многих base. Занятые
+    варианты конфликтных base запоминаются между пачками в ограниченном
+    LRU, поэтому частые заголовки не перечитываются каждую пачку. Если
+    параллельная запись всё же заняла выданный slug, вставка падает с
+    IntegrityError: нужно вызвать forget() и повторить пачку.
+    """
+
+    def __init__(self, model, using, cache_size=10000):
+        self.model = model
+        self.using = using
+        self.max_length = model._meta.get_field('slug').max_length
+        self.cache_size = cache_size
+        # base -> [занятые варианты, следующий номер суффикса]
+        self._variants = OrderedDict()
+
+    def forget(self):
+        self._variants.clear()
+
+    def _select_slugs(self, where, params):
+        # Запрос собирается вручную: WHERE из тысяч OR-условий Django
+        # строит за квадратичное время.
+        connection = connections[self.using]
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT slug FROM {table} WHERE {where}', params)
+            return [slug for slug, in cursor.fetchall()]
+
+    def _taken(self, bases):
+        """Какие из bases уже заняты."""
+        taken = set()
+        for chunk in chunks(bases, max_query_params(self.using)):
+            taken.update(self._select_slugs(
+                'slug IN (' + ', '.join(['%s'] * len(chunk)) + ')', chunk))
+        return taken
+
+    def _fetch_variants(self, bases):
+        """Читает из БД занятые варианты base-N для bases."""
+        for base in bases:
+            self._variants[base] = [set(), 2]
+        # обрезаемые base не восстанавливаются из slug по суффиксу
+        long_bases = [base for base in bases
+                      if len(base) > self.max_length - SUFFIX_RESERVE]
+        # два параметра на диапазон
+        for chunk in chunks(bases, max_query_params(self.using) // 2):
+            params = []
+            for base in chunk:
+                params.extend(variants_range(base, self.max_length))
+            where = ' OR '.join(['(slug >= %s AND slug < %s)'] * len(chunk))
+            for slug in self._select_slugs(where, params):
+                self._remember(slug)
+                for base in long_bases:
+                    low, high = variants_range(base, self.max_length)
+                    if low <= slug < high:
+                        self._variants[base][0].add(slug)
+
+    def _remember(self, slug):
+        """Учитывает занятый slug в вариантах его base, если он известен."""
+        base = slug.rpartition('-')[0]
+        if base in self._variants:
+            self._variants[base][0].add(slug)
+
+    def allocate(self, bases):
+        """Список уникальных slug в том же порядке, что и bases."""
+        taken = self._taken(list(set(bases)))
+        seen = set()
+        conflicts = set()
+        for base in bases:
+            if base in taken or base in seen:
+                conflicts.add(base)
+            seen.add(base)
+        self._fetch_variants(
+            [base for base in conflicts if base not in self._variants])
+        for base in conflicts:
+            self._variants.move_to_end(base)
+        assigned = set()
+        slugs = []
+        for base in bases:
+            slug = base
+            if base in taken or base in assigned:
+                if base not in self._variants:
+                    # base совпал со slug с суффиксом, выданным в этой же
+                    # пачке: его варианты ещё не читались
+                    self._fetch_variants([base])
+                variants, number = self._variants[base]
+                while True:
+                    slug = with_suffix(base, number, self.max_length)
+                    number += 1
+                    if slug not in variants and slug not in assigned:
+                        break
+                self._variants[base][1] = number
+            assigned.add(slug)
+            self._remember(slug)
+            slugs.append(slug)
+        while len(self._variants) > self.cache_size:
+            self._variants.popitem(last=False)
+        return slugs
+
+
+def savepoint(using):
+    """Savepoint, если уже открыта транзакция.
+
+    В autocommit неудачная вставка ничего не ломает, и лишние
+    SAVEPOINT/RELEASE не нужны.
+    """
+    if transaction.get_connection(using).in_atomic_block:
+        return transaction.atomic(using=using)
+    return nullcontext()
@@ -0,0 +1,28 @@
+"""Настройка соединений с SQLite.
+
+Прагмы из settings.SQLITE_PRAGMAS применяются к каждому новому
+соединению (сигнал connection_created, см. signals.py). Запросы идут
+мимо обёртки Django и не попадают в connection.queries.
+"""
+from django.conf import settings
+
+
+def apply_pragmas(connection, pragmas=None):
+    """Выполняет PRAGMA name = value для каждой пары из pragmas."""
+    if pragmas is None:
+        pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    for name, value in pragmas.items():
+        if not name.isidentifier():
+            raise ValueError(f'Некорректное имя прагмы: {name!r}')
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+def checkpoint(connection):
+    """Переносит журнал WAL в основной файл БД.
+
+    После этого копия одного файла БД (клоны тестовой БД для --parallel,
+    резервная копия через cp) содержит все зафиксированные данные.
+    """
+    if connection.vendor == 'sqlite' and not connection.is_in_memory_db():
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
@@ -0,0 +1,62 @@
+"""Хранилище статики: имена с хешем содержимого и сжатые копии .gz.
+
+collectstatic собирает файлы в STATIC_ROOT, ManifestStaticFilesStorage
+добавляет к именам хеш содержимого (base.css -> base.1709b4b7a3d6.css)
+и переписывает ссылки внутри CSS. Файл под таким именем никогда не
+меняется, поэтому StaticFilesMiddleware отдаёт его с кешированием на
+год. Текстовые файлы здесь же сжимаются в name.gz: gzip выполняется
+один раз при сборке, а не на каждый запрос.
+"""
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+# Расширения файлов, которые сжимаются при сборке.
+COMPRESSIBLE = ('.css', '.js', '.map', '.svg', '.txt', '.json', '.xml',
+                '.html')
+# Файлы меньше этого размера (байт) не сжимаются: выигрыш меньше
+# заголовка Content-Encoding.
+MIN_COMPRESS_SIZE = 256
+
+
+def compress(data):
+    # mtime=0: одинаковые файлы дают одинаковый .gz при каждой сборке
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def stored_name(self, name):
+        # манифеста нет, пока не запускался collectstatic (разработка,
+        # тесты): ссылки ведут на файлы без хеша
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE):
+                compressed_name = self.compress_file(name)
+                if compressed_name:
+                    yield name, compressed_name, True
+
+    def compress_file(self, name):
+        """Пишет name.gz, если сжатие даёт выигрыш; возвращает его имя."""
+        compressed_name = name + '.gz'
+        # копия от прошлой сборки могла устареть
+        if self.exists(compressed_name):
+            self.delete(compressed_name)
+        with self.open(name) as original:
+            data = original.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return None
+        compressed = compress(data)
+        if len(compressed) >= len(data):
+            return None
+        self._save(compressed_name, ContentFile(compressed))
+        return compressed_name
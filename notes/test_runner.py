@@ -0,0 +1,23 @@
+"""Запуск тестов через manage.py test с быстрым хешером паролей."""
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+def fast_password_hashers():
+    """override_settings с хешерами TEST_PASSWORD_HASHER_PROFILE."""
+    profile = settings.TEST_PASSWORD_HASHER_PROFILE
+    return override_settings(
+        PASSWORD_HASHERS=settings.PASSWORD_HASHER_PROFILES[profile])
+
+
+class TestRunner(DiscoverRunner):
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.password_hashers = fast_password_hashers()
+        self.password_hashers.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.password_hashers.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,49 @@
+"""Общие данные тестов маршрутов, контента и логики."""
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+                                 SESSION_KEY, get_user_model)
+from django.test import Client
+
+from notes.models import Note
+
+User = get_user_model()
+
+NOTE_DATA = {
+    'title': 'Заголовок',
+    'text': 'Текст',
+    'slug': 'note-slug',
+}
+
+
+def logged_in_client(user):
+    """Клиент с готовой сессией user.
+
+    В отличие от force_login сессия только записывается: без cycle_key,
+    сигнала user_logged_in и обновления last_login.
+    """
+    session = import_module(settings.SESSION_ENGINE).SessionStore()
+    session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    client = Client()
+    client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+    return client
+
+
+class NotesFixtures:
+    """Автор с заметкой, другой пользователь и их клиенты.
+
+    Подмешивается к TestCase: данные создаются один раз на класс.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.author = User.objects.create(username='Автор')
+        cls.notauthor = User.objects.create(username='Неавтор')
+        cls.note = Note.objects.create(author=cls.author, **NOTE_DATA)
+        cls.author_client = logged_in_client(cls.author)
+        cls.notauthor_client = logged_in_client(cls.notauthor)
@@ -0,0 +1,134 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes.models import Note
+from notes.pagination import EstimatedCountPaginator
+from notes.tests.fixtures import logged_in_client
+
+User = get_user_model()
+
+
+class TestNoteAdmin(TestCase):
+    URL_CHANGELIST = reverse('admin:notes_note_changelist')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username='Админ')
+        cls.authors = [User.objects.create(username=f'Автор {i}')
+                       for i in range(3)]
+        Note.objects.bulk_create(
+            Note(title=f'Заметка {i}', text='Текст ' * 100,
+                 slug=f'note-{i}', author=cls.authors[i % 3])
+            for i in range(9)
+        )
+        cls.note = Note.objects.create(
+            title='Отчёт за неделю', text='Текст', slug='report',
+            author=cls.authors[0])
+        cls.admin_client = logged_in_client(cls.admin)
+
+    def setUp(self):
+        # счёт запросов с холодными кешами сессии, пользователя и типов
+        cache.clear()
+        ContentType.objects.clear_cache()
+
+    def queries(self, url, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.admin_client.get(url, params)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return response, [query['sql'] for query in queries
+                          if 'SAVEPOINT' not in query['sql']]
+
+    def changelist(self, **params):
+        return self.queries(self.URL_CHANGELIST, params)
+
+    def found(self, query):
+        response, _ = self.changelist(q=query)
+        return {note.slug for note in response.context['cl'].result_list}
+
+    # число запросов списка не зависит от числа заметок и авторов;
+    # текст не выбирается, авторы приходят JOIN-ом
+    def test_changelist_queries(self):
+        response, sql = self.changelist()
+        self.assertEqual(len(response.context['cl'].result_list), 10)
+        self.assertEqual(len(sql), 4)
+        author = Note.objects.create(
+            title='Ещё', text='Текст', slug='more',
+            author=User.objects.create(username='Новый'))
+        cache.clear()
+        response, more_sql = self.changelist()
+        self.assertContains(response, author.slug)
+        self.assertEqual(len(more_sql), len(sql))
+        page_sql = [query for query in sql if '"auth_user"' in query
+                    and '"notes_note"."title"' in query]
+        self.assertEqual(len(page_sql), 1)
+        self.assertNotIn('"notes_note"."text"', page_sql[0])
+
+    # COUNT(*) ограничен, полного подсчёта таблицы нет
+    def test_changelist_count_is_limited(self):
+        _, sql = self.changelist()
+        counts = [query for query in sql if 'COUNT(' in query.upper()]
+        self.assertEqual(len(counts), 1)
+        self.assertIn('LIMIT', counts[0].upper())
+
+    # страница правки не выбирает всех пользователей для поля автора
+    def test_change_page_queries(self):
+        url = reverse('admin:notes_note_change', args=(self.note.pk,))
+        response, sql = self.queries(url)
+        self.assertEqual(len(sql), 5)
+        users_sql = [query for query in sql if 'FROM "auth_user"' in query]
+        self.assertTrue(all('WHERE' in query for query in users_sql))
+        self.assertContains(response, 'name="author"')
+        self.assertContains(response, 'Автор 0')
+
+    # поиск: точный slug, точное имя автора, слова заголовка
+    def test_search(self):
+        self.assertEqual(self.found('report'), {'report'})
+        self.assertEqual(self.found('Автор 1'),
+                         {'note-1', 'note-4', 'note-7'})
+        self.assertEqual(self.found('неделю'), {'report'})
+        self.assertEqual(self.found('нет такого'), set())
+
+
+class TestEstimatedCountPaginator(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create(username='Автор')
+        Note.objects.bulk_create(
+            Note(title='Заметка', text='Текст', slug=f'note-{i}',
+                 author=author)
+            for i in range(5)
+        )
+        cls.notes = Note.objects.order_by('id')
+
+    def paginator(self, queryset):
+        paginator = EstimatedCountPaginator(queryset, 2)
+        paginator.exact_limit = 3
+        return paginator
+
+    # малая выборка считается точно
+    def test_exact_below_limit(self):
+        self.assertEqual(self.paginator(self.notes[:3]).count, 3)
+        paginator = EstimatedCountPaginator(self.notes, 2)
+        self.assertEqual(paginator.count, 5)
+
+    # таблица целиком оценивается наибольшим id
+    def test_estimate_for_whole_table(self):
+        self.notes.filter(slug='note-0').delete()
+        last = self.notes.last().pk
+        paginator = self.paginator(Note.objects.order_by('id'))
+        self.assertEqual(paginator.count, last)
+        self.assertGreater(paginator.count, 4)
+
+    # отфильтрованная выборка обрезается на exact_limit + 1
+    def test_filtered_is_capped(self):
+        paginator = self.paginator(self.notes.filter(title='Заметка'))
+        self.assertEqual(paginator.count, 4)
+        self.assertEqual(len(paginator.page(2)), 2)
@@ -0,0 +1,199 @@
+import json
+from datetime import timedelta
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from notes.api import API_FIELDS
+from notes.models import ChangeSequence, Note, can_return_rows
+
+User = get_user_model()
+
+
+class TestNotesApi(TestCase):
+    URL_LIST = reverse('notes:api_list')
+    URL_CHANGES = reverse('notes:api_changes')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.notes = [
+            Note.objects.create(title=f'Заметка {index}', text='Текст',
+                                slug=f'note-{index}', author=cls.author)
+            for index in range(3)
+        ]
+        cls.other = Note.objects.create(title='Чужая', text='Текст',
+                                        slug='other',
+                                        author=User.objects.create(
+                                            username='Неавтор'))
+
+    def setUp(self):
+        self.client.force_login(self.author)
+
+    def get_json(self, url, data=None):
+        response = self.client.get(url, data)
+        if response.streaming:
+            content = b''.join(response.streaming_content)
+        else:
+            content = response.content
+        return response, json.loads(content)
+
+    # список отдаётся потоком, только заметки автора
+    def test_list(self):
+        response, data = self.get_json(self.URL_LIST)
+        self.assertTrue(response.streaming)
+        self.assertEqual([item['slug'] for item in data],
+                         [note.slug for note in self.notes])
+        self.assertEqual(set(data[0]), set(API_FIELDS))
+
+    # ?fields ограничивает и ответ, и колонки в SQL
+    def test_sparse_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            _, data = self.get_json(self.URL_LIST, {'fields': 'id,slug'})
+        self.assertEqual(data[0], {'id': self.notes[0].pk,
+                                   'slug': self.notes[0].slug})
+        sql = ' '.join(query['sql'] for query in queries)
+        self.assertIn('"notes_note"."slug"', sql)
+        self.assertNotIn('"notes_note"."text"', sql)
+
+    def test_unknown_field(self):
+        response, data = self.get_json(self.URL_LIST,
+                                       {'fields': 'id,author__password'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertIn('detail', data)
+
+    # чужая заметка не отдаётся
+    def test_detail(self):
+        url = reverse('notes:api_detail', args=(self.notes[0].slug,))
+        _, data = self.get_json(url, {'fields': 'title'})
+        self.assertEqual(data, {'title': self.notes[0].title})
+        url = reverse('notes:api_detail', args=(self.other.slug,))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_changes_since(self):
+        since = timezone.now()
+        Note.objects.filter(pk=self.notes[1].pk).update(
+            updated_at=since + timedelta(seconds=1))
+        _, data = self.get_json(self.URL_CHANGES,
+                                {'since': since.isoformat()})
+        self.assertEqual([item['id'] for item in data], [self.notes[1].pk])
+        response, _ = self.get_json(self.URL_CHANGES, {'since': 'вчера'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_anonymous(self):
+        self.client.logout()
+        for url in (self.URL_LIST, self.URL_CHANGES):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code,
+                                 HTTPStatus.UNAUTHORIZED)
+
+
+class TestNotesSync(TestCase):
+    URL_SYNC = reverse('notes:api_sync')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.first = Note.objects.create(title='Первая', text='Текст',
+                                        slug='first', author=cls.author)
+        cls.second = Note.objects.create(title='Вторая', text='Текст',
+                                         slug='second', author=cls.author)
+        Note.objects.create(title='Чужая', text='Текст', slug='other',
+                            author=User.objects.create(username='Неавтор'))
+
+    def setUp(self):
+        self.client.force_login(self.author)
+
+    def sync(self, **params):
+        return self.client.get(self.URL_SYNC, params).json()
+
+    # каждое сохранение получает номер больше предыдущих
+    def test_change_seq_grows(self):
+        seq = self.second.change_seq
+        self.assertGreater(seq, self.first.change_seq)
+        self.first.save()
+        self.assertGreater(self.first.change_seq, seq)
+
+    # после смены автора заметка у прежнего автора числится удалённой
+    def test_author_change(self):
+        cursor = self.sync()['cursor']
+        other = User.objects.get(username='Неавтор')
+        note = Note.objects.get(pk=self.first.pk)
+        note.author = other
+        note.save()
+        response = self.sync(cursor=cursor)
+        self.assertEqual(response['notes'], [])
+        self.assertEqual(response['deleted'],
+                         [{'id': self.first.pk, 'slug': 'first'}])
+        # заметка вернулась: у автора она снова изменена, а не удалена
+        cursor = response['cursor']
+        note.author = self.author
+        note.save()
+        response = self.sync()
+        self.assertIn('first', [item['slug'] for item in response['notes']])
+        self.assertEqual(response['deleted'], [])
+        self.assertEqual(
+            [item['slug'] for item in self.sync(cursor=cursor)['notes']],
+            ['first'])
+
+    # номер резервируется одним UPDATE ... RETURNING
+    def test_reserve_single_statement(self):
+        if not can_return_rows(connection):
+            self.skipTest('БД без UPDATE ... RETURNING')
+        with CaptureQueriesContext(connection) as queries:
+            ChangeSequence.reserve(DEFAULT_DB_ALIAS)
+        self.assertEqual(len(queries), 1)
+        self.assertIn('RETURNING', queries[0]['sql'])
+
+    # номера резервируются подряд и без UPDATE ... RETURNING
+    def test_reserve_without_returning(self):
+        last = ChangeSequence.reserve(DEFAULT_DB_ALIAS)
+        with mock.patch('notes.models.can_return_rows', return_value=False):
+            with CaptureQueriesContext(connection) as queries:
+                reserved = ChangeSequence.reserve(DEFAULT_DB_ALIAS, 3)
+        self.assertEqual(reserved, last + 3)
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(ChangeSequence.reserve(DEFAULT_DB_ALIAS), last + 4)
+
+    # после курсора приходят только изменения и удаления автора
+    def test_changes_after_cursor(self):
+        data = self.sync(fields='id,slug')
+        self.assertEqual(data['notes'], [
+            {'id': self.first.pk, 'slug': 'first'},
+            {'id': self.second.pk, 'slug': 'second'},
+        ])
+        self.assertEqual(data['deleted'], [])
+        cursor = data['cursor']
+        self.assertEqual(self.sync(cursor=cursor)['notes'], [])
+        self.first.title = 'Первая, исправленная'
+        self.first.save()
+        deleted_pk = self.second.pk
+        self.second.delete()
+        data = self.sync(cursor=cursor, fields='title')
+        self.assertEqual(data['notes'], [{'title': 'Первая, исправленная'}])
+        self.assertEqual(data['deleted'],
+                         [{'id': deleted_pk, 'slug': 'second'}])
+        self.assertFalse(data['has_more'])
+
+    # изменения отдаются пачками, курсор продвигается
+    def test_batches(self):
+        first = self.sync(limit=1)
+        self.assertTrue(first['has_more'])
+        self.assertEqual([note['id'] for note in first['notes']],
+                         [self.first.pk])
+        second = self.sync(limit=1, cursor=first['cursor'])
+        self.assertEqual([note['id'] for note in second['notes']],
+                         [self.second.pk])
+        self.assertFalse(second['has_more'])
+
+    def test_bad_cursor(self):
+        response = self.client.get(self.URL_SYNC, {'cursor': '-1'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
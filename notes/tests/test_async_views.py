@@ -0,0 +1,101 @@
+from http import HTTPStatus
+from urllib.parse import urlencode
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from notes.forms import WARNING
+from notes.models import Note, Tombstone
+
+User = get_user_model()
+
+
+@override_settings(ROOT_URLCONF='yanote.urls_async')
+class TestAsyncViews(TestCase):
+    NOTE_SLUG = 'note-slug'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.reader = User.objects.create(username='Читатель')
+        cls.note = Note.objects.create(title='Заголовок', text='Текст',
+                                       slug=cls.NOTE_SLUG, author=cls.author)
+        cls.form_data = {'title': 'Новый', 'text': 'Текст', 'slug': 'new'}
+
+    def setUp(self):
+        self.async_client.force_login(self.author)
+
+    def url(self, name, slug=None):
+        args = () if name in ('list', 'add') else (slug or self.NOTE_SLUG,)
+        return reverse(f'notes:{name}', args=args)
+
+    def post(self, url, data=None):
+        # multipart в AsyncClient Django 3.2 читает тело сверх его длины
+        return self.async_client.post(
+            url, urlencode(data or {}),
+            content_type='application/x-www-form-urlencoded')
+
+    async def test_pages(self):
+        for name in ('list', 'add', 'detail', 'edit', 'delete'):
+            with self.subTest(name=name):
+                response = await self.async_client.get(self.url(name))
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+        response = await self.async_client.get(self.url('detail'))
+        self.assertContains(response, self.note.title)
+
+    async def test_anonymous_redirected(self):
+        self.async_client.cookies.clear()
+        for name in ('list', 'add', 'detail', 'edit', 'delete'):
+            with self.subTest(name=name):
+                url = self.url(name)
+                response = await self.async_client.get(url)
+                self.assertRedirects(
+                    response, f'{reverse("users:login")}?next={url}',
+                    fetch_redirect_response=False)
+
+    def test_foreign_note_not_found(self):
+        self.async_client.force_login(self.reader)
+
+        async def check():
+            for name in ('detail', 'edit', 'delete'):
+                response = await self.async_client.get(self.url(name))
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+        async_to_sync(check)()
+
+    async def test_conditional_get(self):
+        for name in ('list', 'detail'):
+            with self.subTest(name=name):
+                response = await self.async_client.get(self.url(name))
+                # AsyncClient 3.2 передаёт extra как есть, именами заголовков
+                response = await self.async_client.get(
+                    self.url(name), **{'if-none-match': response['ETag']})
+                self.assertEqual(response.status_code,
+                                 HTTPStatus.NOT_MODIFIED)
+
+    async def test_create_edit_delete(self):
+        response = await self.post(self.url('add'), self.form_data)
+        self.assertRedirects(response, reverse('notes:success'),
+                             fetch_redirect_response=False)
+        response = await self.post(
+            self.url('edit'), {**self.form_data, 'slug': self.NOTE_SLUG})
+        self.assertRedirects(response, reverse('notes:success'),
+                             fetch_redirect_response=False)
+        response = await self.post(self.url('delete', 'new'))
+        self.assertRedirects(response, reverse('notes:success'),
+                             fetch_redirect_response=False)
+        await sync_to_async(self.check_changes_saved)()
+
+    def check_changes_saved(self):
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.title, self.form_data['title'])
+        self.assertFalse(Note.objects.filter(slug='new').exists())
+        self.assertTrue(Tombstone.objects.filter(slug='new').exists())
+
+    async def test_slug_taken(self):
+        data = {**self.form_data, 'slug': self.NOTE_SLUG}
+        response = await self.post(self.url('add'), data)
+        self.assertFormError(response, 'form', 'slug',
+                             errors=self.NOTE_SLUG + WARNING)
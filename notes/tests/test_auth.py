@@ -0,0 +1,178 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import forms as auth_forms, get_user_model
+from django.contrib.auth.hashers import get_hasher
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes.auth import user_key
+from notes.checks import CACHED_AUTH_MIDDLEWARE, check_shared_cache
+from notes.models import Note
+
+User = get_user_model()
+
+AUTH_MIDDLEWARE = 'django.contrib.auth.middleware.AuthenticationMiddleware'
+SHARED_CACHE_SETTINGS = {
+    'MIDDLEWARE': [CACHED_AUTH_MIDDLEWARE if name == AUTH_MIDDLEWARE
+                   else name for name in settings.MIDDLEWARE],
+    'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+}
+
+
+# как при NOTES_SHARED_CACHE = True; общий кеш в тестах заменяет locmem
+@override_settings(**SHARED_CACHE_SETTINGS)
+class TestCachedAuth(TestCase):
+    URL_LIST = reverse('notes:list')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Автор',
+                                              password='пароль-123')
+        cls.note = Note.objects.create(title='Заголовок', text='Текст',
+                                       slug='note-slug', author=cls.author)
+        cls.url_detail = reverse('notes:detail', args=(cls.note.slug,))
+
+    def setUp(self):
+        cache.clear()
+        self.client.login(username='Автор', password='пароль-123')
+        # первый запрос кладёт сессию и пользователя в кеш
+        self.client.get(self.URL_LIST)
+
+    # сессия и пользователь берутся из кеша: список — только запрос
+    # ETag (FROM auth_user с подзапросами к заметкам), страница заметки —
+    # Last-Modified и сама заметка
+    def test_only_note_queries(self):
+        for url, count in ((self.URL_LIST, 1), (self.url_detail, 2)):
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    with self.assertNumQueries(count):
+                        response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                for query in queries:
+                    self.assertNotIn('django_session', query['sql'])
+                    self.assertNotIn('"auth_user"."password"', query['sql'])
+
+    def test_logout_forgets_user(self):
+        self.assertIsNotNone(cache.get(user_key(self.author.pk)))
+        self.client.post(reverse('users:logout'))
+        self.assertIsNone(cache.get(user_key(self.author.pk)))
+
+    # после смены пароля старая сессия больше не действует
+    def test_password_change_ends_session(self):
+        self.author.set_password('новый-пароль-456')
+        self.author.save()
+        self.assertIsNone(cache.get(user_key(self.author.pk)))
+        response = self.client.get(self.URL_LIST)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertTrue(response.url.startswith(reverse('users:login')))
+
+
+@override_settings(AUTH_THROTTLE_RATES={'ip': (5, 60), 'username': (3, 60)})
+class TestAuthThrottle(TestCase):
+    URL_LOGIN = reverse('users:login')
+    URL_SIGNUP = reverse('users:signup')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Автор',
+                                              password='пароль-123')
+
+    def setUp(self):
+        cache.clear()
+
+    def login(self, username='Автор', ip='10.0.0.1'):
+        return self.client.post(
+            self.URL_LOGIN, {'username': username, 'password': 'неверный'},
+            REMOTE_ADDR=ip)
+
+    # сверх лимита на имя пароль уже не проверяется
+    def test_username_limit(self):
+        with mock.patch.object(auth_forms, 'authenticate',
+                               wraps=auth_forms.authenticate) as authenticate:
+            for number in range(3):
+                response = self.login(ip=f'10.0.0.{number}')
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+            response = self.login(ip='10.0.0.9')
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(authenticate.call_count, 3)
+        # имя сравнивается без учёта регистра, другие имена не задеты
+        self.assertEqual(
+            self.login(username='АВТОР', ip='10.0.0.8').status_code,
+            HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertEqual(self.login(username='Другой').status_code,
+                         HTTPStatus.OK)
+
+    # лимит на IP общий для всех имён
+    def test_ip_limit(self):
+        for number in range(5):
+            self.login(username=f'user-{number}')
+        self.assertEqual(self.login(username='user-9').status_code,
+                         HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertEqual(self.login(ip='10.0.0.2').status_code,
+                         HTTPStatus.OK)
+
+    # регистрация ограничивается так же, до создания пользователя
+    def test_signup_limit(self):
+        for number in range(6):
+            response = self.client.post(self.URL_SIGNUP, {
+                'username': f'new-{number}',
+                'password1': 'пароль-123-456',
+                'password2': 'пароль-123-456',
+            }, REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertFalse(User.objects.filter(username='new-5').exists())
+
+    # страницы входа GET не ограничиваются
+    def test_get_not_throttled(self):
+        for _ in range(6):
+            self.login()
+        response = self.client.get(self.URL_LOGIN)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    @override_settings(AUTH_THROTTLE_RATES={'ip': None, 'username': None})
+    def test_disabled(self):
+        for _ in range(6):
+            self.assertEqual(self.login().status_code, HTTPStatus.OK)
+
+
+class TestPasswordHashers(TestCase):
+
+    # тесты хешируют пароли профилем TEST_PASSWORD_HASHER_PROFILE
+    def test_fast_profile_in_tests(self):
+        profile = settings.PASSWORD_HASHER_PROFILES[
+            settings.TEST_PASSWORD_HASHER_PROFILE]
+        self.assertEqual(settings.PASSWORD_HASHERS, profile)
+        self.assertEqual(get_hasher().algorithm, 'md5')
+
+
+class TestSharedCacheCheck(SimpleTestCase):
+    # файловый кеш общий для процессов одного сервера
+    FILE_CACHE = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': '/tmp/yanote-cache',
+    }}
+
+    def error_ids(self):
+        return [error.id for error in check_shared_cache(None)]
+
+    # по умолчанию сессии и пользователь читаются из БД
+    def test_default_settings(self):
+        self.assertEqual(settings.SESSION_ENGINE,
+                         'django.contrib.sessions.backends.db')
+        self.assertIn(AUTH_MIDDLEWARE, settings.MIDDLEWARE)
+        self.assertEqual(self.error_ids(), [])
+
+    # кеш одного процесса не годится для сессий и пользователя
+    @override_settings(**SHARED_CACHE_SETTINGS)
+    def test_local_cache(self):
+        self.assertEqual(self.error_ids(), ['notes.E001', 'notes.E002'])
+
+    @override_settings(**SHARED_CACHE_SETTINGS, CACHES=FILE_CACHE)
+    def test_shared_cache(self):
+        self.assertEqual(self.error_ids(), [])
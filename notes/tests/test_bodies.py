@@ -0,0 +1,159 @@
+import sqlite3
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from notes import bulk, search
+from notes.bodies import iter_text, pack
+from notes.models import Note, NoteBody
+from notes.search import search_notes
+
+User = get_user_model()
+
+LARGE_TEXT = 'Большой <текст> ' * 20
+
+
+@override_settings(NOTES_BODY_COMPRESS_THRESHOLD=100)
+class TestNoteBodies(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.note = Note.objects.create(title='Заметка', text=LARGE_TEXT,
+                                       slug='large', author=cls.author)
+
+    def setUp(self):
+        self.client.force_login(self.author)
+
+    def stored_text(self):
+        return Note.objects.values_list('text', flat=True).get(slug='large')
+
+    def search(self, query):
+        return [note.slug for note in
+                search_notes(self.author, query, 1, 10)[0]]
+
+    # большой текст хранится сжатым, колонка text пуста
+    def test_large_text_compressed(self):
+        note = Note.objects.get(slug='large')
+        self.assertTrue(note.body_compressed)
+        self.assertEqual(self.stored_text(), '')
+        self.assertTrue(NoteBody.objects.filter(note=note).exists())
+        self.assertEqual(note.text, LARGE_TEXT)
+        self.assertEqual(note.text_length, len(LARGE_TEXT))
+
+    # bulk_create тоже сжимает большие тексты
+    def test_bulk_create_compresses(self):
+        Note.objects.bulk_create([Note(title='Пачка', text=LARGE_TEXT,
+                                       slug='bulk', author=self.author)])
+        note = Note.objects.get(slug='bulk')
+        self.assertTrue(note.body_compressed)
+        self.assertEqual(note.text, LARGE_TEXT)
+
+    # страница заметки отдаёт сжатый текст потоком
+    def test_detail_streams_text(self):
+        response = self.client.get(reverse('notes:detail', args=('large',)))
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        self.assertIn('Большой &lt;текст&gt; ' * 20, content)
+        self.assertIn(reverse('notes:edit', args=('large',)), content)
+
+    # форма правки показывает полный текст
+    def test_edit_form_has_text(self):
+        response = self.client.get(reverse('notes:edit', args=('large',)))
+        self.assertEqual(response.context['form'].initial['text'],
+                         LARGE_TEXT)
+
+    # поиск находит слова сжатого текста и следит за правками
+    def test_search_follows_compressed_text(self):
+        self.assertEqual(self.search('большой'), ['large'])
+        self.note.text = 'Короткий'
+        self.note.save()
+        self.assertFalse(NoteBody.objects.exists())
+        self.assertEqual(self.stored_text(), 'Короткий')
+        self.assertEqual(self.search('большой'), [])
+        self.assertEqual(self.search('короткий'), ['large'])
+        self.note.text = 'Снова длинный ' * 20
+        self.note.save()
+        self.assertEqual(self.search('короткий'), [])
+        self.assertEqual(self.search('длинный'), ['large'])
+        self.note.delete()
+        self.assertEqual(self.search('длинный'), [])
+
+    # смена только заголовка не трогает сжатый текст
+    def test_title_update_keeps_body(self):
+        note = Note.objects.get(slug='large')
+        note.title = 'Новый заголовок'
+        note.save(update_fields=['title'])
+        self.assertEqual(Note.objects.get(slug='large').text, LARGE_TEXT)
+        self.assertEqual(self.search('заголовок большой'), ['large'])
+
+    # массовая правка заголовка и удаление сжатых заметок не оставляют
+    # в индексе старых записей
+    def test_bulk_actions_keep_index(self):
+        if not search.is_supported(connection):
+            self.skipTest('индекс FTS5 есть только в SQLite')
+        bulk.update_notes(self.author, {'title': 'Переименована'},
+                          slugs=['large'])
+        self.assertEqual(self.indexed('заметка'), [])
+        self.assertEqual(self.indexed('переименована большой'),
+                         [self.note.pk])
+        bulk.delete_notes(self.author, slugs=['large'])
+        self.assertEqual(self.indexed('большой'), [])
+
+    # rebuild индексирует сжатые тексты без функций SQL
+    def test_rebuild_indexes_bodies(self):
+        if not search.is_supported(connection):
+            self.skipTest('индекс FTS5 есть только в SQLite')
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.indexed('большой'), [self.note.pk])
+        self.assertEqual(self.search('большой'), ['large'])
+
+    def indexed(self, query):
+        """Значения rowid индекса под query, без соединения с notes_note."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {search.FTS_TABLE} '
+                f'WHERE {search.FTS_TABLE} MATCH %s',
+                [search.match_expression(query)])
+            return [pk for pk, in cursor.fetchall()]
+
+    # потоковая распаковка не рвёт многобайтовые символы
+    def test_iter_text_chunks(self):
+        data = pack(LARGE_TEXT)
+        self.assertEqual(''.join(iter_text(data, chunk_size=3)), LARGE_TEXT)
+
+
+class TestSearchTriggersPlainSqlite(SimpleTestCase):
+    """Триггеры работают в любом клиенте SQLite, без функций Django."""
+
+    def setUp(self):
+        self.db = sqlite3.connect(':memory:')
+        self.addCleanup(self.db.close)
+        self.db.execute(
+            'CREATE TABLE notes_note (id INTEGER PRIMARY KEY, title TEXT, '
+            'text TEXT, author_id INTEGER, body_compressed BOOL)')
+        self.db.execute(search.FTS_SCHEMA)
+        for trigger in search.triggers():
+            self.db.execute(trigger)
+
+    def matches(self, word):
+        return [pk for pk, in self.db.execute(
+            f'SELECT rowid FROM {search.FTS_TABLE} '
+            f'WHERE {search.FTS_TABLE} MATCH ?', [word])]
+
+    # вставка, правка и удаление из sqlite3 обновляют индекс
+    def test_plain_writes(self):
+        self.db.execute("INSERT INTO notes_note VALUES (1, 'Хлеб', 'сыр', "
+                        "1, 0)")
+        self.db.execute("INSERT INTO notes_note VALUES (2, 'Молоко', '', "
+                        "1, 1)")
+        self.assertEqual(self.matches('сыр'), [1])
+        self.db.execute("UPDATE notes_note SET title = 'Масло'")
+        self.assertEqual(self.matches('хлеб'), [])
+        self.assertEqual(self.matches('масло'), [1])
+        self.db.execute('DELETE FROM notes_note')
+        self.assertEqual(self.matches('масло'), [])
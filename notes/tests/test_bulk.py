@@ -0,0 +1,148 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes import bulk
+from notes.models import Note, NoteBody, Tombstone
+from notes.search import search_notes
+
+User = get_user_model()
+
+
+class TestBulkActions(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.other = User.objects.create(username='Другой')
+        Note.objects.bulk_create(
+            Note(title=f'Заметка {i}', text='Текст', slug=f'note-{i}',
+                 author=cls.author)
+            for i in range(10)
+        )
+        cls.foreign = Note.objects.create(
+            title='Чужая', text='Текст', slug='foreign', author=cls.other)
+        cls.ids = list(Note.objects.filter(author=cls.author).order_by(
+            'id').values_list('id', flat=True))
+        cls.url = reverse('notes:bulk')
+
+    def setUp(self):
+        self.client.force_login(self.author)
+
+    def remaining(self):
+        return Note.objects.filter(author=self.author).count()
+
+    # отмеченные заметки удаляются, остальные остаются
+    def test_delete(self):
+        response = self.client.post(
+            self.url, {'action': 'delete', 'ids': self.ids[:3]})
+        self.assertRedirects(response, reverse('notes:success'))
+        self.assertEqual(self.remaining(), 7)
+        self.assertFalse(Note.objects.filter(id__in=self.ids[:3]).exists())
+        self.assertTrue(Note.objects.filter(slug='foreign').exists())
+
+    # удаление по slug, id через запятую одним полем
+    def test_delete_by_slugs_and_comma_ids(self):
+        self.client.post(self.url, {
+            'action': 'delete',
+            'slugs': ['note-0', 'note-1'],
+            'ids': ','.join(map(str, self.ids[5:])),
+        })
+        self.assertEqual(
+            list(Note.objects.filter(author=self.author).values_list(
+                'slug', flat=True).order_by('id')),
+            ['note-2', 'note-3', 'note-4'],
+        )
+
+    # чужая заметка среди отмеченных: 404 и ничего не удалено
+    def test_foreign_note(self):
+        response = self.client.post(self.url, {
+            'action': 'delete', 'ids': [self.ids[0], self.foreign.id]})
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertEqual(self.remaining(), 10)
+        self.assertFalse(Tombstone.objects.exists())
+
+    # следы удаления получают разные номера изменений после текущих
+    def test_tombstones(self):
+        last_seq = max(Note.objects.values_list('change_seq', flat=True))
+        bulk.delete_notes(self.author, ids=self.ids[:4])
+        tombstones = Tombstone.objects.order_by('note_id')
+        self.assertEqual([t.note_id for t in tombstones], self.ids[:4])
+        seqs = [t.change_seq for t in tombstones]
+        self.assertEqual(len(set(seqs)), 4)
+        self.assertGreater(min(seqs), last_seq)
+
+    # список после удаления рисуется заново, а не из кеша
+    def test_list_cache_invalidated(self):
+        list_url = reverse('notes:list')
+        self.client.get(list_url)
+        self.client.post(self.url, {'action': 'delete', 'ids': self.ids})
+        response = self.client.get(list_url)
+        self.assertNotContains(response, 'Заметка 0')
+
+    # массовая смена заголовка: свои номера изменений и индекс поиска
+    def test_set_title(self):
+        self.client.post(self.url, {
+            'action': 'title', 'title': 'Архив', 'ids': self.ids[:3]})
+        notes = Note.objects.filter(id__in=self.ids[:3])
+        self.assertEqual({note.title for note in notes}, {'Архив'})
+        self.assertEqual(
+            len({note.change_seq for note in notes}), 3)
+        found = search_notes(self.author, 'Архив', 1, 10)[0]
+        self.assertEqual(sorted(note.id for note in found), self.ids[:3])
+
+    # менять можно только поля из EDITABLE_FIELDS
+    def test_update_unknown_field(self):
+        with self.assertRaises(ValueError):
+            bulk.update_notes(self.author, {'text': ''}, ids=self.ids)
+
+    # тысячи ссылок делятся на пачки под лимит параметров SQL
+    def test_chunks(self):
+        with mock.patch('notes.bulk.max_query_params', return_value=4), \
+                CaptureQueriesContext(connection) as queries:
+            bulk.delete_notes(self.author, ids=self.ids)
+        deletes = [query['sql'] for query in queries
+                   if query['sql'].startswith('DELETE FROM "notes_note"')]
+        self.assertEqual(len(deletes), 3)
+        self.assertEqual(self.remaining(), 0)
+
+    # без отмеченных заметок или заголовка форма возвращает ошибку
+    def test_invalid_form(self):
+        response = self.client.post(self.url, {'action': 'delete'})
+        self.assertContains(response, 'Отметьте хотя бы одну заметку.')
+        response = self.client.post(
+            self.url, {'action': 'title', 'ids': self.ids[:1]})
+        self.assertContains(response, 'Укажите новый заголовок.')
+        self.assertEqual(self.remaining(), 10)
+
+    # только POST
+    def test_get_not_allowed(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, HTTPStatus.METHOD_NOT_ALLOWED)
+
+    # анонимного пользователя отправляют на вход
+    def test_anonymous(self):
+        self.client.logout()
+        response = self.client.post(
+            self.url, {'action': 'delete', 'ids': self.ids})
+        self.assertRedirects(
+            response, f'{reverse("users:login")}?next={self.url}')
+        self.assertEqual(self.remaining(), 10)
+
+
+@override_settings(NOTES_BODY_COMPRESS_THRESHOLD=100)
+class TestBulkDeleteBodies(TestCase):
+
+    # вместе со сжатой заметкой удаляется её NoteBody
+    def test_compressed_body_deleted(self):
+        author = User.objects.create(username='Автор')
+        note = Note.objects.create(
+            title='Большая', text='текст ' * 50, slug='large', author=author)
+        bulk.delete_notes(author, slugs=['large'])
+        self.assertFalse(NoteBody.objects.filter(note_id=note.id).exists())
+        self.assertEqual(search_notes(author, 'текст', 1, 10)[0], [])
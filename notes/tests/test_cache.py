@@ -0,0 +1,121 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes.cache import stats
+from notes.models import Note
+
+User = get_user_model()
+
+
+class TestNotesListCache(TestCase):
+    URL_NOTES_LIST = reverse('notes:list')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        cls.note = Note.objects.create(title='Заголовок',
+                                       text='Текст',
+                                       slug='note-slug',
+                                       author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        stats.reset()
+
+    def get_list(self):
+        return self.author_client.get(self.URL_NOTES_LIST).content.decode()
+
+    # повторный запрос списка берётся из кеша без выборки заметок
+    def test_second_request_is_cache_hit(self):
+        self.get_list()
+        with CaptureQueriesContext(connection) as queries:
+            content = self.get_list()
+        self.assertIn(self.note.title, content)
+        self.assertEqual((stats.hits, stats.misses), (1, 1))
+        self.assertFalse([query for query in queries
+                          if '"notes_note"."title"' in query['sql']])
+
+    # кеш у каждого автора свой
+    def test_cache_is_per_author(self):
+        self.get_list()
+        other = User.objects.create(username='Неавтор')
+        self.client.force_login(other)
+        content = self.client.get(self.URL_NOTES_LIST).content.decode()
+        self.assertNotIn(self.note.title, content)
+
+    # после создания заметки список не устаревает
+    def test_create_invalidates(self):
+        self.get_list()
+        self.author_client.post(reverse('notes:add'), data={
+            'title': 'Свежая заметка', 'text': 'Текст', 'slug': 'new'})
+        self.assertIn('Свежая заметка', self.get_list())
+
+    # после редактирования заметки список не устаревает
+    def test_edit_invalidates(self):
+        self.get_list()
+        self.author_client.post(
+            reverse('notes:edit', args=(self.note.slug,)),
+            data={'title': 'Новый заголовок', 'text': 'Текст',
+                  'slug': self.note.slug})
+        content = self.get_list()
+        self.assertIn('Новый заголовок', content)
+        self.assertNotIn('> Заголовок</a>', content)
+
+    # после удаления заметки список не устаревает
+    def test_delete_invalidates(self):
+        self.get_list()
+        self.author_client.post(
+            reverse('notes:delete', args=(self.note.slug,)))
+        self.assertNotIn(self.note.slug, self.get_list())
+
+    # после смены автора заметки устаревают списки обоих авторов
+    def test_author_change_invalidates_both(self):
+        other = User.objects.create(username='Новый автор')
+        other_client = Client()
+        other_client.force_login(other)
+        self.get_list()
+        other_client.get(self.URL_NOTES_LIST)
+        note = Note.objects.get(pk=self.note.pk)
+        note.author = other
+        note.save()
+        self.assertNotIn(self.note.slug, self.get_list())
+        self.assertIn(self.note.slug, other_client.get(
+            self.URL_NOTES_LIST).content.decode())
+
+
+class TestHeaderCache(TestCase):
+    URL_HOME = reverse('notes:home')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+
+    def setUp(self):
+        cache.clear()
+
+    def get_home(self):
+        return self.client.get(self.URL_HOME).content.decode()
+
+    # шапка своя у анонима и у каждого пользователя
+    def test_header_per_auth_state(self):
+        self.assertIn(reverse('users:signup'), self.get_home())
+        self.client.force_login(self.author)
+        content = self.get_home()
+        self.assertIn(self.author.username, content)
+        self.assertNotIn(reverse('users:signup'), content)
+        self.client.logout()
+        self.assertNotIn(self.author.username, self.get_home())
+
+    # смена имени не оставляет в шапке старое
+    def test_rename_changes_header(self):
+        self.client.force_login(self.author)
+        self.get_home()
+        self.author.username = 'Переименованный'
+        self.author.save()
+        self.assertIn('Переименованный', self.get_home())
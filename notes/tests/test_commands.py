@@ -0,0 +1,184 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from pytils.translit import slugify
+
+from notes.models import Note
+from notes.search import search_notes
+
+User = get_user_model()
+
+
+class TestImportExport(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.note = Note.objects.create(title='Заголовок',
+                                       text='Текст',
+                                       slug='note-slug',
+                                       author=cls.author)
+        cls.reader = User.objects.create(username='Читатель')
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / 'notes.jsonl'
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_lines(self, records):
+        self.path.write_text(
+            ''.join(json.dumps(record, ensure_ascii=False) + '\n'
+                    for record in records),
+            encoding='utf-8',
+        )
+
+    def import_notes(self, *args):
+        call_command('import_notes', str(self.path), *args, stdout=StringIO())
+
+    # выгрузка - по одной заметке на строку
+    def test_export(self):
+        out = StringIO()
+        call_command('export_notes', stdout=out, stderr=StringIO())
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(records, [{'title': 'Заголовок', 'text': 'Текст',
+                                    'slug': 'note-slug', 'author': 'Автор'}])
+
+    # новые заметки создаются пачками с уникальными slug
+    def test_import_deduplicates_slugs(self):
+        title = 'Заголовок'
+        self.write_lines(
+            [{'title': title, 'text': f'Текст {index}'} for index in range(5)]
+            + [{'title': 'Явный', 'text': 'Текст', 'slug': 'note-slug'}]
+        )
+        self.import_notes('--author', 'Читатель', '--batch-size', '2')
+        slugs = set(Note.objects.filter(
+            author=self.reader).values_list('slug', flat=True))
+        base = slugify(title)
+        self.assertEqual(slugs, {
+            base, f'{base}-2', f'{base}-3', f'{base}-4', f'{base}-5',
+            'note-slug-2',
+        })
+
+    # base пачки совпадает со slug с суффиксом, выданным раньше в ней же
+    def test_import_base_matches_assigned_suffix(self):
+        self.write_lines([
+            {'title': 'Первая', 'text': 'Текст', 'slug': 'note-slug'},
+            {'title': 'Вторая', 'text': 'Текст', 'slug': 'note-slug-2'},
+        ])
+        self.import_notes('--author', 'Читатель')
+        slugs = dict(Note.objects.filter(
+            author=self.reader).values_list('title', 'slug'))
+        self.assertEqual(slugs, {'Первая': 'note-slug-2',
+                                 'Вторая': 'note-slug-2-2'})
+
+    # выгрузка и загрузка сохраняют поля заметок
+    def test_roundtrip(self):
+        call_command('export_notes', '--output', str(self.path),
+                     stderr=StringIO())
+        Note.objects.all().delete()
+        self.import_notes()
+        note = Note.objects.get()
+        for attr_name in ['title', 'text', 'slug', 'author']:
+            self.assertEqual(getattr(note, attr_name),
+                             getattr(self.note, attr_name))
+
+    # сжатый текст большой заметки выгружается и загружается целиком
+    @override_settings(NOTES_BODY_COMPRESS_THRESHOLD=100)
+    def test_roundtrip_compressed(self):
+        text = 'Большой текст заметки. ' * 50
+        Note.objects.create(title='Большая', text=text, slug='large',
+                            author=self.author)
+        call_command('export_notes', '--output', str(self.path),
+                     stderr=StringIO())
+        records = [json.loads(line) for line in
+                   self.path.read_text(encoding='utf-8').splitlines()]
+        self.assertEqual(records[-1]['text'], text)
+        Note.objects.all().delete()
+        self.import_notes()
+        note = Note.objects.get(slug='large')
+        self.assertTrue(note.body_compressed)
+        self.assertEqual(note.text, text)
+
+    # --bulk: индекс поиска перестроен один раз, триггеры возвращены
+    def test_import_bulk(self):
+        self.write_lines([{'title': f'Импорт {index}', 'text': 'Текст'}
+                          for index in range(3)])
+        self.import_notes('--author', 'Читатель', '--bulk')
+        found, _ = search_notes(self.reader, 'Импорт', 1, 10)
+        self.assertEqual(len(found), 3)
+        Note.objects.create(title='Свежая', text='Текст', slug='fresh',
+                            author=self.reader)
+        self.assertEqual(
+            [n.slug for n in search_notes(self.reader, 'Свежая', 1, 10)[0]],
+            ['fresh'])
+
+    # неизвестный автор - ошибка, ничего не импортируется
+    def test_unknown_author(self):
+        self.write_lines([{'title': 'А', 'text': 'Б', 'author': 'Никто'}])
+        with self.assertRaises(CommandError):
+            self.import_notes()
+        self.assertEqual(Note.objects.count(), 1)
+
+
+class TestSeedNotes(TestCase):
+    OPTIONS = ('--users', '5', '--notes', '300', '--titles', '20',
+               '--batch-size', '120', '--seed', '7')
+
+    def seed(self, *args):
+        call_command('seed_notes', *self.OPTIONS, *args, stdout=StringIO())
+
+    def corpus(self):
+        return list(Note.objects.order_by('id').values_list(
+            'author__username', 'title', 'slug', 'text'))
+
+    # один и тот же --seed даёт одни и те же данные
+    def test_deterministic(self):
+        self.seed()
+        first = self.corpus()
+        Note.objects.all().delete()
+        User.objects.all().delete()
+        self.seed()
+        self.assertEqual(self.corpus(), first)
+        self.seed('--seed', '8', '--user-prefix', 'other-')
+        self.assertNotEqual(self.corpus()[300:], first)
+
+    # заметки по пользователям распределены неравномерно (Zipf)
+    def test_zipf_distribution(self):
+        self.seed()
+        counts = [Note.objects.filter(
+            author__username=f'seed-{index}').count() for index in range(5)]
+        self.assertEqual(sum(counts), 300)
+        self.assertGreater(counts[0], counts[4] * 2)
+
+    # повторяющиеся заголовки получают slug с суффиксами
+    def test_titles_and_slugs(self):
+        self.seed()
+        titles = set(Note.objects.values_list('title', flat=True))
+        self.assertLessEqual(len(titles), 20)
+        self.assertTrue(any(title.isascii() for title in titles))
+        self.assertTrue(any(not title.isascii() for title in titles))
+        slugs = list(Note.objects.values_list('slug', flat=True))
+        self.assertEqual(len(set(slugs)), 300)
+        self.assertTrue(any(slug.endswith('-2') for slug in slugs))
+        seqs = list(Note.objects.values_list('change_seq', flat=True))
+        self.assertEqual(len(set(seqs)), 300)
+
+    # индекс поиска перестроен и триггеры возвращены
+    def test_search_index(self):
+        self.seed()
+        note = Note.objects.order_by('id').first()
+        word = note.title.split()[0]
+        found, _ = search_notes(note.author, word, 1, 300)
+        self.assertIn(note, found)
+        Note.objects.create(title='Свежая', text='Текст', slug='fresh',
+                            author=note.author)
+        self.assertEqual(
+            [n.slug for n in search_notes(note.author, 'Свежая', 1, 10)[0]],
+            ['fresh'])
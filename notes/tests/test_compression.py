@@ -0,0 +1,159 @@
+import gzip
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from notes.middleware import IMMUTABLE_CACHE_CONTROL
+from notes.storage import MIN_COMPRESS_SIZE
+from notes.tests.fixtures import NotesFixtures
+
+
+@override_settings(NOTES_GZIP_HTML=True)
+class TestHtmlCompression(NotesFixtures, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.note.text = 'Длинный текст заметки. ' * 200
+        cls.note.save()
+        cls.url = reverse('notes:detail', args=(cls.note.slug,))
+
+    def get(self, url, **headers):
+        response = self.author_client.get(url, **headers)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return response
+
+    # с Accept-Encoding: gzip страница сжата, содержимое то же
+    def test_page_compressed(self):
+        plain = self.get(self.url)
+        compressed = self.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', compressed['Vary'])
+        self.assertLess(len(compressed.content), len(plain.content))
+        self.assertEqual(
+            gzip.decompress(compressed.content).decode(),
+            plain.content.decode().replace(
+                str(plain.context['csrf_token']),
+                str(compressed.context['csrf_token'])))
+
+    # страницы меньше порога и не-HTML ответы не сжимаются
+    def test_threshold_and_content_type(self):
+        with override_settings(NOTES_GZIP_MIN_LENGTH=10 ** 6):
+            response = self.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+        response = self.get(reverse('notes:api_list'),
+                            HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+
+    # страницы вне NOTES_GZIP_VIEWS не сжимаются: поиск повторяет ?q=
+    def test_only_listed_views(self):
+        self.assertEqual(
+            self.get(reverse('notes:list'),
+                     HTTP_ACCEPT_ENCODING='gzip')['Content-Encoding'],
+            'gzip')
+        urls = {
+            'notes:search': reverse('notes:search') + '?q=' + 'текст ' * 300,
+            'notes:add': reverse('notes:add'),
+        }
+        for name, url in urls.items():
+            with self.subTest(name=name):
+                response = self.get(url, HTTP_ACCEPT_ENCODING='gzip')
+                self.assertGreater(len(response.content), 1024)
+                self.assertNotIn('Content-Encoding', response)
+        response = Client().get(reverse('users:login'),
+                                HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+
+    # сжатие выключается настройкой
+    @override_settings(NOTES_GZIP_HTML=False)
+    def test_disabled(self):
+        response = self.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+
+    # слабый ETag сжатого ответа по-прежнему даёт 304
+    def test_etag_of_compressed_page(self):
+        etag = self.get(self.url, HTTP_ACCEPT_ENCODING='gzip')['ETag']
+        self.assertTrue(etag.startswith('W/'))
+        response = self.author_client.get(
+            self.url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+
+class TestStaticFiles(TestCase):
+    NAME = 'admin/css/base.css'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, cls.root)
+        settings_override = override_settings(STATIC_ROOT=cls.root)
+        settings_override.enable()
+        cls.addClassCleanup(settings_override.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        from django.contrib.staticfiles.storage import staticfiles_storage
+        cls.storage = staticfiles_storage
+        cls.hashed = staticfiles_storage.stored_name(cls.NAME)
+
+    def get(self, name, **headers):
+        return Client().get('/static/' + name, **headers)
+
+    # имя с хешем содержимого и сжатая копия рядом
+    def test_collected(self):
+        self.assertNotEqual(self.hashed, self.NAME)
+        self.assertTrue(self.storage.exists(self.hashed + '.gz'))
+        with self.storage.open(self.hashed) as original, \
+                self.storage.open(self.hashed + '.gz') as compressed:
+            self.assertEqual(gzip.decompress(compressed.read()),
+                             original.read())
+        small = [name for name in self.storage.hashed_files.values()
+                 if self.storage.size(name) < MIN_COMPRESS_SIZE]
+        for name in small:
+            self.assertFalse(self.storage.exists(name + '.gz'))
+
+    # файл с хешем кешируется на год, сжатый — клиентам с gzip
+    def test_hashed_file_served(self):
+        response = self.get(self.hashed, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        with self.storage.open(self.hashed + '.gz') as compressed:
+            self.assertEqual(b''.join(response.streaming_content),
+                             compressed.read())
+
+    # без gzip отдаётся исходный файл, без хеша — короткий кеш
+    def test_plain_and_unhashed(self):
+        response = self.get(self.hashed)
+        self.assertNotIn('Content-Encoding', response)
+        with self.storage.open(self.hashed) as original:
+            self.assertEqual(b''.join(response.streaming_content),
+                             original.read())
+        response = self.get(self.NAME)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotEqual(response['Cache-Control'],
+                            IMMUTABLE_CACHE_CONTROL)
+
+    # повторный запрос с If-Modified-Since получает 304
+    def test_not_modified(self):
+        last_modified = self.get(self.hashed)['Last-Modified']
+        response = self.get(self.hashed, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    # вне STATIC_ROOT и несуществующие файлы — 404
+    def test_not_found(self):
+        for name in ('missing.css', '../manage.py', 'admin/'):
+            with self.subTest(name=name):
+                self.assertEqual(self.get(name).status_code,
+                                 HTTPStatus.NOT_FOUND)
+
+    # ссылки {% static %} ведут на имена с хешем
+    def test_static_url(self):
+        response = Client().get(reverse('admin:login'))
+        self.assertContains(response, '/static/' + self.hashed)
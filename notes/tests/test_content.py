@@ -1,38 +1,31 @@
 # тестирование контента
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from notes.models import Note
+from notes.models import EXCERPT_LENGTH, Note
 from notes.forms import NoteForm
+from notes.tests.fixtures import NotesFixtures, logged_in_client
 
 User = get_user_model()
 
 
-class TestContent(TestCase):
-
-    # создаём контент для проверок
-    @classmethod
-    def setUpTestData(cls):
-        cls.author = User.objects.create(username='Автор')
-        cls.note = Note.objects.create(title='Заголовок',
-                                       text='Текст',
-                                       slug='note-slug',
-                                       author=cls.author)
-        cls.notauthor = User.objects.create(username='Неавтор')
+class TestContent(NotesFixtures, TestCase):
 
     # заметка автора на странице со списком заметок в списке object_list
     # неавтор её не увидит
     def test_notes_list(self):
         url_name = 'notes:list'
-        users = (self.author, self.notauthor)
+        clients = (self.author_client, self.notauthor_client)
         expected_results = (True, False)
-        for user, expected_result in zip(users, expected_results):
+        for client, expected_result in zip(clients, expected_results):
             with self.subTest(name=url_name):
                 url = reverse(url_name)
                 # Выполняем запрос
-                self.client.force_login(user)
-                response = self.client.get(url)
+                response = client.get(url)
                 object_list = response.context['object_list']
                 # Проверяем истинность утверждения "заметка есть в списке":
                 self.assertEqual(self.note in object_list, expected_result)
@@ -45,9 +38,117 @@ class TestContent(TestCase):
         for url_name, kwargs in urls:
             url = reverse(url_name, kwargs=kwargs)
             # Запрашиваем нужную страницу:
-            self.client.force_login(self.author)
-            response = self.client.get(url)
+            response = self.author_client.get(url)
             # Проверяем, есть ли объект формы в словаре контекста:
             assert 'form' in response.context
             # Проверяем, что объект формы относится к нужному классу.
             assert isinstance(response.context['form'], NoteForm)
+
+
+@override_settings(NOTES_PAGE_SIZE=2)
+class TestNotesPagination(TestCase):
+    URL_NOTES_LIST = reverse('notes:list')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.notes = [
+            Note.objects.create(title=f'Заметка {index}',
+                                text='Текст',
+                                slug=f'note-{index}',
+                                author=cls.author)
+            for index in range(5)
+        ]
+        # чужие заметки не должны попадать на страницы автора
+        other = User.objects.create(username='Неавтор')
+        Note.objects.create(title='Чужая', text='Текст', slug='other',
+                            author=other)
+        cls.author_client = logged_in_client(cls.author)
+
+    def setUp(self):
+        # страницы не должны браться из кеша списка предыдущего теста
+        cache.clear()
+
+    def get_page(self, **params):
+        response = self.author_client.get(self.URL_NOTES_LIST, params)
+        return response.context['page_obj']
+
+    # по курсорам "вперёд" проходим все заметки автора по порядку
+    def test_next_cursor_walks_all_notes(self):
+        seen = []
+        params = {}
+        while True:
+            page = self.get_page(**params)
+            seen.extend(note.id for note in page)
+            if not page.has_next():
+                break
+            params = {'after': page.next_cursor}
+        self.assertEqual(seen, [note.id for note in self.notes])
+
+    # курсор "назад" возвращает предыдущую страницу
+    def test_previous_cursor(self):
+        first = self.get_page()
+        second = self.get_page(after=first.next_cursor)
+        self.assertTrue(second.has_previous())
+        back = self.get_page(before=second.previous_cursor)
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+
+    # некорректный курсор приводит к первой странице
+    def test_invalid_cursor(self):
+        page = self.get_page(after='abc')
+        self.assertEqual(list(page), self.notes[:2])
+
+    # страница выбирается одним запросом без OFFSET и без COUNT(*)
+    def test_page_query_without_offset(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.get_page(after=self.notes[2].id)
+        # запрос строк страницы (ETag списка считается отдельно)
+        page_sql = [query['sql'].upper() for query in queries
+                    if '"notes_note"."title"' in query['sql']]
+        self.assertEqual(len(page_sql), 1)
+        self.assertNotIn('OFFSET', page_sql[0])
+        self.assertNotIn('COUNT(', page_sql[0])
+
+
+class TestNotesListExcerpt(TestCase):
+    URL_NOTES_LIST = reverse('notes:list')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.long_note = Note.objects.create(
+            title='Длинная', text='Слово ' * 1000, slug='long',
+            author=cls.author)
+        Note.objects.bulk_create([Note(title='Пачка', text='Коротко',
+                                       slug='bulk', author=cls.author)])
+        cls.author_client = logged_in_client(cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    # начало и длина текста считаются при save() и bulk_create()
+    def test_text_stats(self):
+        self.assertEqual(self.long_note.text_length, 6000)
+        self.assertEqual(self.long_note.excerpt,
+                         self.long_note.text[:EXCERPT_LENGTH])
+        bulk = Note.objects.get(slug='bulk')
+        self.assertEqual((bulk.excerpt, bulk.text_length), ('Коротко', 7))
+
+    # правка текста пересчитывает начало и длину
+    def test_edit_updates_excerpt(self):
+        self.author_client.post(reverse('notes:edit', args=('long',)), data={
+            'title': 'Длинная', 'text': 'Короче', 'slug': 'long'})
+        note = Note.objects.get(slug='long')
+        self.assertEqual((note.excerpt, note.text_length), ('Короче', 6))
+
+    # список показывает начало текста, не выбирая сам текст
+    def test_list_skips_text_column(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.author_client.get(self.URL_NOTES_LIST)
+        self.assertContains(response, 'Коротко')
+        self.assertContains(response, '&hellip;')
+        page_sql = [query['sql'] for query in queries
+                    if '"notes_note"."title"' in query['sql']]
+        self.assertEqual(len(page_sql), 1)
+        self.assertNotIn('"notes_note"."text"', page_sql[0])
@@ -0,0 +1,57 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from notes.instrumentation import query_budget_violations, registry
+from notes.models import Note
+
+User = get_user_model()
+
+
+class TestInstrumentation(TestCase):
+    URL_LIST = reverse('notes:list')
+    URL_METRICS = reverse('notes:metrics')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.staff = User.objects.create(username='Админ', is_staff=True)
+        Note.objects.create(title='Заголовок', text='Текст',
+                            slug='note-slug', author=cls.author)
+
+    def setUp(self):
+        registry.reset()
+        self.client.force_login(self.author)
+
+    def test_server_timing_header(self):
+        response = self.client.get(self.URL_LIST)
+        timing = response['Server-Timing']
+        for metric in ('db;dur=', 'tpl;dur=', 'total;dur='):
+            self.assertIn(metric, timing)
+
+    @override_settings(NOTES_SERVER_TIMING=False)
+    def test_server_timing_disabled(self):
+        response = self.client.get(self.URL_LIST)
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    # замеры копятся по view и отдаются только персоналу
+    def test_metrics_endpoint(self):
+        self.client.get(self.URL_LIST)
+        self.client.get(self.URL_LIST)
+        response = self.client.get(self.URL_METRICS)
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        self.client.force_login(self.staff)
+        data = self.client.get(self.URL_METRICS).json()
+        views = data['views']
+        self.assertEqual(views['notes:list']['count'], 2)
+        self.assertGreater(views['notes:list']['queries_max'], 0)
+        self.assertEqual(
+            sum(views['notes:list']['total_ms_buckets'].values()), 2)
+
+    def test_budget_violation(self):
+        with query_budget_violations({'notes:list': 0}) as violations:
+            self.client.get(self.URL_LIST)
+        self.assertEqual(len(violations), 1)
+        self.assertIn('notes:list', violations[0])
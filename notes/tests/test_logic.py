@@ -1,48 +1,42 @@
+import threading
+from http import HTTPStatus
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ObjectDoesNotExist
-from django.test import Client, TestCase
+from django.db import connection
+from django.test import Client, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from pytils.translit import slugify
 
-from notes.models import Note
+from notes.models import Note, can_return_rows
 from notes.forms import WARNING
+from notes.tests.fixtures import NOTE_DATA, NotesFixtures
 
 User = get_user_model()
 
 
-class TestNotesLogic(TestCase):
+class TestNotesLogic(NotesFixtures, TestCase):
 
     # создаём контент для проверок
     @classmethod
     def setUpTestData(cls):
-        # автор и его клиент
-        cls.author = User.objects.create(username='Автор')
-        cls.author_client = Client()
-        cls.author_client.force_login(cls.author)
+        super().setUpTestData()
         # отдельно словарь для сохранения исходных параметров
-        cls.note_data = {
-            'title': 'Заголовок',
-            'text': 'Текст',
-            'slug': 'note-slug',
-            'author': cls.author
-        }
-        cls.note = Note.objects.create(**cls.note_data)
+        cls.note_data = {**NOTE_DATA, 'author': cls.author}
         cls.form_data = {
             'title': 'Заголовок из формы',
             'text': 'Текст из формы',
             'slug': 'slug-from-form'
         }
-        # просто пользователь и его клиент
-        cls.user = User.objects.create(username='Пользователь')
-        cls.simple_auth_client = Client()
-        cls.simple_auth_client.force_login(cls.user)
 
     # пользователь может создать заметку
     def test_user_creation_note(self):
         # определяем начальное количество заметок
         notes_count = Note.objects.count()
         url = reverse('notes:add')
-        response = self.simple_auth_client.post(url, data=self.form_data)
+        response = self.notauthor_client.post(url, data=self.form_data)
         # Проверяем, что был выполнен редирект
         self.assertRedirects(response, reverse('notes:success'))
         # проверяем, что количество заметок увеличилось
@@ -52,7 +46,7 @@ class TestNotesLogic(TestCase):
         assert new_note.title == self.form_data['title']
         assert new_note.text == self.form_data['text']
         assert new_note.slug == self.form_data['slug']
-        assert new_note.author == self.user
+        assert new_note.author == self.notauthor
 
     # аноним не может создать заметку
     def test_anonymous_creation_note(self):
@@ -74,7 +68,7 @@ class TestNotesLogic(TestCase):
         url = reverse('notes:add')
         # Подменяем slug новой заметки на slug уже существующей записи:
         self.form_data['slug'] = self.note.slug
-        response = self.simple_auth_client.post(url, data=self.form_data)
+        response = self.notauthor_client.post(url, data=self.form_data)
         # Проверяем, что в ответе содержится ошибка формы для поля slug:
         self.assertFormError(response, 'form', 'slug',
                              errors=(self.form_data['slug'] + WARNING))
@@ -87,7 +81,7 @@ class TestNotesLogic(TestCase):
         notes_count = Note.objects.count()
         url = reverse('notes:add')
         self.form_data.pop('slug')
-        response = self.simple_auth_client.post(url, data=self.form_data)
+        response = self.notauthor_client.post(url, data=self.form_data)
         # Проверяем, что даже без slug заметка была создана
         self.assertRedirects(response, reverse('notes:success'))
         # проверяем, что количество заметок увеличилось
@@ -96,6 +90,39 @@ class TestNotesLogic(TestCase):
         expected_slug = slugify(self.form_data['title'])
         self.assertIsInstance(Note.objects.get(slug=expected_slug), Note)
 
+    # заметки с одинаковым заголовком получают slug с суффиксом
+    def test_slug_suffix_for_same_title(self):
+        url = reverse('notes:add')
+        self.form_data.pop('slug')
+        for _ in range(3):
+            self.notauthor_client.post(url, data=self.form_data)
+        base = slugify(self.form_data['title'])
+        slugs = set(Note.objects.filter(
+            author=self.notauthor).values_list('slug', flat=True))
+        self.assertEqual(slugs, {base, f'{base}-2', f'{base}-3'})
+
+    # создание заметки: все запросы, кроме чтения сессии и пользователя.
+    # Один UPDATE ... RETURNING счётчика изменений (без RETURNING — ещё
+    # SELECT) и INSERT заметки в транзакции save; под TestCase она
+    # вложенная, поэтому вместо BEGIN/COMMIT — точка сохранения
+    def test_creation_statements(self):
+        url = reverse('notes:add')
+        self.form_data.pop('slug')
+        with CaptureQueriesContext(connection) as queries:
+            self.notauthor_client.post(url, data=self.form_data)
+        sql = [query['sql'] for query in queries
+               if 'django_session' not in query['sql']
+               and 'auth_user' not in query['sql']]
+        counter = ['UPDATE']
+        if not can_return_rows(connection):
+            counter.append('SELECT')
+        self.assertEqual([statement.split()[0] for statement in sql],
+                         ['SAVEPOINT', *counter, 'INSERT', 'RELEASE'])
+        note_queries = [statement for statement in sql
+                        if 'notes_note' in statement]
+        self.assertEqual(len(note_queries), 1)
+        self.assertTrue(note_queries[0].startswith('INSERT'))
+
     # автор может редактировать заметку
     def test_author_can_edit_note(self):
         url = reverse('notes:edit', args=(self.note.slug,))
@@ -123,7 +150,7 @@ class TestNotesLogic(TestCase):
     # посторонний не может редактировать заметку, она остаётся прежней
     def test_notauthor_cant_edit_note(self):
         url = reverse('notes:edit', args=(self.note.slug,))
-        self.simple_auth_client.post(url, data=self.form_data)
+        self.notauthor_client.post(url, data=self.form_data)
         # Проверяем, что атрибуты заметки остались прежние
         self.note.refresh_from_db()
         for attr_name in ['title', 'text', 'slug']:
@@ -141,3 +168,44 @@ class TestNotesLogic(TestCase):
         for attr_name in ['title', 'text', 'slug']:
             self.assertEqual(getattr(self.note, attr_name),
                              self.note_data.get(attr_name))
+
+
+class TestConcurrentCreation(TransactionTestCase):
+    THREADS = 8
+
+    def setUp(self):
+        if connection.is_in_memory_db():
+            self.skipTest('нужна файловая SQLite с настоящими блокировками')
+        self.user = User.objects.create(username='Пользователь')
+        self.client.force_login(self.user)
+
+    # одновременное создание заметок с одним заголовком не даёт 500
+    def test_concurrent_same_title(self):
+        url = reverse('notes:add')
+        session_key = self.client.session.session_key
+        barrier = threading.Barrier(self.THREADS)
+        statuses = []
+
+        def create():
+            client = Client()
+            client.cookies[settings.SESSION_COOKIE_NAME] = session_key
+            try:
+                barrier.wait()
+                response = client.post(
+                    url, data={'title': 'Одна тема', 'text': 'Текст'})
+                statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=create)
+                   for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(statuses, [HTTPStatus.FOUND] * self.THREADS)
+        base = slugify('Одна тема')
+        expected = {base} | {f'{base}-{number}'
+                             for number in range(2, self.THREADS + 1)}
+        self.assertEqual(
+            set(Note.objects.values_list('slug', flat=True)), expected)
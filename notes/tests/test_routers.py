@@ -0,0 +1,110 @@
+import json
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from notes.middleware import PrimaryPinMiddleware
+from notes.models import ChangeSequence, Note
+from notes.routers import PrimaryReplicaRouter
+
+User = get_user_model()
+
+
+@override_settings(NOTES_READ_REPLICAS=['replica'])
+class TestReplicaRouting(TestCase):
+    """default и replica — два разных файла SQLite.
+
+    Реплика заполняется отдельно и «отстаёт»: в ней старый заголовок.
+    """
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.note = Note.objects.create(title='С основной БД', text='Текст',
+                                       slug='note-slug', author=cls.author)
+        User.objects.using('replica').create(
+            pk=cls.author.pk, username=cls.author.username)
+        Note.objects.using('replica').create(
+            pk=cls.note.pk, title='С реплики', text='Текст',
+            slug=cls.note.slug, author_id=cls.author.pk)
+        cls.url_detail = reverse('notes:detail', args=(cls.note.slug,))
+
+    def setUp(self):
+        self.client.force_login(self.author)
+
+    # чтение заметок уходит на реплику
+    def test_read_from_replica(self):
+        response = self.client.get(self.url_detail)
+        self.assertContains(response, 'С реплики')
+
+    # запись идёт в основную БД, и после неё клиент читает с основной
+    def test_pinned_after_write(self):
+        response = self.client.post(
+            reverse('notes:edit', args=(self.note.slug,)),
+            {'title': 'Исправлено', 'text': 'Текст', 'slug': self.note.slug})
+        self.assertRedirects(response, reverse('notes:success'))
+        self.assertEqual(Note.objects.using('default').get(
+            pk=self.note.pk).title, 'Исправлено')
+        self.assertEqual(Note.objects.using('replica').get(
+            pk=self.note.pk).title, 'С реплики')
+        self.assertContains(self.client.get(self.url_detail), 'Исправлено')
+
+    # по истечении срока закрепления чтение снова идёт на реплику
+    def test_pin_expires(self):
+        self.client.cookies[PrimaryPinMiddleware.cookie_name] = str(
+            time.time() - 1)
+        self.assertContains(self.client.get(self.url_detail), 'С реплики')
+
+    def test_create_goes_to_primary(self):
+        self.client.post(reverse('notes:add'),
+                         {'title': 'Новая', 'text': 'Текст', 'slug': 'new'})
+        self.assertTrue(
+            Note.objects.using('default').filter(slug='new').exists())
+        self.assertFalse(
+            Note.objects.using('replica').filter(slug='new').exists())
+
+    # сжатый текст читается из той же БД, что и сама заметка, даже если
+    # роутер выбрал бы для NoteBody другую реплику
+    @override_settings(NOTES_BODY_COMPRESS_THRESHOLD=100)
+    @mock.patch.object(
+        PrimaryReplicaRouter, 'db_for_read',
+        lambda self, model, **hints: 'replica' if model is Note else 'default')
+    def test_compressed_body_from_replica(self):
+        texts = {'default': 'Основная. ', 'replica': 'Реплика. '}
+        for alias, text in texts.items():
+            Note.objects.using(alias).create(
+                pk=self.note.pk + 1, title='Длинная', text=text * 50,
+                slug='long', author_id=self.author.pk)
+        url = reverse('notes:detail', args=('long',))
+        for urlconf in ('yanote.urls', 'yanote.urls_async'):
+            with self.subTest(urlconf=urlconf):
+                with override_settings(ROOT_URLCONF=urlconf):
+                    content = b''.join(
+                        self.client.get(url).streaming_content).decode()
+                self.assertIn('Реплика.', content)
+                self.assertNotIn('Основная.', content)
+
+    # импорт пишет заметки и счётчик изменений в основную БД
+    def test_import_uses_primary(self):
+        replica_seqs = ChangeSequence.objects.using('replica')
+        replica_seq = list(replica_seqs.values_list('value', flat=True))
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'notes.jsonl'
+            path.write_text(json.dumps(
+                {'title': 'Импорт', 'text': 'Текст', 'slug': 'note-slug',
+                 'author': self.author.username},
+                ensure_ascii=False) + '\n', encoding='utf-8')
+            call_command('import_notes', str(path), stdout=StringIO())
+        imported = Note.objects.using('default').get(title='Импорт')
+        self.assertEqual(imported.slug, 'note-slug-2')
+        self.assertGreater(imported.change_seq, self.note.change_seq)
+        self.assertEqual(
+            list(replica_seqs.values_list('value', flat=True)), replica_seq)
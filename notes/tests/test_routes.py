@@ -1,15 +1,13 @@
 from http import HTTPStatus
 
-from django.contrib.auth import get_user_model
 from django.test import Client, TestCase
 from django.urls import reverse
 
 from notes.models import Note
+from notes.tests.fixtures import NotesFixtures
 
-User = get_user_model()
 
-
-class TestRoutes(TestCase):
+class TestRoutes(NotesFixtures, TestCase):
     URL_HOME = reverse('notes:home')
     URL_LOGIN = reverse('users:login')
     URL_LOGOUT = reverse('users:logout')
@@ -17,18 +15,12 @@ class TestRoutes(TestCase):
     URL_NOTES_LIST = reverse('notes:list')
     URL_ADD_NOTE = reverse('notes:add')
     URL_ADD_SUCCESS = reverse('notes:success')
+    URL_SEARCH = reverse('notes:search')
 
     # фикстуры
     @classmethod
     def setUpTestData(cls):
-        cls.author = User.objects.create(username='Автор')
-        cls.note = Note.objects.create(title='Заголовок',
-                                       text='Текст',
-                                       slug='note-slug',
-                                       author=cls.author)
-        cls.notauthor = User.objects.create(username='Неавтор')
-        cls.author_client = Client()
-        cls.author_client.force_login(cls.author)
+        super().setUpTestData()
         cls.URL_NOTE_DETAIL = reverse(
             'notes:detail', kwargs={'slug': cls.note.slug})
         cls.URL_NOTE_EDIT = reverse(
@@ -49,12 +41,13 @@ class TestRoutes(TestCase):
                 response = self.client.get(url)
                 self.assertEqual(response.status_code, HTTPStatus.OK)
 
-    # доступность списка, добавления, успеха для залогиненого
+    # доступность списка, добавления, успеха, поиска для залогиненого
     def test_user_routes(self):
         urls = (
             self.URL_NOTES_LIST,
             self.URL_ADD_NOTE,
             self.URL_ADD_SUCCESS,
+            self.URL_SEARCH,
         )
         for url in urls:
             with self.subTest(name=url):
@@ -80,10 +73,9 @@ class TestRoutes(TestCase):
             self.URL_NOTE_EDIT,
             self.URL_NOTE_DELETE,
         )
-        self.client.force_login(self.notauthor)
         for url in urls:
             with self.subTest(name=url):
-                response = self.client.get(url)
+                response = self.notauthor_client.get(url)
                 self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
 
     # редирект анонима на логин при любых действиях
@@ -95,6 +87,7 @@ class TestRoutes(TestCase):
             self.URL_NOTE_DETAIL,
             self.URL_NOTE_EDIT,
             self.URL_NOTE_DELETE,
+            self.URL_SEARCH,
         )
         # В цикле перебираем имена страниц, с которых ожидаем редирект:
         for url in urls:
@@ -104,3 +97,83 @@ class TestRoutes(TestCase):
                 response = self.client.get(url)
                 # Проверяем, что редирект приведёт именно на указанную ссылку.
                 self.assertRedirects(response, redirect_url)
+
+
+class TestConditionalGet(NotesFixtures, TestCase):
+    URL_NOTES_LIST = reverse('notes:list')
+    URL_LOGIN = reverse('users:login')
+    URL_LOGOUT = reverse('users:logout')
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.URL_NOTE_DETAIL = reverse(
+            'notes:detail', kwargs={'slug': cls.note.slug})
+
+    # повторный запрос с ETag получает 304 без отрисовки шаблона
+    def test_not_modified(self):
+        for url in (self.URL_NOTE_DETAIL, self.URL_NOTES_LIST):
+            with self.subTest(name=url):
+                etag = self.author_client.get(url)['ETag']
+                response = self.author_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code,
+                                 HTTPStatus.NOT_MODIFIED)
+                self.assertFalse(response.templates)
+
+    # заметка не менялась с Last-Modified - 304
+    def test_detail_if_modified_since(self):
+        last_modified = self.author_client.get(
+            self.URL_NOTE_DETAIL)['Last-Modified']
+        response = self.author_client.get(
+            self.URL_NOTE_DETAIL, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    # после редактирования заметки ETag меняется
+    def test_edit_changes_etag(self):
+        etags = {url: self.author_client.get(url)['ETag']
+                 for url in (self.URL_NOTE_DETAIL, self.URL_NOTES_LIST)}
+        self.note.text = 'Новый текст'
+        self.note.save()
+        for url, etag in etags.items():
+            with self.subTest(name=url):
+                response = self.author_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    # после удаления заметки ETag списка меняется
+    def test_delete_changes_list_etag(self):
+        Note.objects.create(title='Вторая', text='Текст', slug='second',
+                            author=self.author)
+        etag = self.author_client.get(self.URL_NOTES_LIST)['ETag']
+        self.note.delete()
+        response = self.author_client.get(
+            self.URL_NOTES_LIST, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    # после смены автора заметки ETag списка прежнего автора меняется
+    def test_author_change_changes_list_etag(self):
+        # последнее изменение автора — не у переносимой заметки
+        Note.objects.create(title='Вторая', text='Текст', slug='second',
+                            author=self.author)
+        etag = self.author_client.get(self.URL_NOTES_LIST)['ETag']
+        note = Note.objects.get(pk=self.note.pk)
+        note.author = self.notauthor
+        note.save()
+        response = self.author_client.get(
+            self.URL_NOTES_LIST, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    # после нового входа CSRF-токен другой: старый ETag списка не подходит
+    def test_login_changes_list_etag(self):
+        self.author.set_password('пароль-123')
+        self.author.save()
+        credentials = {'username': self.author.username,
+                       'password': 'пароль-123'}
+        client = Client()
+        client.post(self.URL_LOGIN, credentials)
+        etag = client.get(self.URL_NOTES_LIST)['ETag']
+        client.post(self.URL_LOGOUT)
+        client.post(self.URL_LOGIN, credentials)
+        response = client.get(self.URL_NOTES_LIST, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
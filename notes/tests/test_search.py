@@ -0,0 +1,63 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from notes.models import Note
+
+User = get_user_model()
+
+
+class TestSearch(TestCase):
+    URL_SEARCH = reverse('notes:search')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.in_title = Note.objects.create(title='Купить молоко',
+                                           text='В магазине у дома',
+                                           slug='milk',
+                                           author=cls.author)
+        cls.in_text = Note.objects.create(title='Покупки',
+                                          text='Хлеб, молоко, сыр',
+                                          slug='shopping',
+                                          author=cls.author)
+        cls.other = Note.objects.create(title='Чужое молоко',
+                                        text='Текст',
+                                        slug='other-milk',
+                                        author=User.objects.create(
+                                            username='Неавтор'))
+
+    def setUp(self):
+        self.client.force_login(self.author)
+
+    def search(self, query):
+        response = self.client.get(self.URL_SEARCH, {'q': query})
+        return [note.pk for note in response.context['object_list']]
+
+    # находятся только заметки автора, совпадение в заголовке выше
+    def test_ranked_author_results(self):
+        self.assertEqual(self.search('молоко'),
+                         [self.in_title.pk, self.in_text.pk])
+
+    # изменения и удаления заметок сразу попадают в индекс
+    def test_index_follows_changes(self):
+        self.in_text.text = 'Хлеб и сыр'
+        self.in_text.save()
+        self.in_title.delete()
+        self.assertEqual(self.search('молоко'), [])
+        self.assertEqual(self.search('сыр'), [self.in_text.pk])
+
+    # синтаксис FTS5 в запросе не приводит к ошибке
+    def test_query_is_escaped(self):
+        self.assertEqual(self.search('"молоко* OR ('), [])
+
+    # после перестроения индекса поиск работает как прежде
+    def test_rebuild_command(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('индекс FTS5 есть только в SQLite')
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.search('сыр'), [self.in_text.pk])
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+
+from notes.sqlite import apply_pragmas
+
+
+class TestSqlitePragmas(SimpleTestCase):
+    databases = {'default'}
+
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('только для SQLite')
+
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    # новое соединение получает прагмы из настроек
+    def test_new_connection_is_tuned(self):
+        connection.close()
+        connection.ensure_connection()
+        self.assertEqual(self.pragma('busy_timeout'),
+                         settings.SQLITE_PRAGMAS['busy_timeout'])
+        self.assertEqual(self.pragma('cache_size'),
+                         settings.SQLITE_PRAGMAS['cache_size'])
+        # synchronous=NORMAL
+        self.assertEqual(self.pragma('synchronous'), 1)
+        if not connection.is_in_memory_db():
+            self.assertEqual(self.pragma('journal_mode'), 'wal')
+
+    @override_settings(SQLITE_PRAGMAS={'busy_timeout; DROP TABLE x': 1})
+    def test_invalid_name(self):
+        with self.assertRaises(ValueError):
+            apply_pragmas(connection)
@@ -0,0 +1,77 @@
+"""Ограничение частоты входа и регистрации.
+
+Попытки считаются в кеше по IP клиента и по имени пользователя в окнах
+фиксированной длины (AUTH_THROTTLE_RATES). Лишний POST отклоняется
+ответом 429 до валидации формы, то есть до хеширования пароля, и поток
+подбора паролей не занимает процессор воркеров. С общим кешем
+(memcached, Redis) лимиты действуют на все процессы, с LocMemCache —
+на каждый процесс отдельно.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+THROTTLE_KEY = 'auth:throttle:{scope}:{kind}:{value}:{window}'
+
+
+def _username(request):
+    username = request.POST.get('username', '')
+    # хеш вместо имени: ключ кеша без пробелов и ограничения длины
+    return hashlib.sha256(username.casefold().encode()).hexdigest()
+
+
+# по каким признакам запроса считаются попытки
+KINDS = {
+    'ip': lambda request: request.META.get('REMOTE_ADDR', ''),
+    'username': _username,
+}
+
+
+def _hit(key, period):
+    """Увеличивает счётчик окна и возвращает его значение."""
+    # add не перезаписывает чужой счётчик, incr атомарен в кеше
+    cache.add(key, 0, period)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # ключ вытеснен между add и incr
+        cache.set(key, 1, period)
+        return 1
+
+
+def check(request, scope):
+    """Учитывает попытку; секунды до конца окна, если лимит превышен."""
+    now = int(time.time())
+    retry_after = None
+    for kind, rate in settings.AUTH_THROTTLE_RATES.items():
+        if rate is None:
+            continue
+        limit, period = rate
+        key = THROTTLE_KEY.format(
+            scope=scope, kind=kind, value=KINDS[kind](request),
+            window=now // period)
+        if _hit(key, period) > limit:
+            retry_after = max(retry_after or 0, period - now % period)
+    return retry_after
+
+
+def throttle(scope):
+    """Декоратор view: POST сверх AUTH_THROTTLE_RATES получает 429."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method == 'POST':
+                retry_after = check(request, scope)
+                if retry_after is not None:
+                    response = render(
+                        request, 'registration/throttled.html',
+                        {'retry_after': retry_after}, status=429)
+                    response['Retry-After'] = str(retry_after)
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
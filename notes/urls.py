@@ -1,6 +1,6 @@
 from django.urls import path
 
-from notes import views
+from notes import api, views
 
 app_name = 'notes'
 
@@ -11,5 +11,13 @@ urlpatterns = [
     path('note/<slug:slug>/', views.NoteDetail.as_view(), name='detail'),
     path('delete/<slug:slug>/', views.NoteDelete.as_view(), name='delete'),
     path('notes/', views.NotesList.as_view(), name='list'),
+    path('notes/bulk/', views.NoteBulk.as_view(), name='bulk'),
     path('done/', views.NoteSuccess.as_view(), name='success'),
+    path('search/', views.NoteSearch.as_view(), name='search'),
+    path('metrics/', views.Metrics.as_view(), name='metrics'),
+    path('api/notes/', api.NoteListApi.as_view(), name='api_list'),
+    path('api/notes/<slug:slug>/', api.NoteDetailApi.as_view(),
+         name='api_detail'),
+    path('api/changes/', api.NoteChangesApi.as_view(), name='api_changes'),
+    path('api/sync/', api.NoteSyncApi.as_view(), name='api_sync'),
 ]
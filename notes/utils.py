@@ -0,0 +1,12 @@
+from django.db import connections
+
+
+def chunks(sequence, size):
+    """Разбивает последовательность на части не длиннее size."""
+    for start in range(0, len(sequence), size):
+        yield sequence[start:start + size]
+
+
+def max_query_params(using):
+    """Сколько параметров можно передать в одном запросе к БД using."""
+    return connections[using].features.max_query_params or 10000
@@ -1,9 +1,22 @@
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.conf import settings
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.db import DEFAULT_DB_ALIAS, IntegrityError
+from django.http import Http404, JsonResponse
+from django.template.loader import render_to_string
 from django.urls import reverse_lazy
+from django.utils.decorators import method_decorator
 from django.views import generic
+from django.views.decorators.http import condition
 
-from .forms import NoteForm
-from .models import Note
+from . import bulk
+from .bodies import stream_page
+from .cache import fragment_key, get_fragment, set_fragment, stats
+from .conditional import note_etag, note_last_modified, notes_list_etag
+from .forms import WARNING, NoteBulkForm, NoteForm
+from .instrumentation import registry
+from .models import Note, NoteBody
+from .pagination import paginate_keyset, parse_cursor
+from .search import search_notes
 
 
 class Home(generic.TemplateView):
@@ -26,22 +39,34 @@ class NoteBase(LoginRequiredMixin):
         return self.model.objects.filter(author=self.request.user)
 
 
-class NoteCreate(NoteBase, generic.CreateView):
-    """Добавление заметки."""
+class NoteFormMixin(NoteBase):
+    """Общая часть создания и редактирования заметки."""
     template_name = 'notes/form.html'
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        """Сохраняет заметку; занятый slug возвращает как ошибку формы."""
+        try:
+            return super().form_valid(form)
+        except IntegrityError:
+            slug = form.instance.slug
+            if not self.model.objects.filter(slug=slug).exclude(
+                    pk=form.instance.pk).exists():
+                raise
+            form.add_error('slug', slug + WARNING)
+            return self.form_invalid(form)
+
+
+class NoteCreate(NoteFormMixin, generic.CreateView):
+    """Добавление заметки."""
+
+    def form_valid(self, form):
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
+class NoteUpdate(NoteFormMixin, generic.UpdateView):
     """Редактирование заметки."""
-    template_name = 'notes/form.html'
-    form_class = NoteForm
 
 
 class NoteDelete(NoteBase, generic.DeleteView):
@@ -49,11 +74,121 @@ class NoteDelete(NoteBase, generic.DeleteView):
     template_name = 'notes/delete.html'
 
 
+class NoteBulk(NoteBase, generic.FormView):
+    """Удаление или правка нескольких заметок одним запросом."""
+    template_name = 'notes/bulk.html'
+    form_class = NoteBulkForm
+    http_method_names = ['post']
+
+    def form_valid(self, form):
+        data = form.cleaned_data
+        refs = {'ids': data['ids'], 'slugs': data['slugs']}
+        try:
+            if data['action'] == form.DELETE:
+                bulk.delete_notes(self.request.user, **refs)
+            else:
+                bulk.update_notes(
+                    self.request.user, {'title': data['title']}, **refs)
+        except bulk.NotesNotFound:
+            # как и у одиночных view, чужая заметка неотличима от
+            # несуществующей
+            raise Http404
+        return super().form_valid(form)
+
+
+@method_decorator(condition(etag_func=notes_list_etag), name='get')
 class NotesList(NoteBase, generic.ListView):
     """Список всех заметок пользователя."""
     template_name = 'notes/list.html'
+    fragment_template_name = 'includes/notes_list.html'
+    fragment = None
 
-
+    def get_queryset(self):
+        """Без полного текста: строке списка хватает начала и длины."""
+        return super().get_queryset().for_list()
+
+    def get_paginate_by(self, queryset):
+        # для готового фрагмента страницу из БД выбирать не нужно
+        if self.fragment is not None:
+            return None
+        return settings.NOTES_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, page_size):
+        """Курсорная пагинация по (author_id, id) вместо OFFSET."""
+        after, before = self.get_cursors()
+        page = paginate_keyset(queryset, page_size, after, before)
+        return None, page, page.object_list, page.has_other_pages()
+
+    def get_cursors(self):
+        return (parse_cursor(self.request.GET.get('after')),
+                parse_cursor(self.request.GET.get('before')))
+
+    def get_context_data(self, **kwargs):
+        """Берёт отрисованный список из кеша автора или рисует и кладёт."""
+        after, before = self.get_cursors()
+        key = fragment_key(
+            self.request.user.pk,
+            f'{settings.NOTES_PAGE_SIZE}:{after}:{before}',
+        )
+        self.fragment = get_fragment(key)
+        context = super().get_context_data(**kwargs)
+        if self.fragment is None:
+            self.fragment = render_to_string(
+                self.fragment_template_name, context, self.request)
+            # список с отстающей реплики мог бы надолго остаться в кеше
+            if self.object_list.db == DEFAULT_DB_ALIAS:
+                set_fragment(key, self.fragment)
+        context['notes_fragment'] = self.fragment
+        return context
+
+
+@method_decorator(
+    condition(etag_func=note_etag, last_modified_func=note_last_modified),
+    name='get',
+)
 class NoteDetail(NoteBase, generic.DetailView):
-    """Заметка подробно."""
+    """Заметка подробно; сжатый текст распаковывается потоком."""
     template_name = 'notes/detail.html'
+
+    def render_to_response(self, context, **response_kwargs):
+        note = self.object
+        if not note.body_compressed:
+            context['note_text'] = note.text
+            return super().render_to_response(context, **response_kwargs)
+        data = NoteBody.objects.using(note._state.db).values_list(
+            'data', flat=True).get(note_id=note.pk)
+        return stream_page(self.request, self.template_name, context, data)
+
+
+class NoteSearch(LoginRequiredMixin, generic.TemplateView):
+    """Полнотекстовый поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()
+        page = parse_cursor(self.request.GET.get('page')) or 1
+        notes, has_next = search_notes(
+            self.request.user, query, page, settings.NOTES_PAGE_SIZE)
+        context.update(
+            query=query,
+            object_list=notes,
+            page=page,
+            previous_page=page - 1 if page > 1 else None,
+            next_page=page + 1 if has_next else None,
+        )
+        return context
+
+
+class Metrics(UserPassesTestMixin, generic.View):
+    """Замеры view и кеша списка в текущем процессе, только для персонала."""
+    raise_exception = True
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request):
+        return JsonResponse({
+            'views': registry.snapshot(),
+            'list_cache': {'hits': stats.hits, 'misses': stats.misses},
+        })
@@ -9,8 +9,23 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanote.settings')
 
+
+class AsyncViewsHandler(ASGIHandler):
+    """Отдаёт страницы заметок async-версиями (yanote.urls_async)."""
+
+    async def get_response_async(self, request):
+        request.urlconf = 'yanote.urls_async'
+        return await super().get_response_async(request)
+
+
+def get_asgi_application():
+    django.setup(set_prefix=False)
+    return AsyncViewsHandler()
+
+
 application = get_asgi_application()
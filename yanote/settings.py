@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -21,29 +22,53 @@ INSTALLED_APPS = [
     'notes.apps.NotesConfig'
 ]
 
+# Кеш default общий для всех процессов сервера (Memcached, Redis). Только
+# тогда сессии и пользователь сессии читаются из кеша: в LocMemCache у
+# каждого процесса своя копия, и выход или смена пароля, сделанные в
+# одном процессе, не видны остальным. Вместе с флагом нужно сменить
+# CACHES; сочетание проверяется при запуске (notes.checks).
+NOTES_SHARED_CACHE = False
+
 MIDDLEWARE = [
+    'notes.middleware.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'notes.middleware.StaticFilesMiddleware',
+    'notes.middleware.HtmlGZipMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    ('notes.middleware.CachedAuthenticationMiddleware' if NOTES_SHARED_CACHE
+     else 'django.contrib.auth.middleware.AuthenticationMiddleware'),
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'notes.middleware.PrimaryPinMiddleware',
 ]
 
 ROOT_URLCONF = 'yanote.urls'
 
+TEST_RUNNER = 'notes.test_runner.TestRunner'
+
+# Загрузчики шаблонов. Вне DEBUG шаблоны компилируются один раз на процесс
+# (cached.Loader), при отладке перечитываются с диска на каждый запрос.
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'notes.context_processors.fragment_cache',
+            ],
+            'loaders': TEMPLATE_LOADERS if DEBUG else [
+                ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
             ],
         },
     },
@@ -56,9 +81,82 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # тестовая БД в файле: конкурентным тестам нужны настоящие
+        # блокировки SQLite, а не разделяемый кеш in-memory базы
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+    },
+    # реплика только для чтения; в продакшене NAME/HOST указывают на
+    # копию default, локально это отдельный файл для тестов маршрутизации
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db_replica.sqlite3',
+        'TEST': {'NAME': BASE_DIR / 'test_db_replica.sqlite3'},
+    },
+}
+
+DATABASE_ROUTERS = ['notes.routers.PrimaryReplicaRouter']
+
+# Реплики, на которые уходит чтение заметок; пусто — всё читается с default.
+NOTES_READ_REPLICAS = []
+# Сколько секунд после записи клиент читает только с основной БД.
+NOTES_PRIMARY_PIN_SECONDS = 5
+
+# Прагмы для каждого нового соединения с SQLite (notes.sqlite).
+SQLITE_PRAGMAS = {
+    # читатели не блокируют писателя и наоборот; режим хранится в файле БД
+    'journal_mode': 'WAL',
+    # ожидание блокировки записи вместо немедленного "database is locked"
+    'busy_timeout': 10000,
+    # в WAL fsync только при checkpoint; коммит не теряет целостность,
+    # но может откатиться при отключении питания
+    'synchronous': 'NORMAL',
+    # чтение файла БД через отображение в память, до 256 МБ
+    'mmap_size': 256 * 1024 * 1024,
+    # кеш страниц соединения: отрицательное значение — в КБ, 64 МБ
+    'cache_size': -64 * 1024,
+}
+
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
+# С общим кешем сессии читаются из кеша, в БД — только запись и промахи
+# кеша; иначе каждая сессия читается из БД.
+SESSION_ENGINE = (
+    'django.contrib.sessions.backends.cached_db' if NOTES_SHARED_CACHE
+    else 'django.contrib.sessions.backends.db')
+
+
+# Профили хешеров паролей. Первый хешер профиля хеширует новые и
+# перехешированные при входе пароли, остальные только проверяют старые
+# хеши. 'fast' (MD5) — только для тестов: хеш ничего не стоит подобрать.
+PASSWORD_HASHER_PROFILES = {
+    'default': [
+        'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+        'django.contrib.auth.hashers.Argon2PasswordHasher',
+        'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    ],
+    'fast': [
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ],
+}
+# Профиль задаётся переменной окружения YANOTE_PASSWORD_HASHERS.
+PASSWORD_HASHER_PROFILE = os.environ.get('YANOTE_PASSWORD_HASHERS', 'default')
+PASSWORD_HASHERS = PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE]
+# Профиль хешеров в тестах (notes.test_runner и conftest.py).
+TEST_PASSWORD_HASHER_PROFILE = 'fast'
+
+# Лимиты POST на вход и регистрацию (notes.throttle): не больше limit
+# попыток за period секунд с одного IP и для одного имени пользователя.
+# None вместо пары (limit, period) отключает лимит.
+AUTH_THROTTLE_RATES = {
+    'ip': (30, 60),
+    'username': (10, 300),
+}
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -82,8 +180,63 @@ USE_TZ = True
 
 
 STATIC_URL = '/static/'
+# Куда collectstatic собирает статику.
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+# Имена с хешем содержимого и сжатые копии .gz (notes.storage).
+STATICFILES_STORAGE = 'notes.storage.CompressedManifestStaticFilesStorage'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+# Количество заметок на одной странице списка.
+NOTES_PAGE_SIZE = 20
+# Сколько секунд хранится отрисованная страница списка заметок.
+NOTES_LIST_CACHE_TIMEOUT = 300
+# Тексты заметок от этой длины (в символах) хранятся сжатыми в NoteBody.
+NOTES_BODY_COMPRESS_THRESHOLD = 64 * 1024
+# Отдавать статику из STATIC_ROOT самим приложением
+# (StaticFilesMiddleware). Выключите, если её отдаёт веб-сервер или CDN.
+NOTES_SERVE_STATIC = True
+# Сколько секунд клиенты кешируют статику без хеша в имени.
+NOTES_STATIC_MAX_AGE = 60
+# Сжимать HTML-страницы gzip (HtmlGZipMiddleware), если клиент это
+# поддерживает, и с какого размера ответа в байтах. Выключено: сжатие
+# страниц с секретами (CSRF-токен, сессия) рядом с текстом из запроса
+# уязвимо для BREACH, см. notes.middleware.HtmlGZipMiddleware.
+NOTES_GZIP_HTML = False
+NOTES_GZIP_MIN_LENGTH = 1024
+# Страницы, которые сжимаются при NOTES_GZIP_HTML: текст запроса в них
+# не выводится. Поиск (notes:search) повторяет ?q= и сюда не входит.
+NOTES_GZIP_VIEWS = ('notes:list', 'notes:detail')
+# Сколько секунд хранятся фрагменты шаблонов ({% cache %}), например шапка.
+NOTES_FRAGMENT_CACHE_TIMEOUT = 600
+# Наибольшее число изменений в одном ответе синхронизации.
+NOTES_SYNC_BATCH_SIZE = 500
+# Сколько секунд объект пользователя сессии живёт в кеше (notes.auth).
+AUTH_USER_CACHE_TIMEOUT = 300
+# Заголовок Server-Timing с замерами SQL и шаблонов в каждом ответе.
+NOTES_SERVER_TIMING = True
+# Наибольшее число SQL-запросов на запрос к view. Проверяется в тестах
+# под pytest (conftest.py); учитывает чтение сессии и пользователя из БД
+# (NOTES_SHARED_CACHE = False) и холодный кеш.
+NOTES_QUERY_BUDGETS = {
+    'notes:list': 4,
+    # +1 запрос сжатого текста (NoteBody)
+    'notes:detail': 5,
+    'notes:add': 14,
+    'notes:edit': 10,
+    'notes:delete': 8,
+    # на пачку заметок не длиннее max_query_params
+    'notes:bulk': 10,
+    'notes:search': 3,
+    'notes:api_list': 3,
+    'notes:api_detail': 3,
+    'notes:api_changes': 3,
+    'notes:api_sync': 4,
+    # +1 запрос оценки размера таблицы больше EstimatedCountPaginator
+    'admin:notes_note_changelist': 5,
+    # сохранение: проверки формы, change_seq, запись в журнал админки
+    'admin:notes_note_change': 17,
+}
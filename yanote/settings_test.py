@@ -0,0 +1,25 @@
+"""Настройки для быстрого прогона тестов.
+
+    python manage.py test notes --settings=yanote.settings_test --parallel
+    pytest -n auto
+
+Таблицы тестовых БД создаются по моделям без миграций, пароли
+хешируются MD5; полный прогон с миграциями — с yanote.settings.
+Тестовые БД — файлы SQLite, как и в yanote.settings: тестам конкурентной
+записи нужны настоящие блокировки, которых нет у разделяемого кеша
+in-memory базы. Без миграций файл создаётся почти так же быстро.
+"""
+from .settings import *  # noqa: F401, F403
+from .settings import (BASE_DIR, DATABASES, PASSWORD_HASHER_PROFILES,
+                       TEST_PASSWORD_HASHER_PROFILE)
+
+# свои файлы, чтобы не пересоздавать БД полного прогона
+DATABASES = {
+    alias: {**database, 'TEST': {
+        'NAME': BASE_DIR / f'test_fast_{alias}.sqlite3',
+        'MIGRATE': False,
+    }}
+    for alias, database in DATABASES.items()
+}
+
+PASSWORD_HASHERS = PASSWORD_HASHER_PROFILES[TEST_PASSWORD_HASHER_PROFILE]
@@ -4,6 +4,8 @@ from django.contrib.auth.forms import UserCreationForm
 from django.urls import include, path
 from django.views.generic import CreateView
 
+from notes.throttle import throttle
+
 urlpatterns = [
     path('', include('notes.urls')),
     path('admin/', admin.site.urls),
@@ -12,7 +14,7 @@ urlpatterns = [
 auth_urls = ([
     path(
         'login/',
-        auth_views.LoginView.as_view(),
+        throttle('login')(auth_views.LoginView.as_view()),
         name='login',
     ),
     path(
@@ -24,11 +26,11 @@ auth_urls = ([
     ),
     path(
         'signup/',
-        CreateView.as_view(
+        throttle('signup')(CreateView.as_view(
             form_class=UserCreationForm,
             success_url='/',
             template_name='registration/signup.html',
-        ),
+        )),
         name='signup'
     ),
 ], 'users')
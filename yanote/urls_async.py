@@ -0,0 +1,9 @@
+"""URLconf под ASGI: то же, что yanote.urls, но с notes.async_urls."""
+from django.urls import include, path
+
+from yanote import urls
+
+urlpatterns = [path('', include('notes.async_urls'))] + [
+    pattern for pattern in urls.urlpatterns
+    if getattr(pattern, 'app_name', None) != 'notes'
+]